@@ -1 +1,5 @@
 from basketballCrawler import *
+import logging
+
+# the package only logs through its own loggers, see instrumentation.enable_file_logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
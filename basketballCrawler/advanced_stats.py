@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+
+from .gamelog import typed_gamelog
+
+
+# stats summed over a player's games before any rate is computed, so that per
+# game, per season and rolling metrics all come out of the same formulas
+COUNTING_COLUMNS = ['FG', 'FGA', '3P', '3PA', 'FT', 'FTA', 'ORB', 'DRB', 'TRB',
+                    'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'MP']
+GAME_KEYS = ['season', 'Playoffs', 'Date', 'Tm']
+PLAYER_COLUMN = 'player_id'
+METRICS = ['TS%', 'eFG%', 'PER', 'ORtg', 'DRtg', 'OWS', 'DWS', 'WS', 'WS/48']
+
+# PER is scaled so that the league average is 15 every season
+LEAGUE_AVERAGE_PER = 15.0
+
+
+def season_from_dates(dates):
+    """
+    The season (its end year) each game date belongs to.  Seasons start in the
+    second half of October, the 2020 playoffs ran until Oct 11.
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    late = (dates.dt.month > 10) | ((dates.dt.month == 10) & (dates.dt.day >= 15))
+    return dates.dt.year + late.astype(int)
+
+
+def possessions(fga, orb, tov, fta):
+    return fga - orb + tov + 0.44 * fta
+
+
+def played_games(gamelogs, player=PLAYER_COLUMN):
+    """
+    The rows of gamelogs (typed or not) where the player was on the floor, with
+    the counting stats as float64 (missing ones, e.g. 3P before 1980, are 0) and
+    season, Playoffs and player columns added when they are missing.  Game logs
+    of several players need a player column, GameLogStore.read() has player_id.
+    """
+    if not pd.api.types.is_numeric_dtype(gamelogs['PTS']):
+        gamelogs = typed_gamelog(gamelogs)
+    gamelogs = gamelogs[gamelogs['MP'].fillna(0).to_numpy() > 0]
+    games = gamelogs.reindex(columns=COUNTING_COLUMNS).astype(np.float64).fillna(0)
+    games[PLAYER_COLUMN] = gamelogs[player].astype(str) if player in gamelogs else ''
+    games['season'] = (gamelogs['season'].astype(int) if 'season' in gamelogs
+                       else season_from_dates(gamelogs['Date']).to_numpy())
+    games['Playoffs'] = gamelogs['Playoffs'].astype(bool) if 'Playoffs' in gamelogs else False
+    games['Date'] = pd.to_datetime(gamelogs['Date'])
+    games['Tm'] = gamelogs['Tm'].astype(str)
+    games['Opp'] = gamelogs['Opp'].astype(str)
+    return games.reset_index(drop=True)
+
+
+def team_games(games):
+    """
+    One row per team and game: the team's totals (tm*) summed over its players'
+    rows, the opponent's totals (opp*) and Poss, the average of both teams'
+    possessions.  Only complete when games covers every player of both teams.
+    """
+    grouped = games.groupby(GAME_KEYS, sort=False)
+    totals = grouped[COUNTING_COLUMNS].sum()
+    opponent = totals.add_prefix('opp')
+    opponent.index = opponent.index.set_names(GAME_KEYS[:-1] + ['Opp'])
+    teams = totals.add_prefix('tm')
+    teams['Opp'] = grouped['Opp'].first()
+    teams = teams.reset_index().merge(opponent.reset_index(), on=GAME_KEYS[:-1] + ['Opp'], how='left')
+    team_poss = possessions(teams['tmFGA'], teams['tmORB'], teams['tmTOV'], teams['tmFTA'])
+    opp_poss = possessions(teams['oppFGA'], teams['oppORB'], teams['oppTOV'], teams['oppFTA'])
+    teams['Poss'] = ((team_poss + opp_poss) / 2).fillna(team_poss)
+    return teams.drop(columns='Opp')
+
+
+def _base_constants(games, teams):
+    league = games.groupby('season')[COUNTING_COLUMNS].sum()
+    c = pd.DataFrame(index=league.index)
+    c['lgAST/FG'] = league['AST'] / league['FG']
+    c['factor'] = 2.0 / 3 - (0.5 * c['lgAST/FG']) / (2 * (league['FG'] / league['FT']))
+    c['VOP'] = league['PTS'] / possessions(league['FGA'], league['ORB'], league['TOV'], league['FTA'])
+    c['DRB%'] = (league['TRB'] - league['ORB']) / league['TRB']
+    c['lgFT/PF'] = league['FT'] / league['PF']
+    c['lgFTA/PF'] = league['FTA'] / league['PF']
+    by_season = teams.groupby('season')
+    c['PPP'] = by_season['tmPTS'].sum() / by_season['Poss'].sum()
+    c['Pace'] = 48 * by_season['Poss'].sum() / (by_season['tmMP'].sum() / 5)
+    c['PPG'] = by_season['tmPTS'].mean()
+    return c
+
+
+def _unadjusted_per(t, c):
+    ast_fg = (t['tmAST'] / t['tmFG']).fillna(c['lgAST/FG'])
+    vop, drb = c['VOP'], c['DRB%']
+    return (t['3P'] + 2.0 / 3 * t['AST']
+            + (2 - c['factor'] * ast_fg) * t['FG']
+            + t['FT'] * 0.5 * (1 + (1 - ast_fg) + 2.0 / 3 * ast_fg)
+            - vop * t['TOV']
+            - vop * drb * (t['FGA'] - t['FG'])
+            - vop * 0.44 * (0.44 + 0.56 * drb) * (t['FTA'] - t['FT'])
+            + vop * (1 - drb) * (t['TRB'] - t['ORB'])
+            + vop * drb * t['ORB']
+            + vop * t['STL']
+            + vop * drb * t['BLK']
+            - t['PF'] * (c['lgFT/PF'] - 0.44 * c['lgFTA/PF'] * vop)) / t['MP']
+
+
+def _pace_ratio(t, c):
+    team_pace = 48 * t['Poss'] / (t['tmMP'] / 5)
+    return (c['Pace'] / team_pace).replace([np.inf, -np.inf], np.nan).fillna(1.0)
+
+
+class LeagueContext(object):
+    """
+    What the advanced metrics need beyond a player's own box scores, built once
+    from the game logs of every player in the league (e.g. GameLogStore.read()):
+
+    - constants, per season: league VOP, DRB%, PER factor, points per
+      possession, pace, points per team game and the average unscaled PER
+    - teams, per team and game: team and opponent totals and possessions
+
+    Pass it to the metric functions to rate a single player, or a subset of
+    the league, against the whole league.
+    """
+
+    def __init__(self, league_gamelogs, player=PLAYER_COLUMN):
+        games = played_games(league_gamelogs, player)
+        self.teams = team_games(games)
+        self.constants = _base_constants(games, self.teams)
+        # the minutes weighted league average of the pace adjusted PER, PER is scaled to make it 15
+        totals = _with_team(games, self.teams).groupby([PLAYER_COLUMN, 'season', 'Tm'])[_sum_columns()].sum()
+        c = self.constants.reindex(totals.index.get_level_values('season'))
+        c.index = totals.index
+        weighted = (_unadjusted_per(totals, c) * _pace_ratio(totals, c) * totals['MP']).groupby('season').sum()
+        self.constants['lgaPER'] = weighted / totals['MP'].groupby('season').sum()
+
+    def seasons(self):
+        return self.constants.index.tolist()
+
+
+def _sum_columns():
+    return (COUNTING_COLUMNS + ['tm' + column for column in COUNTING_COLUMNS]
+            + ['opp' + column for column in COUNTING_COLUMNS] + ['Poss'])
+
+
+def _with_team(games, teams):
+    return games.merge(teams, on=GAME_KEYS, how='left')
+
+
+def rate_metrics(t, constants):
+    """
+    TS%, eFG%, PER, ORtg, DRtg and win shares from a frame of summed stats: the
+    player's own, the same games' team (tm*) and opponent (opp*) totals, Poss and
+    season.  Team dependent parts fall back to league values, or NaN for DRtg
+    and DWS, where the team totals are missing.
+
+    ORtg is points per 100 possessions used, PTS / (FGA + 0.44 FTA + TOV),
+    rather than Oliver's points produced.  DRtg follows Oliver's stops formula,
+    win shares follow basketball-reference's outline on top of these two.
+    """
+    c = constants.reindex(t['season'].to_numpy())
+    c.index = t.index
+    out = pd.DataFrame(index=t.index)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['TS%'] = t['PTS'] / (2 * (t['FGA'] + 0.44 * t['FTA']))
+        out['eFG%'] = (t['FG'] + 0.5 * t['3P']) / t['FGA']
+        pace_ratio = _pace_ratio(t, c)
+        out['PER'] = _unadjusted_per(t, c) * pace_ratio * LEAGUE_AVERAGE_PER / c['lgaPER']
+
+        used = t['FGA'] + 0.44 * t['FTA'] + t['TOV']
+        out['ORtg'] = 100 * t['PTS'] / used
+
+        dor = t['oppORB'] / (t['oppORB'] + t['tmDRB'])
+        dfg = t['oppFG'] / t['oppFGA']
+        fmwt = (dfg * (1 - dor)) / (dfg * (1 - dor) + (1 - dfg) * dor)
+        opp_ft_miss = (1 - t['oppFT'] / t['oppFTA']).fillna(0)
+        stops = (t['STL'] + t['BLK'] * fmwt * (1 - 1.07 * dor) + t['DRB'] * (1 - fmwt)
+                 + (((t['oppFGA'] - t['oppFG'] - t['tmBLK']) / t['tmMP']) * fmwt * (1 - 1.07 * dor)
+                    + (t['oppTOV'] - t['tmSTL']) / t['tmMP']) * t['MP']
+                 + (t['PF'] / t['tmPF']) * 0.4 * t['oppFTA'] * opp_ft_miss ** 2)
+        stop_pct = stops * t['oppMP'] / (t['Poss'] * t['MP'])
+        team_drtg = 100 * t['oppPTS'] / t['Poss']
+        scoring_poss = t['oppFG'] + (1 - opp_ft_miss ** 2) * t['oppFTA'] * 0.4
+        out['DRtg'] = team_drtg + 0.2 * (100 * (t['oppPTS'] / scoring_poss) * (1 - stop_pct) - team_drtg)
+
+        points_per_win = 0.32 * c['PPG'] / pace_ratio
+        out['OWS'] = (t['PTS'] - 0.92 * c['PPP'] * used) / points_per_win
+        out['DWS'] = (t['MP'] / t['tmMP']) * t['Poss'] * (1.08 * c['PPP'] - out['DRtg'] / 100) / points_per_win
+        out['WS'] = out['OWS'] + out['DWS']
+        out['WS/48'] = out['WS'] * 48 / t['MP']
+    return out.replace([np.inf, -np.inf], np.nan).astype(np.float32)
+
+
+def _prepare(gamelogs, context, player):
+    games = played_games(gamelogs, player)
+    context = LeagueContext(gamelogs, player) if context is None else context
+    return _with_team(games, context.teams), context
+
+
+def game_metrics(gamelogs, context=None, player=PLAYER_COLUMN):
+    """
+    One row of metrics per game played.  Without a context, gamelogs is taken
+    to be the whole league and the context is built from it.
+    """
+    games, context = _prepare(gamelogs, context, player)
+    keys = games[[PLAYER_COLUMN, 'season', 'Playoffs', 'Date', 'Tm', 'Opp']]
+    return pd.concat([keys, games['MP'], rate_metrics(games, context.constants)], axis=1)
+
+
+def season_metrics(gamelogs, context=None, player=PLAYER_COLUMN, by_team=False):
+    """
+    Metrics over each player's season totals, regular season and playoffs
+    apart.  by_team=True splits the seasons of traded players by team.
+    """
+    games, context = _prepare(gamelogs, context, player)
+    keys = [PLAYER_COLUMN, 'season', 'Playoffs'] + (['Tm'] if by_team else [])
+    grouped = games.groupby(keys, sort=True)
+    totals = grouped[_sum_columns()].sum()
+    totals['G'] = grouped.size()
+    totals = totals.reset_index()
+    return pd.concat([totals[keys + ['G', 'MP']], rate_metrics(totals, context.constants)], axis=1)
+
+
+def rolling_metrics(gamelogs, window=10, context=None, player=PLAYER_COLUMN, min_periods=1):
+    """
+    Metrics over each player's last window games, one row per game played.
+    The window runs across seasons and playoffs in date order.
+    """
+    games, context = _prepare(gamelogs, context, player)
+    games = games.sort_values([PLAYER_COLUMN, 'Date'], kind='stable').reset_index(drop=True)
+    sums = (games.groupby(PLAYER_COLUMN, sort=False)[_sum_columns()]
+            .rolling(window, min_periods=min_periods).sum()
+            .reset_index(level=0, drop=True).sort_index())
+    # the league constants come from the season of the window's last game
+    sums['season'] = games['season']
+    keys = games[[PLAYER_COLUMN, 'season', 'Playoffs', 'Date', 'Tm', 'Opp']]
+    return pd.concat([keys, sums['MP'], rate_metrics(sums, context.constants)], axis=1)
@@ -0,0 +1,407 @@
+"""
+asyncio versions of the crawler entry points, for services that run an event loop.
+
+    from basketballCrawler import aio
+
+    async with aio.AsyncFetcher() as fetcher:
+        players = await aio.buildPlayerDictionary(fetcher=fetcher)
+        df = await aio.allGameLogs(players, 'LeBron James', fetcher=fetcher)
+
+Requests go through aiohttp and the same rate limiter and response cache as
+the threaded crawler, waiting with asyncio.sleep instead of blocking.
+Parsing runs in an executor (the loop's default thread pool unless one is
+given), so the event loop only ever waits on the network.  Everything but
+getSoupFromURL returns plain data, so a ProcessPoolExecutor works too.
+Cancelling an entry point cancels its outstanding requests.
+"""
+import asyncio
+import logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .basketballCrawler import coach_index_urls, team_index_urls
+from .coach import Coach
+from .crawl import get_rate_limiter, get_max_concurrency
+from .fetcher import Fetcher, get_default_fetcher
+from .gamelog import concat_gamelogs, typed_gamelog
+from .gamelog_cache import get_gamelog_cache, gamelog_from_html
+from .instrumentation import get_metrics, page_type
+from .player import Player, parse_player_html
+from .player_index import PlayerIndex, player_index_rows, LETTER_PAGE_URLS
+from .soup_utils import make_soup
+from .team import Team
+
+
+logger = logging.getLogger(__name__)
+
+SITE = 'https://www.basketball-reference.com'
+
+
+async def _blocking(func, *args):
+    # response caches do SQLite queries and file I/O, which must not run on the loop
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def acquire(limiter):
+    """
+    Waits for a token from a crawl.RateLimiter without blocking the loop
+    """
+    while True:
+        wait = limiter.try_acquire()
+        if not wait:
+            return
+        await asyncio.sleep(wait)
+
+
+class AsyncFetcher(object):
+    """
+    Downloads pages over a pooled aiohttp session, with the timeouts, retries
+    and backoff of fetcher.Fetcher.  The response cache defaults to the one of
+    the threaded default fetcher, so both see the same pages.  The session is
+    opened on first use, inside the running loop; close() it when done or use
+    the fetcher as an async context manager.
+    """
+
+    backoff = Fetcher.backoff
+    retry_after = Fetcher.retry_after
+
+    @staticmethod
+    async def _wait(delay, attempt, max_retry):
+        if attempt < max_retry - 1:
+            await asyncio.sleep(delay)
+
+    def __init__(self, cache=None, rate_limiter=None, connect_timeout=5, read_timeout=30,
+                 max_retry=3, backoff_base=1.0, backoff_max=60.0, pool_size=None, headers=None):
+        if aiohttp is None:
+            raise ImportError("AsyncFetcher needs aiohttp (pip install aiohttp)")
+        self.cache = get_default_fetcher().cache if cache is None else cache
+        self.rate_limiter = rate_limiter
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retry = max_retry
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = max(get_max_concurrency(), 10) if pool_size is None else pool_size
+        self.headers = headers
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+                headers=self.headers)
+        return self._session
+
+    async def fetch(self, url, max_retry=None, cache=None):
+        """
+        Returns the text of the page at url, None if it couldn't be fetched.
+        """
+        cache = self.cache if cache is None else cache
+        max_retry = self.max_retry if max_retry is None else max_retry
+        metrics = get_metrics()
+        kind = page_type(url)
+
+        entry = None
+        if cache is not None:
+            entry = await _blocking(cache.get, url)
+            metrics.count('cache_misses' if entry is None else 'cache_hits', kind)
+            if entry is not None and (cache.offline or cache.is_fresh(entry)):
+                return entry.body
+            if cache.offline:
+                return None
+
+        headers = cache.conditional_headers(entry) if cache is not None else None
+        limiter = self.rate_limiter if self.rate_limiter is not None else get_rate_limiter()
+        session = self._get_session()
+        for attempt in range(max_retry):
+            if attempt > 0:
+                metrics.count('retries', kind)
+            await acquire(limiter)
+            metrics.count('requests', kind)
+            try:
+                with metrics.timer('fetch', kind):
+                    async with session.get(url, headers=headers) as r:
+                        body = await r.read()
+                        status, response_headers = r.status, r.headers
+                        text = body.decode(r.get_encoding(), errors='replace') if status < 300 else None
+            except asyncio.TimeoutError:
+                logger.warning("Timeout: %s", url)
+                await self._wait(self.backoff(attempt), attempt, max_retry)
+                continue
+            except aiohttp.TooManyRedirects as redir:
+                logger.error("Bad URL: %s", redir)
+                metrics.count('errors', kind)
+                return None
+            except aiohttp.ClientConnectionError as connection:
+                logger.warning("Connection: %s", connection)
+                await self._wait(self.backoff(attempt), attempt, max_retry)
+                continue
+            except aiohttp.ClientError as e:
+                logger.error("%s", e)
+                metrics.count('errors', kind)
+                return None
+
+            metrics.count('bytes', kind, len(body))
+            if status == 304 and entry is not None:
+                metrics.count('not_modified', kind)
+                await _blocking(cache.refresh, entry)
+                return entry.body
+            if status == 429:
+                logger.warning("HTTP: 429 Too Many Requests for url: %s", url)
+                await self._wait(self.retry_after(r, attempt), attempt, max_retry)
+                continue
+            if status >= 500:
+                logger.warning("HTTP: %d for url: %s", status, url)
+                await self._wait(self.backoff(attempt), attempt, max_retry)
+                continue
+            if status >= 400:
+                logger.error("HTTP: %d for url: %s", status, url)
+                metrics.count('errors', kind)
+                return None
+
+            if cache is not None:
+                await _blocking(cache.set, url, text,
+                                response_headers.get('ETag'), response_headers.get('Last-Modified'))
+            return text
+        logger.error("Giving up on %s after %d attempts", url, max_retry)
+        metrics.count('errors', kind)
+        return None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class _FetcherScope(object):
+    # the given fetcher, or a temporary one that is closed on the way out
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self.owned = fetcher is None
+
+    async def __aenter__(self):
+        if self.owned:
+            self.fetcher = AsyncFetcher()
+        return self.fetcher
+
+    async def __aexit__(self, *exc_info):
+        if self.owned:
+            await self.fetcher.close()
+
+
+async def crawl_map(func, items, max_concurrency=None, stage='crawl'):
+    """
+    Awaits func(item) for every item with at most max_concurrency in flight
+    (crawl.get_max_concurrency() by default) and returns the results in the
+    order of items.  If one fails or the caller is cancelled, the others are
+    cancelled too.
+    """
+    items = list(items)
+    if not items:
+        return []
+    metrics = get_metrics()
+    limit = asyncio.Semaphore(get_max_concurrency() if max_concurrency is None else max_concurrency)
+    done = [0]
+
+    async def run(item):
+        async with limit:
+            result = await func(item)
+        done[0] += 1
+        metrics.report_progress(stage, done[0], len(items))
+        return result
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _parse(executor, func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+# parse steps are top level functions from html to plain data, so they can run in a process pool
+
+def _index_rows(html):
+    return player_index_rows(make_soup(html, expect='players'))
+
+
+def _coach_urls(html, min_year_active):
+    return coach_index_urls(make_soup(html, expect='coaches'), min_year_active)
+
+
+def _team_urls(html, table_ids=('teams_active',)):
+    return team_index_urls(make_soup(html, expect='teams_active'), table_ids)
+
+
+def _coach_fields(name, url, html):
+    coach = Coach(name, url, scrape_data=False)
+    coach.scrape_data(html)
+    return coach.to_dict()
+
+
+def _team_fields(name, url, html):
+    team = Team(name, url, scrape_data=False)
+    team.scrape_data(html)
+    return team.to_dict()
+
+
+async def getHTMLFromURL(url, fetcher=None):
+    async with _FetcherScope(fetcher) as fetcher:
+        return await fetcher.fetch(url)
+
+
+async def getSoupFromURL(url, expect=None, fetcher=None, executor=None):
+    """
+    The parsed page, None if it couldn't be fetched.  A soup can't come back
+    from another process, so executor has to be a thread pool here.
+    """
+    html = await getHTMLFromURL(url, fetcher)
+    if html is None:
+        return None
+    return await _parse(executor, make_soup, html, None, expect)
+
+
+async def getPlayerIndex(fetcher=None, executor=None):
+    """
+    The PlayerIndex of the 26 letter index pages, see basketballCrawler.getPlayerIndex
+    """
+    async with _FetcherScope(fetcher) as fetcher:
+        async def letter(url):
+            html = await fetcher.fetch(url)
+            return [] if html is None else await _parse(executor, _index_rows, html)
+
+        pages = await crawl_map(letter, LETTER_PAGE_URLS, stage='index')
+    return PlayerIndex.from_rows([row for rows in pages for row in rows])
+
+
+async def getCurrentPlayerNamesAndURLS(fetcher=None, executor=None, index=None):
+    index = await getPlayerIndex(fetcher, executor) if index is None else index
+    return index.current().names_and_urls()
+
+
+async def getAllPlayerNamesAndURLS(fetcher=None, executor=None, index=None):
+    index = await getPlayerIndex(fetcher, executor) if index is None else index
+    return index.names_and_urls()
+
+
+async def buildSpecificPlayerDictionary(playerNamesURLs, fetcher=None, executor=None):
+    """
+    {name: Player} for {name: overview url}, players whose page failed are left out
+    """
+    items = [(name, url) for name, url in playerNamesURLs.items() if url is not None]
+
+    async with _FetcherScope(fetcher) as fetcher:
+        async def build(item):
+            name, url = item
+            html = await fetcher.fetch(url)
+            if html is None:
+                logger.error("Player %s not found!", name)
+                return None
+            fields = await _parse(executor, parse_player_html, html)
+            return Player.from_dict(dict(fields, name=name, overview_url=url))
+
+        built = await crawl_map(build, items, stage='player')
+    return dict((name, player) for (name, _), player in zip(items, built) if player is not None)
+
+
+async def buildPlayerDictionary(fetcher=None, executor=None, index=None):
+    async with _FetcherScope(fetcher) as fetcher:
+        names = await getCurrentPlayerNamesAndURLS(fetcher, executor, index)
+        return await buildSpecificPlayerDictionary(names, fetcher, executor)
+
+
+async def getAllPlayers(min_year_active=2004, fetcher=None, executor=None, index=None):
+    async with _FetcherScope(fetcher) as fetcher:
+        index = await getPlayerIndex(fetcher, executor) if index is None else index
+        urls = index.select(min_year_active=min_year_active).names_and_urls()
+        return await buildSpecificPlayerDictionary(urls, fetcher, executor)
+
+
+async def _build(cls, parse, urls, fetcher, executor, stage):
+    items = list(urls.items())
+
+    async def build(item):
+        name, url = item
+        html = await fetcher.fetch(url)
+        if html is None:
+            logger.error("Couldn't fetch %s", url)
+            return None
+        try:
+            return cls.from_dict(await _parse(executor, parse, name, url, html))
+        except Exception as e:
+            logger.error("Couldn't build %s from %s: %s", name, url, e)
+            return None
+
+    built = await crawl_map(build, items, stage=stage)
+    return dict((name, entity) for (name, _), entity in zip(items, built) if entity is not None)
+
+
+async def getAllCoaches(min_year_active=2004, fetcher=None, executor=None):
+    async with _FetcherScope(fetcher) as fetcher:
+        html = await fetcher.fetch(SITE + '/coaches/')
+        if html is None:
+            return {}
+        urls = await _parse(executor, _coach_urls, html, min_year_active)
+        return await _build(Coach, _coach_fields, urls, fetcher, executor, 'coach')
+
+
+async def getCurrentTeams(fetcher=None, executor=None):
+    async with _FetcherScope(fetcher) as fetcher:
+        html = await fetcher.fetch(SITE + '/teams/')
+        if html is None:
+            return {}
+        urls = await _parse(executor, _team_urls, html)
+        return await _build(Team, _team_fields, urls, fetcher, executor, 'team')
+
+
+async def getAllTeams(fetcher=None, executor=None):
+    async with _FetcherScope(fetcher) as fetcher:
+        html = await fetcher.fetch(SITE + '/teams/')
+        if html is None:
+            return {}
+        urls = await _parse(executor, _team_urls, html, ('teams_active', 'teams_defunct'))
+        return await _build(Team, _team_fields, urls, fetcher, executor, 'team')
+
+
+async def _gamelog(url, fetcher, executor):
+    # shares the in-memory game log cache with Player.season_gamelog and allGameLogs
+    cache = get_gamelog_cache()
+    df = cache.peek(url)
+    if df is not None:
+        return df
+    df = await _parse(executor, gamelog_from_html, await fetcher.fetch(url), url)
+    cache.put(url, df)
+    return None if df is None else df.copy()
+
+
+async def allGameLogs(playerDictionary, name, typed=False, fetcher=None, executor=None):
+    """
+    All of a player's game logs in one DataFrame
+    """
+    player = playerDictionary.get(name)
+    async with _FetcherScope(fetcher) as fetcher:
+        frames = await crawl_map(lambda url: _gamelog(url, fetcher, executor), player.gamelog_url_list,
+                                 stage='gamelog')
+    return await _parse(executor, concat_gamelogs, frames, typed)
+
+
+async def seasonGameLogs(playerDictionary, name, season, typed=False, fetcher=None, executor=None):
+    url = playerDictionary.get(name).season_gamelog_url(season)
+    async with _FetcherScope(fetcher) as fetcher:
+        df = await _gamelog(url, fetcher, executor)
+    return typed_gamelog(df) if typed and df is not None else df
@@ -1,63 +1,115 @@
+import os
 import json
-import string
+from collections import namedtuple
 import pandas as pd
 import logging
-from time import sleep
 from difflib import SequenceMatcher
-from .soup_utils import find_html_in_comment
+from .soup_utils import find_html_in_comment, getHTMLFromURL, set_response_cache, get_response_cache, \
+    make_soup, set_parser, get_parser, current_season
+from .cache import ResponseCache, SQLiteCache, DirectoryCache
+from .crawl import crawl_map, configure_crawl, RateLimiter
+from .fetcher import Fetcher, get_default_fetcher, set_default_fetcher
+from .gamelog import gamelog_tables_from_html, typed_gamelog, concat_gamelogs, GameLogError
+from .store import GameLogStore, player_id_from_url, season_from_gamelog_url
+from .player_db import PlayerDB, save_player_db, load_legacy_json, is_player_db
+from .name_search import NameIndex, normalize_name
+from .instrumentation import CrawlMetrics, get_metrics, set_metrics, enable_file_logging, BASKETBALL_LOG
+from .jobs import HarvestJob, harvestGameLogs
+from .pipeline import ParsePipeline, parse_players, parse_gamelogs
+from .gamelog_cache import GameLogCache, load_gamelog, get_gamelog_cache, set_gamelog_cache
+from .advanced_stats import LeagueContext, game_metrics, season_metrics, rolling_metrics
+from .league import season_table, season_schedule, season_box_scores, validate_box_scores
+from .player_index import PlayerIndex, LETTER_PAGE_URLS
+from .roster_index import RosterIndex
+from .gamelog_stream import GameLogChunk, stream_gamelogs, write_gamelogs, CSVSink, ParquetSink, SQLSink
 from .player import Player, getSoupFromURL
 from .coach import Coach
+from .coach_lookup import CoachLookup
 from .team import Team
 
 
-__all__ = ['getSoupFromURL', 'getCurrentPlayerNamesAndURLS',
-           'buildPlayerDictionary', 'searchForName',
-           'savePlayerDictionary', 'loadPlayerDictionary',
-           'allGameLogs', 'seasonGameLogs']
-
-BASKETBALL_LOG = 'basketball.log'
+__all__ = ['getSoupFromURL', 'getCurrentPlayerNamesAndURLS', 'getPlayerIndex', 'PlayerIndex',
+           'buildPlayerDictionary', 'updatePlayerDictionary', 'searchForName',
+           'savePlayerDictionary', 'loadPlayerDictionary', 'migratePlayerDictionary',
+           'allGameLogs', 'seasonGameLogs',
+           'getHTMLFromURL', 'set_response_cache', 'get_response_cache',
+           'ResponseCache', 'SQLiteCache', 'DirectoryCache',
+           'crawl_map', 'configure_crawl', 'RateLimiter',
+           'Fetcher', 'get_default_fetcher', 'set_default_fetcher',
+           'make_soup', 'set_parser', 'get_parser',
+           'typed_gamelog', 'concat_gamelogs', 'GameLogStore',
+           'NameIndex', 'normalize_name',
+           'CrawlMetrics', 'get_metrics', 'set_metrics', 'enable_file_logging',
+           'GameLogError', 'HarvestJob', 'harvestGameLogs',
+           'ParsePipeline', 'parse_players', 'parse_gamelogs',
+           'GameLogCache', 'get_gamelog_cache', 'set_gamelog_cache',
+           'LeagueContext', 'game_metrics', 'season_metrics', 'rolling_metrics',
+           'getSeasonStats', 'getSeasonSchedule', 'getSeasonBoxScores', 'validate_box_scores',
+           'getAllCoaches', 'getCurrentTeams', 'getAllTeams', 'buildCoachDictionary', 'buildTeamDictionary',
+           'CoachLookup', 'buildCoachLookup', 'RosterIndex', 'loadRosterIndex',
+           'GameLogChunk', 'streamGameLogs', 'exportGameLogs', 'CSVSink', 'ParquetSink', 'SQLSink']
+
+logger = logging.getLogger(__name__)
+
+
+def getLetterPages(suppressOutput=True):
+    """
+    Fetches the 26 /players/<letter>/ index pages, several at a time.
+    Returns the soups in alphabetical order, None for pages that failed.
+    """
+    return crawl_map(lambda url: getSoupFromURL(url, suppressOutput, expect='players'), LETTER_PAGE_URLS,
+                     stage='index')
 
-logging.basicConfig(filename=BASKETBALL_LOG,
-                    level=logging.DEBUG,
-                    )
 
+def getPlayerIndex(suppressOutput=True, path=None, refresh=False):
+    """
+    The PlayerIndex of every player on the 26 letter index pages, each page read once.
+    With a path the index is loaded from there if it exists (unless refresh=True),
+    otherwise it is scanned and saved to it.
+    """
+    if path is not None and not refresh and os.path.exists(path):
+        return PlayerIndex.load(path)
+    index = PlayerIndex.from_letter_pages(getLetterPages(suppressOutput))
+    if path is not None:
+        index.save(path)
+    return index
 
-def getCurrentPlayerNamesAndURLS(suppressOutput=True):
 
-    names = []
+def getCurrentPlayerNamesAndURLS(suppressOutput=True, index=None):
+    """
+    {name: url} of the active players, from index if given
+    """
+    index = getPlayerIndex(suppressOutput) if index is None else index
+    return index.current().names_and_urls()
 
-    for letter in string.ascii_lowercase:
-        letter_page = getSoupFromURL('https://www.basketball-reference.com/players/%s/' % (letter), suppressOutput)
-        if letter_page is None:
-            continue
-        # we know that all the currently active players have <strong> tags, so we'll limit our names to those
-        current_names = letter_page.findAll('strong')
-        for n in current_names:
-            name_data = n.children.__next__()
-            try:
-                names.append((name_data.contents[0], 'https://www.basketball-reference.com' + name_data.attrs['href']))
-            except Exception as e:
-                pass
-        sleep(1) # sleeping to be kind for requests
 
-    return dict(names)
+def build_player(item):
+    """
+    Player for a (name, url) pair, None if the page can't be fetched or parsed, so
+    one bad page doesn't throw away the rest of a concurrent build
+    """
+    name, url = item
+    try:
+        return Player(name, url, scrape_data=True)
+    except Exception as e:
+        logger.error("Couldn't build %s from %s: %s", name, url, e)
+        return None
 
 
-def buildPlayerDictionary(suppressOutput=True):
+def buildPlayerDictionary(suppressOutput=True, index=None):
     """
     Builds a dictionary for all current players in the league-- this takes about 10 minutes to run!
     """
 
-    logging.debug("Begin grabbing name list")
-    playerNamesAndURLS = getCurrentPlayerNamesAndURLS(suppressOutput)
-    logging.debug("Name list grabbing complete")
+    logger.debug("Begin grabbing name list")
+    playerNamesAndURLS = getCurrentPlayerNamesAndURLS(suppressOutput, index)
+    logger.debug("Name list grabbing complete")
 
-    players={}
-    for name, url in playerNamesAndURLS.items():
-        players[name] = Player(name,url,scrape_data=True)
-        sleep(1) # sleep to be kind.
+    items = list(playerNamesAndURLS.items())
+    built = crawl_map(build_player, items, stage='player')
+    players = dict((name, player) for (name, url), player in zip(items, built) if player is not None)
 
-    logging.debug("buildPlayerDictionary complete")
+    logger.debug("buildPlayerDictionary complete")
 
     return players
 
@@ -67,27 +119,94 @@ def buildSpecificPlayerDictionary(playerNamesURLs, suppressOutput=True):
     Builds a dictionary for all specified players in the history of the league
     """
 
-    logging.debug("Begin grabbing name list")
-    logging.debug("Name list grabbing complete")
+    logger.debug("Begin grabbing name list")
+    logger.debug("Name list grabbing complete")
 
-    logging.debug("Iterating over {} player names passed".format(len(playerNamesURLs)))
-    players={}
+    logger.debug("Iterating over {} player names passed".format(len(playerNamesURLs)))
+    items = []
     for name, url in playerNamesURLs.items():
         if url is not None:
-            players[name] = Player(name, url, scrape_data=True)
-            sleep(1) # sleep to be kind.
+            items.append((name, url))
         else:
-            logging.error("Player " + name + " not found!")
+            logger.error("Player " + name + " not found!")
+    built = crawl_map(build_player, items, stage='player')
+    players = dict((name, player) for (name, url), player in zip(items, built) if player is not None)
 
-    logging.debug("buildSpecificPlayerDictionary complete")
+    logger.debug("buildSpecificPlayerDictionary complete")
     if len(playerNamesURLs) == len(players):
-        logging.info("Successfully retrieved all players passed")
+        logger.info("Successfully retrieved all players passed")
     else:
-        logging.error("Missing {} players".format(len(playerNamesURLs) - len(players)))
+        logger.error("Missing {} players".format(len(playerNamesURLs) - len(players)))
 
     return players
 
 
+PlayerIndexRow = namedtuple('PlayerIndexRow', ['name', 'url', 'year_min', 'year_max', 'active'])
+
+PlayerDictionaryUpdate = namedtuple('PlayerDictionaryUpdate', ['players', 'added', 'updated', 'unchanged'])
+
+
+def getPlayerIndexRows(suppressOutput=True, index=None):
+    """
+    Every row of the 26 letter index pages: name, url, first and last
+    season played, and whether the player is active (bold on the page)
+    """
+    index = getPlayerIndex(suppressOutput) if index is None else index
+    frame = index.frame
+    return [PlayerIndexRow(name, url, int(year_min), int(year_max), bool(active))
+            for name, url, year_min, year_max, active
+            in zip(index.names_and_urls(), frame['url'], frame['year_min'], frame['year_max'], frame['active'])]
+
+
+def lastGameLogSeason(player):
+    """
+    The last season a player has a game log for, None if there are none
+    """
+    seasons = [season_from_gamelog_url(url) for url in player.gamelog_url_list]
+    return max(seasons) if seasons else None
+
+
+def updatePlayerDictionary(playerDictionary, suppressOutput=True, min_year_active=None, current=None, index=None,
+                           roster=None):
+    """
+    Brings a player dictionary up to date by re-reading only the 26 letter index pages.
+    New players (active since min_year_active, the current season by default) are
+    scraped, existing players are scraped again only if they played in the current
+    season or the index shows seasons their game logs don't have yet.  Everyone else
+    is carried forward as is.  index is a PlayerIndex to use instead of reading
+    the letter pages.  A RosterIndex given as roster is updated in place with the
+    players that were scraped.  Returns a PlayerDictionaryUpdate with the new
+    dictionary and the names that were added, updated and left unchanged.
+    """
+    current = current_season() if current is None else current
+    min_year_active = current if min_year_active is None else min_year_active
+    names_by_url = {player.overview_url: name for name, player in playerDictionary.items()}
+
+    added, updated = [], []
+    for row in getPlayerIndexRows(suppressOutput, index):
+        name = names_by_url.get(row.url)
+        if name is None:
+            if row.year_max >= min_year_active:
+                added.append((row.name, row.url))
+            continue
+        last_season = lastGameLogSeason(playerDictionary[name])
+        if row.year_max >= current or (last_season is not None and row.year_max > last_season):
+            updated.append((name, row.url))
+
+    logger.debug("updatePlayerDictionary: {} new and {} changed players".format(len(added), len(updated)))
+    scraped = buildSpecificPlayerDictionary(dict(added + updated), suppressOutput)
+    players = dict(playerDictionary)
+    players.update(scraped)
+    if roster is not None:
+        roster.update(scraped)
+
+    changed = set(scraped)
+    return PlayerDictionaryUpdate(players,
+                                  [name for name, url in added if name in changed],
+                                  [name for name, url in updated if name in changed],
+                                  [name for name in playerDictionary if name not in changed])
+
+
 def fuzzy_ratio(name, search_string):
     """
     Calculate difflib fuzzy ratio
@@ -95,12 +214,15 @@ def fuzzy_ratio(name, search_string):
     return SequenceMatcher(None, search_string.lower(), name.lower()).ratio()
 
 
-def searchForName(playerDictionary, search_string, threshold=0.5):
+def searchForName(playerDictionary, search_string, threshold=0.5, index=None):
     """
     Case insensitive partial search for player names, returns a list of strings,
     names that contained the search string.  Uses difflib for fuzzy matching.
     threshold:
+    index: a NameIndex built over playerDictionary, much faster for repeated searches
     """
+    if index is not None:
+        return index.search(search_string, threshold)
     players_name = playerDictionary.keys()
     search_string = search_string.lower()
     players_ratio = map(lambda name: [name, fuzzy_ratio(name, search_string)], players_name)
@@ -109,98 +231,84 @@ def searchForName(playerDictionary, search_string, threshold=0.5):
     return list(set(searched_player_dict + searched_player_fuzzy))
 
 
-def savePlayerDictionary(playerDictionary, pathToFile):
+def savePlayerDictionary(playerDictionary, pathToFile, format='json', roster=None):
     """
-    Saves player dictionary to a JSON file
+    Saves player dictionary to a JSON file, or with format='db' to a compact
+    versioned database that can be loaded lazily (see player_db.py).
+    The database also stores the players' RosterIndex, roster if given; JSON
+    files don't hold one, so passing roster with format='json' is a ValueError.
     """
+    if format == 'db':
+        save_player_db(playerDictionary, pathToFile, roster)
+        return
+    if roster is not None:
+        raise ValueError("only format='db' stores the roster index")
     player_json = {name: player_data.to_json() for name, player_data in playerDictionary.items()}
     json.dump(player_json, open(pathToFile, 'w'), indent=0)
 
 
-def loadPlayerDictionary(pathToFile):
+def loadPlayerDictionary(pathToFile, lazy=False):
+    """
+    Loads previously saved player dictionary from a JSON file or a compact database.
+    With lazy=True a database is returned as a read-only mapping that only decodes
+    the players that are looked up.
+    """
+    if is_player_db(pathToFile):
+        players = PlayerDB(pathToFile)
+        if lazy:
+            return players
+        try:
+            return dict(players.items())
+        finally:
+            players.close()
+    return load_legacy_json(pathToFile)
+
+
+def loadRosterIndex(pathToFile):
     """
-    Loads previously saved player dictionary from a JSON file
+    The RosterIndex of a saved player dictionary.  A database has it stored,
+    for a JSON file (or an old database) it is built from the players.
     """
-    result = {}
-    with open(pathToFile) as f:
-        json_dict = json.loads(f.read())
-        for player_name in json_dict:
-            parsed_player = Player(None, None, False)
-            parsed_player.__dict__ = json.loads(json_dict[player_name])
-            result[player_name] = parsed_player
-    return result
+    if is_player_db(pathToFile):
+        players = PlayerDB(pathToFile)
+        try:
+            roster = players.roster()
+            return RosterIndex(players) if roster is None else roster
+        finally:
+            players.close()
+    return RosterIndex(load_legacy_json(pathToFile))
 
 
-def dfFromGameLogURLList(gamelogs, dataframes=None):
+def migratePlayerDictionary(jsonPath, dbPath):
+    """
+    Converts a player dictionary saved as JSON into the compact database format
+    """
+    save_player_db(load_legacy_json(jsonPath), dbPath)
+
+
+def dfFromGameLogURLList(gamelogs, dataframes=None, typed=False):
     """
     Functions to parse the gamelogs
     Takes a list of game log urls and returns a concatenated DataFrame
     # fix issue with missing columns (+/-) between older seasons and recent
+    typed=True converts the columns to numbers, dates and categoricals, see gamelog.typed_gamelog
     """
     if dataframes is None:
-        dataframes = [dfFromGameLogURL(g) for g in gamelogs]
-    final_dataframes = list()
-    final_columns = dataframes[-1].columns.values.tolist()
-    for df in dataframes:
-        missing_columns = set(final_columns) - set(df.columns.values.tolist())
-        if len(missing_columns) > 0:
-            final_df = df.reindex(final_columns, axis='columns')
-            final_dataframes.append(final_df)
-        else:
-            final_dataframes.append(df)
+        dataframes = crawl_map(dfFromGameLogURL, gamelogs, stage='gamelog')
     try:
-        return pd.concat(final_dataframes)
+        return concat_gamelogs(dataframes, typed)
     except Exception as e:
-        print("ERROR - Couldn't merge dataframes:", e)
-        print(final_dataframes)
+        logger.error("Couldn't merge dataframes: %s\n%s", e, dataframes)
         return None
 
 
-def dfFromGameLogURL(url):
+def dfFromGameLogURL(url, typed=False):
     """
     Takes a url of a player's game log for a given year, returns a DataFrame
+    typed=True converts the columns to numbers, dates and categoricals, see gamelog.typed_gamelog
     """
-    sleep(1)
-    glsoup = getSoupFromURL(url)
-
-    reg_season_table = glsoup.find_all('table', id="pgl_basic")  # id for reg season table
-    playoff_table = find_playoff_table(glsoup)
-
-    # parse the table header.  we'll use this for the creation of the DataFrame
-    header = []
-    if len(reg_season_table) > 0 and reg_season_table[0] is not None:
-        table_header = reg_season_table[0].find("thead")
-    else:
-        print("Error retrieving game log from:")
-        print(url)
-        exit(1)
-    for th in table_header.find_all('th'):
-        # if not th.getText() in header:
-        header.append(th.getText())
-
-    # add in headers for home/away and w/l columns. a must to get the DataFrame to parse correctly
-
-    header.insert(5, 'HomeAway')
-    header.insert(8, 'WinLoss')
-    header.pop(0)
-    header.remove('\xa0')
-    header.remove('\xa0')
-
-    reg = soupTableToDF(reg_season_table, header)
-    playoff = soupTableToDF(playoff_table, header)
-
-    if reg is None:
-        return playoff
-    elif playoff is None:
-        return reg
-    else:
-        try:
-            return pd.concat([reg, playoff])
-        except Exception as e:
-            print("ERROR - Couldn't merge dataframes:", e)
-            print(reg)
-            print(playoff)
-            return None
+    df = load_gamelog(url)
+    return typed_gamelog(df) if typed and df is not None else df
 
 
 def find_playoff_table(glsoup):
@@ -217,7 +325,7 @@ def find_playoff_table(glsoup):
     return playoff_table
 
 
-def soupTableToDF(table_soup, header):
+def soupTableToDF(table_soup, header, typed=False):
     """
     Parses the HTML/Soup table for the gamelog stats.
     Returns a pandas DataFrame
@@ -234,114 +342,235 @@ def soupTableToDF(table_soup, header):
         parsed_rows = [[col.getText() for col in row.findAll('td')] for row in rows]
         parsed_table = [row for row in parsed_rows if row[0] != ""]
         try:
-            return pd.DataFrame.from_records(parsed_table, columns=header).dropna(subset=["G"])
+            with get_metrics().timer('dataframe', 'gamelog'):
+                df = pd.DataFrame.from_records(parsed_table, columns=header).dropna(subset=["G"])
+                return typed_gamelog(df) if typed else df
         except Exception as e:
-            print("ERROR - Couldn't create dataframe:", e)
-            print(parsed_table)
+            logger.error("Couldn't create dataframe: %s\n%s", e, parsed_table)
             return None
 
 
-def allGameLogs(playerDictionary, name, dataframes=None):
-    ### would be nice to put some caching logic here...
-    return dfFromGameLogURLList(playerDictionary.get(name).gamelog_url_list, dataframes)
-
-
-def seasonGameLogs(playerDictionary, name, season):
-    return dfFromGameLogURL(playerDictionary.get(name).gamelog_url_dict.get(season))
-
+def allGameLogs(playerDictionary, name, dataframes=None, typed=False, store=None, **query):
+    """
+    Returns all of a player's game logs in one DataFrame.
+    Without a store the seasons come from the shared in-memory game log cache, so
+    asking for the same player again doesn't fetch anything.
+    With a GameLogStore, only the seasons that aren't stored yet (and the current one)
+    are fetched, the result is read back from the store and is always typed.  query
+    takes the GameLogStore.read filters: min_season, max_season, playoffs, columns.
+    """
+    player = playerDictionary.get(name)
+    if store is not None:
+        store.update([player])
+        return store.read(player_ids=[player_id_from_url(player.overview_url)], **query)
+    if dataframes is not None:
+        return dfFromGameLogURLList(player.gamelog_url_list, dataframes, typed)
+    return player.all_gamelogs(typed)
 
-def getAllPlayerNamesAndURLS(suppressOutput=True):
 
-    names = []
+def seasonGameLogs(playerDictionary, name, season, typed=False):
+    return playerDictionary.get(name).season_gamelog(season, typed)
 
-    for letter in string.ascii_lowercase:
-        letter_page = getSoupFromURL('https://www.basketball-reference.com/players/{}/'.format(letter), suppressOutput)
-        if letter_page is None:
-            continue
-        all_rows = letter_page.find("table", id="players").find("tbody").find_all("tr")
-        for row in all_rows:
-            player = row.find("th", attrs={"data-stat": "player", "scope": "row"})
-            if player is None:
-                continue
-            player = player.find("a")
-            name = player.get_text()
-            try:
-                names.append((name, 'https://www.basketball-reference.com' + player.attrs['href']))
-            except Exception as e:
-                print("ERROR:", e)
-        sleep(1) # sleeping to be kind for requests
 
-    return dict(names)
+def streamGameLogs(playerDictionary, names=None, min_season=None, max_season=None, max_pending=None):
+    """
+    Generator of GameLogChunk(name, player_id, season, url, frame, error), one per
+    player and season, in the order the pages finish.  Frames are typed like
+    GameLogStore.read().  At most max_pending pages are in flight or waiting for
+    the consumer, so memory doesn't grow with the number of players.
+    names limits the players to stream, all of them by default.
+    """
+    players = playerDictionary if names is None else {name: playerDictionary[name] for name in names}
+    return stream_gamelogs(players, min_season, max_season, max_pending)
 
 
-def getAllPlayers(suppressOutput=True, min_year_active=2004):
+def exportGameLogs(playerDictionary, sink, names=None, min_season=None, max_season=None, max_pending=None):
+    """
+    Streams game logs straight into sink: a CSVSink, ParquetSink or SQLSink, or a
+    path ending in .csv or .parquet.  Only the chunks in flight are ever in memory.
+    Returns (rows written, chunks that failed).
+    """
+    if isinstance(sink, str):
+        if sink.endswith('.csv'):
+            sink = CSVSink(sink)
+        elif sink.endswith('.parquet'):
+            sink = ParquetSink(sink)
+        else:
+            raise ValueError("can't tell the sink format from %s" % sink)
+    return write_gamelogs(streamGameLogs(playerDictionary, names, min_season, max_season, max_pending), sink)
 
-    players = dict()
 
-    for letter in string.ascii_lowercase:
-        letter_page = getSoupFromURL('https://www.basketball-reference.com/players/{}/'.format(letter), suppressOutput)
-        if letter_page is None:
-            continue
-        all_rows = letter_page.find("table", id="players").find("tbody").find_all("tr")
-        for row in all_rows:
-            player = row.find("th", attrs={"data-stat": "player", "scope": "row"})
-            if player is None:
-                continue
-            player = player.find("a")
-            name = player.get_text()
-            last_year_active_soup = row.find("td", attrs={"data-stat": "year_max"})
-            last_year_active = int(last_year_active_soup.get_text())
-            try:
-                if last_year_active >= min_year_active:
-                    players[name] = Player(name, 'https://www.basketball-reference.com' + player.attrs['href'])
-            except Exception as e:
-                print("ERROR:", e)
-        sleep(1) # sleeping to be kind for requests
+def getAllPlayerNamesAndURLS(suppressOutput=True, index=None):
+    """
+    {name: url} of every player in the history of the league, from index if given
+    """
+    index = getPlayerIndex(suppressOutput) if index is None else index
+    return index.names_and_urls()
 
-    return players
 
+def getAllPlayers(suppressOutput=True, min_year_active=2004, index=None):
+    """
+    Builds a dictionary of the players whose last season is min_year_active or later
+    """
+    index = getPlayerIndex(suppressOutput) if index is None else index
+    return buildSpecificPlayerDictionary(index.select(min_year_active=min_year_active).names_and_urls(),
+                                         suppressOutput)
 
-def getAllCoaches(suppressOutput=True, min_year_active=2004):
 
-    coaches = dict()
-    glsoup = getSoupFromURL('https://www.basketball-reference.com/coaches/', suppressOutput)
-    all_rows = glsoup.find("table", id="coaches").find("tbody").find_all("tr")
+def coach_index_urls(coaches_page, min_year_active=2004):
+    """
+    {name: url} of the coaches on the coach index page whose last season is
+    min_year_active or later, or of every coach with min_year_active=None
+    """
+    urls = dict()
+    all_rows = coaches_page.find("table", id="coaches").find("tbody").find_all("tr")
     for row in all_rows:
         coach = row.find("th", attrs={"data-stat": "coach", "scope": "row"})
-        if coach is None:
+        if coach is None or coach.find("a") is None:
             continue
         coach = coach.find("a")
         name = coach.get_text()
-        last_year_active_soup = row.find("td", attrs={"data-stat": "year_max"})
-        last_year_active = int(last_year_active_soup.get_text())
         try:
-            if last_year_active >= min_year_active:
-                coaches[name] = Coach(name, 'https://www.basketball-reference.com' + coach.attrs['href'])
+            if min_year_active is not None:
+                last_year_active_soup = row.find("td", attrs={"data-stat": "year_max"})
+                if int(last_year_active_soup.get_text()) < min_year_active:
+                    continue
+            urls[name] = 'https://www.basketball-reference.com' + coach.attrs['href']
         except Exception as e:
-            print("ERROR:", e)
-    sleep(1) # sleeping to be kind for requests
-    return coaches
+            logger.error(e)
+    return urls
 
 
-def getCurrentTeams(suppressOutput=True):
-
-    teams = dict()
-    glsoup = getSoupFromURL('https://www.basketball-reference.com/teams/', suppressOutput)
-
-    active_teams_table = glsoup.find('table', id='teams_active')  # id for reg season table
-    all_rows = active_teams_table.find_all("th", attrs={"data-stat": "franch_name"})
-    active_teams = list()
-    for row in all_rows:
-        team = row.find("a")
-        if team is None:
+def build_entities(cls, namesURLs, stage, suppressOutput=True):
+    """
+    {name: cls(name, url)} for a {name: url} of coaches or teams.  Each url is
+    fetched and parsed once, several at a time through the shared rate limiter
+    and response cache, names that share a url share the object.  An entity
+    whose page can't be fetched or parsed is logged and left out, the rest of
+    the batch carries on.  suppressOutput=False prints each url fetched.
+    """
+    names_by_url = dict()
+    for name, url in namesURLs.items():
+        if url is None:
+            logger.error("%s not found!", name)
             continue
-        active_teams.append(team)
-    for team in active_teams:
-        name = team.get_text()
+        names_by_url.setdefault(url, []).append(name)
+
+    def build(item):
+        url, names = item
         try:
-            teams[name] = Team(name, 'https://www.basketball-reference.com' + team.attrs['href'])
+            html = getHTMLFromURL(url, suppressOutput)
+            if html is None:
+                raise Exception("Couldn't fetch %s" % url)
+            entity = cls(names[0], url, scrape_data=False)
+            entity.scrape_data(html)
+            return entity
         except Exception as e:
-            print("ERROR:", e)
-    sleep(1)  # sleeping to be kind for requests
+            logger.error("Couldn't build %s from %s: %s", names[0], url, e)
+            return None
+
+    items = list(names_by_url.items())
+    entities = dict()
+    for (url, names), entity in zip(items, crawl_map(build, items, stage=stage)):
+        if entity is not None:
+            entities.update((name, entity) for name in names)
+    if len(entities) < len(namesURLs):
+        logger.error("Missing {} of {} ({})".format(len(namesURLs) - len(entities), len(namesURLs), stage))
+    return entities
+
+
+def buildCoachDictionary(coachNamesURLs, suppressOutput=True):
+    return build_entities(Coach, coachNamesURLs, 'coach', suppressOutput)
+
+
+def buildTeamDictionary(teamNamesURLs, suppressOutput=True):
+    return build_entities(Team, teamNamesURLs, 'team', suppressOutput)
+
+
+def getAllCoaches(suppressOutput=True, min_year_active=2004):
+    """
+    {name: Coach} of the coaches whose last season is min_year_active or later,
+    every coach in the history of the league with min_year_active=None
+    """
+    glsoup = getSoupFromURL('https://www.basketball-reference.com/coaches/', suppressOutput, expect='coaches')
+    if glsoup is None:
+        return dict()
+    return buildCoachDictionary(coach_index_urls(glsoup, min_year_active), suppressOutput)
+
 
-    return teams
+def team_index_urls(teams_page, table_ids=('teams_active',)):
+    """
+    {name: url} of the franchises in the given tables of the teams index page,
+    'teams_active' and/or 'teams_defunct'
+    """
+    urls = dict()
+    for table_id in table_ids:
+        teams_table = teams_page.find('table', id=table_id)
+        if teams_table is None:
+            # tables further down the page are sent inside an html comment
+            wrapper = teams_page.find('div', id='all_' + table_id)
+            wrapper = find_html_in_comment(wrapper) if wrapper is not None else None
+            teams_table = wrapper.find('table', id=table_id) if wrapper is not None else None
+        if teams_table is None:
+            logger.error("No %s table on the teams page", table_id)
+            continue
+        for row in teams_table.find_all("th", attrs={"data-stat": "franch_name"}):
+            team = row.find("a")
+            if team is None:
+                continue
+            urls[team.get_text()] = 'https://www.basketball-reference.com' + team.attrs['href']
+    return urls
+
+
+def active_team_urls(teams_page):
+    """
+    {name: url} of the active franchises on the teams index page
+    """
+    return team_index_urls(teams_page)
+
+
+def getCurrentTeams(suppressOutput=True):
+    glsoup = getSoupFromURL('https://www.basketball-reference.com/teams/', suppressOutput, expect='teams_active')
+    if glsoup is None:
+        return dict()
+    return buildTeamDictionary(active_team_urls(glsoup), suppressOutput)
+
+
+def getAllTeams(suppressOutput=True):
+    """
+    {name: Team} of every franchise, active and defunct
+    """
+    glsoup = getSoupFromURL('https://www.basketball-reference.com/teams/', suppressOutput, expect='teams_active')
+    if glsoup is None:
+        return dict()
+    return buildTeamDictionary(team_index_urls(glsoup, ('teams_active', 'teams_defunct')), suppressOutput)
+
+
+def buildCoachLookup(coaches, players=None):
+    """
+    A CoachLookup of who coached each team every season, joined with the
+    players' teams_dict when players are given:
+
+        lookup = buildCoachLookup(getAllCoaches(min_year_active=None), players)
+        lookup.player_coaches('LeBron James', 2016)
+    """
+    return CoachLookup(coaches, players)
+
+
+def getSeasonStats(season, kind='per_game'):
+    """
+    Every player's per_game or totals line for a season, from a single page
+    """
+    return season_table(season, kind)
+
+
+def getSeasonSchedule(season):
+    return season_schedule(season)
+
+
+def getSeasonBoxScores(season, since=None):
+    """
+    Player-game rows of the whole league for a season, built from its box scores.
+    since ('YYYY-MM-DD') only fetches the games played after that day.
+    """
+    return season_box_scores(season, since=since)
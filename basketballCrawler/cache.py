@@ -0,0 +1,269 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import namedtuple
+
+from .soup_utils import current_season
+
+
+CachedResponse = namedtuple('CachedResponse',
+                            ['url', 'body', 'etag', 'last_modified', 'fetched_at'])
+
+GAMELOG_YEAR_PATTERN = re.compile('/gamelog/([0-9]{4})')
+
+# six hours for pages that can still change (current season, indexes...)
+DEFAULT_TTL = 6 * 60 * 60
+
+
+def gamelog_ttl(url):
+    """
+    Game logs of finished seasons never change, so they never expire.
+    The current season's logs get the default TTL.
+    """
+    match = GAMELOG_YEAR_PATTERN.search(url)
+    if match is not None and int(match.group(1)) < current_season():
+        return None
+    return DEFAULT_TTL
+
+
+# list of (regex, ttl) pairs, first match wins.  ttl is a number of seconds,
+# None (never expire) or a callable taking the url and returning one of those.
+DEFAULT_TTL_RULES = [
+    (re.compile('/gamelog/'), gamelog_ttl),
+]
+
+
+class ResponseCache(object):
+    """
+    Base class for the URL keyed response caches used by getSoupFromURL.
+
+    Subclasses implement _load, _save, _touch, _delete, _size and _evict.
+    ttl_rules is a list of (pattern, ttl) pairs checked in order against
+    the url, default_ttl is used when nothing matches.  max_bytes bounds
+    the total stored size, least recently used entries are evicted first.
+    In offline mode the cache is the only source of pages, expired entries
+    are served as they are and misses are returned as None.
+    """
+
+    def __init__(self, ttl_rules=None, default_ttl=DEFAULT_TTL, max_bytes=None, offline=False):
+        self.ttl_rules = [(re.compile(p) if isinstance(p, str) else p, ttl)
+                          for p, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)]
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl(url) if callable(ttl) else ttl
+        return self.default_ttl
+
+    def is_fresh(self, entry, now=None):
+        ttl = self.ttl_for(entry.url)
+        if ttl is None:
+            return True
+        now = time.time() if now is None else now
+        return now - entry.fetched_at < ttl
+
+    def get(self, url):
+        with self._lock:
+            entry = self._load(url)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._touch(url)
+            return entry
+
+    def set(self, url, body, etag=None, last_modified=None):
+        entry = CachedResponse(url, body, etag, last_modified, time.time())
+        with self._lock:
+            self._save(entry)
+            if self.max_bytes is not None and self._size() > self.max_bytes:
+                self._evict(self.max_bytes)
+        return entry
+
+    def refresh(self, entry):
+        """
+        Marks an entry as fetched now, used after a 304 Not Modified.
+        """
+        return self.set(entry.url, entry.body, entry.etag, entry.last_modified)
+
+    def delete(self, url):
+        with self._lock:
+            self._delete(url)
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def _load(self, url):
+        raise NotImplementedError
+
+    def _save(self, entry):
+        raise NotImplementedError
+
+    def _touch(self, url):
+        raise NotImplementedError
+
+    def _delete(self, url):
+        raise NotImplementedError
+
+    def _size(self):
+        raise NotImplementedError
+
+    def _evict(self, max_bytes):
+        raise NotImplementedError
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Single file cache, bodies are stored zlib compressed.  Access times only
+    order evictions, so hits are written in batches of TOUCH_BATCH (and with the
+    next save, eviction or close) rather than with a commit per hit.
+    """
+
+    TOUCH_BATCH = 100
+
+    def __init__(self, path, **kwargs):
+        super(SQLiteCache, self).__init__(**kwargs)
+        self.path = path
+        self._touched = {}  # url -> access time not written yet
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                url TEXT PRIMARY KEY,
+                                body BLOB NOT NULL,
+                                etag TEXT,
+                                last_modified TEXT,
+                                fetched_at REAL NOT NULL,
+                                accessed_at REAL NOT NULL,
+                                size INTEGER NOT NULL)""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def _load(self, url):
+        row = self._conn.execute("SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                                 (url,)).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return CachedResponse(url, zlib.decompress(body).decode('utf-8'), etag, last_modified, fetched_at)
+
+    def _save(self, entry):
+        body = zlib.compress(entry.body.encode('utf-8'))
+        self._touched.pop(entry.url, None)
+        self._write_touches()
+        self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (entry.url, body, entry.etag, entry.last_modified,
+                            entry.fetched_at, time.time(), len(body)))
+        self._conn.commit()
+
+    def _touch(self, url):
+        self._touched[url] = time.time()
+        if len(self._touched) >= self.TOUCH_BATCH:
+            self._write_touches()
+            self._conn.commit()
+
+    def _write_touches(self):
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE url = ?",
+                                   [(accessed_at, url) for url, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def _delete(self, url):
+        self._touched.pop(url, None)
+        self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+        self._conn.commit()
+
+    def _size(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self, max_bytes):
+        self._write_touches()
+        total = self._size()
+        rows = self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if total <= max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+class DirectoryCache(ResponseCache):
+    """
+    One compressed file per url in a directory, named after the url's hash.
+    The file modification time is used as the access time for eviction.
+    """
+
+    HEADER_SEPARATOR = b'\x00'
+
+    def __init__(self, path, **kwargs):
+        super(DirectoryCache, self).__init__(**kwargs)
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _file_for(self, url):
+        return os.path.join(self.path, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.z')
+
+    def _load(self, url):
+        try:
+            with open(self._file_for(url), 'rb') as f:
+                data = zlib.decompress(f.read())
+        except (IOError, OSError):
+            return None
+        header, body = data.split(self.HEADER_SEPARATOR, 1)
+        stored_url, etag, last_modified, fetched_at = header.decode('utf-8').split('\n')
+        return CachedResponse(stored_url, body.decode('utf-8'), etag or None,
+                              last_modified or None, float(fetched_at))
+
+    def _save(self, entry):
+        header = '\n'.join([entry.url, entry.etag or '', entry.last_modified or '', repr(entry.fetched_at)])
+        data = header.encode('utf-8') + self.HEADER_SEPARATOR + entry.body.encode('utf-8')
+        with open(self._file_for(entry.url), 'wb') as f:
+            f.write(zlib.compress(data))
+
+    def _touch(self, url):
+        os.utime(self._file_for(url), None)
+
+    def _delete(self, url):
+        try:
+            os.remove(self._file_for(url))
+        except OSError:
+            pass
+
+    def _files(self):
+        return [os.path.join(self.path, f) for f in os.listdir(self.path) if f.endswith('.z')]
+
+    def _size(self):
+        return sum(os.path.getsize(f) for f in self._files())
+
+    def _evict(self, max_bytes):
+        files = sorted(self._files(), key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        for f in files:
+            if total <= max_bytes:
+                break
+            total -= os.path.getsize(f)
+            os.remove(f)
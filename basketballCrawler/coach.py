@@ -1,37 +1,75 @@
-from .soup_utils import getSoupFromURL
+from .soup_utils import getSoupFromURL, make_soup
+import re
+import sys
 import logging
 
 
+logger = logging.getLogger(__name__)
+
+
 class Coach(object):
+    __slots__ = ('name', 'overview_url', 'overview_url_content', 'teams', 'team_ids')
+
+    TEAM_ID_PATTERN = re.compile('/teams/([A-Z0-9]{3})/')
 
-    def __init__(self, name, _overview_url, scrape_data=True):
+    def __init__(self, name, _overview_url, scrape_data=True, keep_content=False):
         self.name = name
         self.overview_url = _overview_url
         self.overview_url_content = None
         self.teams = {}
+        self.team_ids = {}
 
         if scrape_data:
-            self.scrape_data()
+            self.scrape_data(keep_content=keep_content)
 
-    def scrape_data(self):
-        print(self.name, self.overview_url)
-        if self.overview_url_content is not None:
+    def scrape_data(self, html=None, keep_content=False):
+        logger.info("%s %s", self.name, self.overview_url)
+        if self.overview_url_content is not None or self.teams:
             raise Exception("Can't populate this!")
 
-        overview_soup = getSoupFromURL(self.overview_url)
-        self.overview_url_content = overview_soup.text
+        if html is None:
+            overview_soup = getSoupFromURL(self.overview_url, expect='coach-stats')
+        else:
+            overview_soup = make_soup(html, expect='coach-stats')
+        if overview_soup is None:
+            raise Exception("Couldn't fetch %s" % self.overview_url)
+        if keep_content:
+            self.overview_url_content = overview_soup.text
 
         try:
             self.scrape_teams(overview_soup)
 
         except Exception as ex:
-            logging.error(ex.message)
+            logger.error("%s: %s", self.overview_url, ex)
             self.teams = {}
+            self.team_ids = {}
 
     def scrape_teams(self, soup):
         table_soup = soup.find("table", id="coach-stats").find("tbody")
         rows = table_soup.find_all("tr")
         for row in rows:
-            season = row.find("th", attrs={"data-stat": "season"}).get_text()
-            team = row.find("td", attrs={"data-stat": "team_id"}).find("a").get("title")
-            self.teams[season] = team
+            season = row.find("th", attrs={"data-stat": "season"})
+            team = row.find("td", attrs={"data-stat": "team_id"})
+            link = team.find("a") if team is not None else None
+            if season is None or link is None:
+                continue
+            season = sys.intern(season.get_text())
+            self.teams[season] = sys.intern(link.get("title"))
+            # the abbreviation, as in Player.teams_dict, is only in the link
+            team_id = self.TEAM_ID_PATTERN.search(link.get("href") or '')
+            if team_id is not None:
+                self.team_ids[season] = sys.intern(team_id.group(1))
+
+    def to_dict(self, include_content=False):
+        return {'name': self.name, 'overview_url': self.overview_url, 'teams': dict(self.teams),
+                'team_ids': dict(self.team_ids),
+                'overview_url_content': self.overview_url_content if include_content else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        coach = cls(data.get('name'), data.get('overview_url'), scrape_data=False)
+        coach.overview_url_content = data.get('overview_url_content')
+        coach.teams = {sys.intern(season): sys.intern(team) for season, team in (data.get('teams') or {}).items()}
+        coach.team_ids = {sys.intern(season): sys.intern(team_id)
+                          for season, team_id in (data.get('team_ids') or {}).items()}
+        return coach
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from .soup_utils import season_key
+
+
+class CoachLookup(object):
+    """
+    Who coached which team in which season, precomputed from a {name: Coach} dictionary.
+
+    by_team_season maps (team id, season) to the names of the coaches of that team
+    that season, more than one when a coach was replaced during it.  Given players,
+    by_player holds the same lookup joined with each Player.teams_dict, so
+    "who coached this player each season" never needs another page.
+    """
+
+    def __init__(self, coaches, players=None):
+        self.by_team_season = {}
+        for name, coach in coaches.items():
+            for season, team_id in coach.team_ids.items():
+                self.by_team_season.setdefault((team_id, season), []).append(name)
+        self.by_player = {}
+        if players is not None:
+            self.add_players(players)
+
+    def coaches(self, team_id, season):
+        return self.by_team_season.get((team_id, season_key(season)), [])
+
+    def add_players(self, players):
+        """
+        Joins {name: Player} with the coaches, replacing players that were added before
+        """
+        for name, player in players.items():
+            self.by_player[name] = {season: self.by_team_season.get((team_id, season), [])
+                                    for season, team_id in player.teams_dict.items()}
+
+    def player_coaches(self, name, season=None):
+        """
+        {season: [coach names]} for a player added with add_players, or one season's coaches
+        """
+        seasons = self.by_player[name]
+        return seasons if season is None else seasons.get(season_key(season), [])
+
+    def to_frame(self):
+        """
+        One row per team, season and coach
+        """
+        return pd.DataFrame.from_records([(team_id, season, name)
+                                          for (team_id, season), names in sorted(self.by_team_season.items())
+                                          for name in names], columns=['team_id', 'season', 'coach'])
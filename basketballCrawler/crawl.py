@@ -0,0 +1,101 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .instrumentation import get_metrics
+
+
+# one request per second, the same budget the old sleep(1) calls gave us
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class RateLimiter(object):
+    """
+    Token bucket shared by every thread that talks to the site.
+    acquire() blocks until a token is available.  burst is the bucket size,
+    i.e. how many requests can go out back to back after an idle period.
+    """
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=1):
+        self.rate = float(requests_per_second)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self):
+        """
+        Takes a token and returns 0 if one is available, otherwise returns how
+        many seconds until there is one.  For callers that must not block, like
+        the asyncio fetcher, which share the budget with the threads this way.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+_rate_limiter = RateLimiter()
+_max_concurrency = DEFAULT_MAX_CONCURRENCY
+
+
+def configure_crawl(requests_per_second=None, max_concurrency=None, burst=None):
+    """
+    Sets the global request budget and the number of requests kept in flight.
+    """
+    global _rate_limiter, _max_concurrency
+    if requests_per_second is not None or burst is not None:
+        _rate_limiter = RateLimiter(_rate_limiter.rate if requests_per_second is None else requests_per_second,
+                                    _rate_limiter.burst if burst is None else burst)
+    if max_concurrency is not None:
+        _max_concurrency = max_concurrency
+
+
+def get_rate_limiter():
+    return _rate_limiter
+
+
+def get_max_concurrency():
+    return _max_concurrency
+
+
+def crawl_map(func, items, max_workers=None, stage='crawl'):
+    """
+    Applies func to every item with several calls in flight, returns the
+    results in the order of items.  The pace of the actual requests is set
+    by the shared rate limiter, so pages that come from the cache or time
+    spent parsing don't use up the request budget.  Progress is reported
+    to the metrics' progress callbacks under stage.
+    """
+    items = list(items)
+    if not items:
+        return []
+    metrics = get_metrics()
+    max_workers = _max_concurrency if max_workers is None else max_workers
+    if max_workers <= 1:
+        results = []
+        for item in items:
+            results.append(func(item))
+            metrics.report_progress(stage, len(results), len(items))
+        return results
+    results = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {executor.submit(func, item): i for i, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            metrics.report_progress(stage, done, len(items))
+    return results
@@ -0,0 +1,164 @@
+import time
+import threading
+import random
+import logging
+import requests
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+from .crawl import get_rate_limiter, get_max_concurrency
+from .instrumentation import get_metrics, page_type
+
+
+logger = logging.getLogger(__name__)
+
+
+class Fetcher(object):
+    """
+    Downloads pages over a pooled keep-alive requests.Session.
+
+    Every request has a connect and a read timeout.  5xx responses, timeouts
+    and dropped connections are retried with exponential backoff and jitter,
+    429 responses wait for as long as the Retry-After header asks.  Requests
+    are paced by the shared rate limiter from crawl.py unless one is given,
+    and go through the response cache when there is one.
+    """
+
+    def __init__(self, cache=None, rate_limiter=None, connect_timeout=5, read_timeout=30,
+                 max_retry=3, backoff_base=1.0, backoff_max=60.0, pool_size=None, headers=None):
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retry = max_retry
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        pool_size = max(get_max_concurrency(), 10) if pool_size is None else pool_size
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def backoff(self, attempt):
+        """
+        Full jitter: a random delay up to base * 2^attempt, capped at backoff_max
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def retry_after(self, response, attempt):
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return self.backoff(attempt)
+        try:
+            return min(self.backoff_max, float(value))
+        except ValueError:
+            pass
+        try:
+            return min(self.backoff_max, max(0, parsedate_to_datetime(value).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return self.backoff(attempt)
+
+    @staticmethod
+    def _wait(delay, attempt, max_retry):
+        # no point waiting after the last attempt, the caller gets None right away
+        if attempt < max_retry - 1:
+            time.sleep(delay)
+
+    def fetch(self, url, suppressOutput=True, max_retry=None, cache=None):
+        """
+        Returns the text of the page at url, None if it couldn't be fetched.
+        """
+        cache = self.cache if cache is None else cache
+        max_retry = self.max_retry if max_retry is None else max_retry
+        metrics = get_metrics()
+        kind = page_type(url)
+
+        entry = None
+        if cache is not None:
+            entry = cache.get(url)
+            metrics.count('cache_misses' if entry is None else 'cache_hits', kind)
+            if entry is not None and (cache.offline or cache.is_fresh(entry)):
+                return entry.body
+            if cache.offline:
+                return None
+
+        if not suppressOutput:
+            print(url)
+
+        headers = cache.conditional_headers(entry) if cache is not None else None
+        limiter = self.rate_limiter if self.rate_limiter is not None else get_rate_limiter()
+        for attempt in range(max_retry):
+            if attempt > 0:
+                metrics.count('retries', kind)
+            limiter.acquire()
+            metrics.count('requests', kind)
+            try:
+                with metrics.timer('fetch', kind):
+                    r = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.exceptions.Timeout as timeout:
+                logger.warning("Timeout: %s", timeout)
+                self._wait(self.backoff(attempt), attempt, max_retry)
+                continue
+            except requests.exceptions.ConnectionError as connection:
+                logger.warning("Connection: %s", connection)
+                self._wait(self.backoff(attempt), attempt, max_retry)
+                continue
+            except requests.exceptions.TooManyRedirects as redir:
+                logger.error("Bad URL: %s", redir)
+                metrics.count('errors', kind)
+                return None
+            except requests.exceptions.RequestException as e:
+                logger.error("%s", e)
+                metrics.count('errors', kind)
+                return None
+
+            metrics.count('bytes', kind, len(r.content))
+            if r.status_code == 304 and entry is not None:
+                metrics.count('not_modified', kind)
+                cache.refresh(entry)
+                return entry.body
+            if r.status_code == 429:
+                logger.warning("HTTP: 429 Too Many Requests for url: %s", url)
+                self._wait(self.retry_after(r, attempt), attempt, max_retry)
+                continue
+            if r.status_code >= 500:
+                logger.warning("HTTP: %d for url: %s", r.status_code, url)
+                self._wait(self.backoff(attempt), attempt, max_retry)
+                continue
+            try:
+                r.raise_for_status()
+            except requests.exceptions.HTTPError as http:
+                logger.error("HTTP: %s", http)
+                metrics.count('errors', kind)
+                return None
+
+            if cache is not None:
+                cache.set(url, r.text, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+            return r.text
+        logger.error("Giving up on %s after %d attempts", url, max_retry)
+        metrics.count('errors', kind)
+        return None
+
+    def close(self):
+        self.session.close()
+
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_default_fetcher():
+    """
+    The fetcher shared by getSoupFromURL, Player, Coach, Team and the crawler functions
+    """
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
+
+
+def set_default_fetcher(fetcher):
+    global _default_fetcher
+    _default_fetcher = fetcher
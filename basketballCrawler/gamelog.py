@@ -0,0 +1,225 @@
+import re
+import logging
+import numpy as np
+import pandas as pd
+from html.parser import HTMLParser
+
+from .instrumentation import get_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+REGULAR_SEASON_TABLE = 'pgl_basic'
+PLAYOFF_TABLE = 'pgl_basic_playoffs'
+
+# schema for the typed game log frames, see typed_gamelog
+INT_COLUMNS = ['G', 'GS', 'FG', 'FGA', '3P', '3PA', 'FT', 'FTA', 'ORB', 'DRB', 'TRB',
+               'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', '+/-']
+FLOAT_COLUMNS = ['FG%', '3P%', 'FT%', 'GmSc']
+CATEGORY_COLUMNS = ['Tm', 'Opp']
+WIN_LOSS_PATTERN = '^([WL]) \\(([+-]?[0-9]+)\\)'
+
+
+class GameLogError(ValueError):
+    """
+    Raised when a game log page has no game log table
+    """
+    pass
+
+
+TABLE_END_PATTERN = re.compile('</table\\s*>', re.IGNORECASE)
+
+
+def extract_table_html(html, table_id):
+    """
+    Slices the markup of <table id="table_id"> out of the raw page, without
+    parsing anything else.  The playoff table is shipped inside an html
+    comment, slicing the raw text finds it there too.  Returns None if the
+    table isn't on the page.
+    """
+    start = re.search('<table[^>]*\\sid=["\']%s["\']' % re.escape(table_id), html)
+    if start is None:
+        return None
+    end = TABLE_END_PATTERN.search(html, start.start())
+    if end is None:
+        return None
+    return html[start.start():end.end()]
+
+
+class TableParser(HTMLParser):
+    """
+    Streams a table's markup into the text of its header cells and the text of
+    each row's <td> cells, without building a tree.  Only the first header row
+    is kept, rows without <td> cells (repeated headers) are skipped.
+    """
+
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.header = []
+        self.rows = []
+        self._in_thead = False
+        self._header_done = False
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'thead':
+            self._in_thead = True
+        elif tag == 'tr':
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = [] if (tag == 'td' or self._in_thead) else None
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self._cell is not None:
+            self._row.append(''.join(self._cell))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            if self._in_thead:
+                if not self._header_done:
+                    self.header = self._row
+                    self._header_done = True
+            elif self._row:
+                self.rows.append(self._row)
+            self._row = None
+        elif tag == 'thead':
+            self._in_thead = False
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def parse_table(table_html):
+    """
+    Returns (header, rows) for the markup of a single table
+    """
+    parser = TableParser()
+    with get_metrics().timer('parse', 'gamelog'):
+        parser.feed(table_html)
+        parser.close()
+    return parser.header, parser.rows
+
+
+def gamelog_header(table_header):
+    """
+    Turns the game log table's header cells into DataFrame column names
+    """
+    header = list(table_header)
+    # add in headers for home/away and w/l columns. a must to get the DataFrame to parse correctly
+    header.insert(5, 'HomeAway')
+    header.insert(8, 'WinLoss')
+    header.pop(0)
+    header.remove('\xa0')
+    header.remove('\xa0')
+    return header
+
+
+def rows_to_df(rows, header, typed=False):
+    """
+    Builds the DataFrame column by column straight from the row texts.
+    Short rows (inactive games use a colspan) are padded with None.
+    """
+    rows = [row for row in rows if row[0] != ""]
+    if not rows:
+        return None
+    width = len(header)
+    if any(len(row) > width for row in rows):
+        logger.error("Couldn't create dataframe: rows are wider than the header\n%s", rows)
+        return None
+    with get_metrics().timer('dataframe', 'gamelog'):
+        padded = [row + [None] * (width - len(row)) for row in rows]
+        columns = list(zip(*padded))
+        df = pd.DataFrame({i: column for i, column in enumerate(columns)})
+        df.columns = header
+        df = df.dropna(subset=["G"])
+        return typed_gamelog(df) if typed else df
+
+
+def gamelog_tables_from_html(html, typed=False):
+    """
+    Pulls the regular season and playoff game log tables out of a page.
+    Returns (regular season DataFrame, playoff DataFrame), either may be None.
+    Raises GameLogError when the page has no regular season table.
+    """
+    reg_html = extract_table_html(html, REGULAR_SEASON_TABLE)
+    if reg_html is None:
+        raise GameLogError("no %s table" % REGULAR_SEASON_TABLE)
+    table_header, reg_rows = parse_table(reg_html)
+    header = gamelog_header(table_header)
+
+    reg = rows_to_df(reg_rows, header, typed)
+    playoff = None
+    playoff_html = extract_table_html(html, PLAYOFF_TABLE)
+    if playoff_html is not None:
+        playoff = rows_to_df(parse_table(playoff_html)[1], header, typed)
+    return reg, playoff
+
+
+def typed_gamelog(df):
+    """
+    Converts a game log frame of strings into compact typed columns in one
+    vectorized pass:
+
+    - counting stats and +/- become nullable int16, percentages and GmSc float32
+    - Date becomes datetime64, Tm and Opp categoricals
+    - Age ("31-011") is split into AgeYears and AgeDays
+    - MP ("34:14") becomes float32 minutes plus SecondsPlayed
+    - HomeAway becomes a categorical of 'H'/'A'
+    - WinLoss ("W (+12)") becomes a categorical of 'W'/'L' plus an int16 Margin
+
+    Columns that aren't part of the schema are left as they are, and so are
+    columns that already have their type, so a typed frame comes back unchanged.
+    """
+    df = df.copy()
+    for column in INT_COLUMNS:
+        if column in df and df[column].dtype != 'Int16':
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int16')
+    for column in FLOAT_COLUMNS:
+        if column in df and df[column].dtype != np.float32:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(np.float32)
+    for column in CATEGORY_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    if 'Date' in df:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    if 'Age' in df and 'AgeYears' not in df:
+        age = df['Age'].str.split('-', n=1, expand=True).reindex(columns=[0, 1])
+        position = df.columns.get_loc('Age')
+        df.insert(position, 'AgeYears', pd.to_numeric(age[0], errors='coerce').astype('Int8'))
+        df.insert(position + 1, 'AgeDays', pd.to_numeric(age[1], errors='coerce').astype('Int16'))
+        del df['Age']
+    if 'MP' in df and 'SecondsPlayed' not in df:
+        minutes = df['MP'].str.split(':', n=1, expand=True).reindex(columns=[0, 1])
+        seconds = pd.to_numeric(minutes[0], errors='coerce') * 60 + pd.to_numeric(minutes[1], errors='coerce')
+        df['MP'] = (seconds / 60).astype(np.float32)
+        df.insert(df.columns.get_loc('MP') + 1, 'SecondsPlayed', seconds.astype('Int32'))
+    if 'HomeAway' in df and not isinstance(df['HomeAway'].dtype, pd.CategoricalDtype):
+        home_away = np.where(df['HomeAway'].fillna('') == '@', 'A', 'H')
+        df['HomeAway'] = pd.Categorical(home_away, categories=['H', 'A'])
+    if 'WinLoss' in df and 'Margin' not in df:
+        result = df['WinLoss'].str.extract(WIN_LOSS_PATTERN)
+        df['WinLoss'] = pd.Categorical(result[0], categories=['W', 'L'])
+        df.insert(df.columns.get_loc('WinLoss') + 1, 'Margin',
+                  pd.to_numeric(result[1], errors='coerce').astype('Int16'))
+    return df
+
+
+def concat_gamelogs(dataframes, typed=False):
+    """
+    Concatenates game log frames whose columns differ between seasons (+/- is
+    missing from older seasons).  The columns are the last frame's followed by
+    any that only appear in earlier ones, missing values are filled with NaN.
+    """
+    dataframes = [df for df in dataframes if df is not None]
+    if not dataframes:
+        return None
+    final_columns = dataframes[-1].columns.values.tolist()
+    for df in dataframes:
+        final_columns += [column for column in df.columns if column not in final_columns]
+    final_dataframes = [df if df.columns.values.tolist() == final_columns
+                        else df.reindex(final_columns, axis='columns')
+                        for df in dataframes]
+    result = pd.concat(final_dataframes)
+    return typed_gamelog(result) if typed else result
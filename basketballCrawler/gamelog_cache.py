@@ -0,0 +1,183 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .cache import gamelog_ttl
+from .crawl import get_max_concurrency
+from .gamelog import gamelog_tables_from_html, concat_gamelogs, GameLogError
+from .soup_utils import getHTMLFromURL
+
+
+logger = logging.getLogger(__name__)
+
+# a season's raw game log frame takes a few tens of KB, so this holds a
+# couple of thousand seasons
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def load_gamelog(url):
+    """
+    Fetches one season's game log page and returns its regular season and
+    playoff rows as one untyped DataFrame, None if the tables couldn't be merged.
+    Raises GameLogError when the page has no game log table.
+    """
+    return gamelog_from_html(getHTMLFromURL(url), url)
+
+
+def gamelog_from_html(html, url):
+    """
+    The parsing half of load_gamelog, url is only used in error messages
+    """
+    try:
+        # slice the two tables out of the raw page instead of parsing the whole document
+        reg, playoff = gamelog_tables_from_html(html or '')
+    except GameLogError:
+        logger.error("Error retrieving game log from: %s", url)
+        raise GameLogError("Error retrieving game log from: %s" % url)
+
+    if reg is None or playoff is None:
+        return playoff if reg is None else reg
+    try:
+        return concat_gamelogs([reg, playoff])
+    except Exception as e:
+        logger.error("Couldn't merge dataframes: %s\n%s\n%s", e, reg, playoff)
+        return None
+
+
+def frame_bytes(df):
+    return 0 if df is None else int(df.memory_usage(index=True, deep=True).sum())
+
+
+class GameLogCache(object):
+    """
+    In-memory LRU of parsed game log DataFrames keyed by url, bounded by the
+    total size of the frames.  Concurrent requests for the same url share one
+    fetch, and prefetch() loads urls in the background so later get() calls
+    return immediately.  Frames are returned as copies, so callers can't
+    change what is cached.  ttl takes a url and returns how many seconds its
+    frame stays valid (None for ever); by default finished seasons never
+    expire and the current one is reloaded after cache.DEFAULT_TTL.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, loader=load_gamelog, ttl=gamelog_ttl):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.ttl = ttl
+        self.size = 0
+        self._frames = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._frames
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+    def put(self, url, df):
+        """
+        Caches a frame loaded elsewhere, e.g. by the asyncio crawler
+        """
+        nbytes = frame_bytes(df)
+        if df is None or nbytes > self.max_bytes:
+            return
+        ttl = self.ttl(url)
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            if url in self._frames:
+                self.size -= self._frames.pop(url)[1]
+            self._frames[url] = (df, nbytes, expires)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._frames.popitem(last=False)
+                self.size -= evicted
+
+    def _lookup(self, url):
+        # the fresh cached frame or None, callers hold the lock
+        if url in self._frames:
+            df, nbytes, expires = self._frames[url]
+            if expires is None or expires > time.time():
+                self._frames.move_to_end(url)
+                return df
+            del self._frames[url]
+            self.size -= nbytes
+        return None
+
+    def _load(self, url):
+        with self._lock:
+            df = self._lookup(url)
+            if df is not None:
+                return df, None
+            future = self._loading.get(url)
+            if future is not None:
+                return None, future
+            future = self._loading[url] = Future()
+        try:
+            df = self.loader(url)
+            self.put(url, df)
+            future.set_result(df)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._loading[url]
+        return future.result(), None
+
+    def get(self, url):
+        """
+        The game log at url, fetched and parsed only if it isn't cached yet
+        """
+        df, pending = self._load(url)
+        if pending is not None:
+            df = pending.result()
+        return None if df is None else df.copy()
+
+    def peek(self, url):
+        """
+        The cached game log at url, None if it isn't cached.  Never fetches anything.
+        """
+        with self._lock:
+            df = self._lookup(url)
+        return None if df is None else df.copy()
+
+    def prefetch(self, urls):
+        """
+        Loads urls into the cache on background threads.
+        Returns a Future per url, whose result is the cached frame.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=get_max_concurrency(),
+                                                    thread_name_prefix='gamelog-prefetch')
+            executor = self._executor
+        return [executor.submit(self.get, url) for url in urls]
+
+    def discard(self, url):
+        with self._lock:
+            if url in self._frames:
+                self.size -= self._frames.pop(url)[1]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.size = 0
+
+
+_gamelog_cache = GameLogCache()
+
+
+def get_gamelog_cache():
+    return _gamelog_cache
+
+
+def set_gamelog_cache(cache):
+    """
+    Replaces the cache shared by every Player, e.g. GameLogCache(max_bytes=...) for a bigger budget
+    """
+    global _gamelog_cache
+    _gamelog_cache = cache
@@ -0,0 +1,194 @@
+import os
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .crawl import get_max_concurrency
+from .instrumentation import get_metrics
+from .soup_utils import getHTMLFromURL
+from .store import store_frame_from_html, player_id_from_url, season_from_gamelog_url
+
+
+logger = logging.getLogger(__name__)
+
+GameLogChunk = namedtuple('GameLogChunk', ['name', 'player_id', 'season', 'url', 'frame', 'error'])
+
+
+def gamelog_work(players, min_season=None, max_season=None):
+    """
+    [(name, player_id, season, url)] of every game log of a {name: Player} dictionary within the season range
+    """
+    work = []
+    for name, player in players.items():
+        player_id = player_id_from_url(player.overview_url)
+        for url in player.gamelog_url_list:
+            season = season_from_gamelog_url(url)
+            if (min_season is None or season >= min_season) and (max_season is None or season <= max_season):
+                work.append((name, player_id, season, url))
+    return work
+
+
+def load_chunk(item):
+    """
+    Fetches and parses one game log page into a GameLogChunk.  The frame has the typed
+    columns of GameLogStore.read(), player_id and season included, so every chunk has the
+    same columns.  A page that can't be fetched or parsed gives frame None and the
+    reason in error.
+    """
+    name, player_id, season, url = item
+    html = getHTMLFromURL(url)
+    if html is None:
+        return GameLogChunk(name, player_id, season, url, None, "couldn't fetch the page")
+    try:
+        df = store_frame_from_html(html)
+    except Exception as e:
+        # an odd page fails its own chunk, not the whole stream
+        return GameLogChunk(name, player_id, season, url, None, str(e) or repr(e))
+    if df is None:
+        return GameLogChunk(name, player_id, season, url, None, "no game log table")
+    df['player_id'] = player_id
+    df['season'] = season
+    return GameLogChunk(name, player_id, season, url, df, None)
+
+
+def stream_gamelogs(players, min_season=None, max_season=None, max_pending=None, max_workers=None):
+    """
+    Yields a GameLogChunk per (player, season) game log of a {name: Player} dictionary
+    as soon as it is fetched and parsed, in the order they finish.
+
+    At most max_pending pages (twice the crawl concurrency by default) are being
+    fetched or waiting to be consumed.  A new page is only started once the consumer
+    has taken a chunk, so a slow sink holds the crawl back instead of piling frames
+    up in memory.  Closing the generator early cancels the pages not started yet.
+    """
+    work = gamelog_work(players, min_season, max_season)
+    if not work:
+        return
+    max_workers = get_max_concurrency() if max_workers is None else max_workers
+    max_pending = 2 * max_workers if max_pending is None else max_pending
+    metrics = get_metrics()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, max_pending)))
+    pending = set()
+    queued = iter(work)
+    done_count = 0
+    try:
+        while True:
+            for item in queued:
+                pending.add(executor.submit(load_chunk, item))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = future.result()
+                if chunk.error is not None:
+                    logger.error("Error retrieving game log from %s: %s", chunk.url, chunk.error)
+                done_count += 1
+                metrics.report_progress('gamelog', done_count, len(work))
+                yield chunk
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class CSVSink(object):
+    """
+    Appends chunks to one CSV file, the header is written with the first chunk
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._header = not os.path.exists(path) or os.path.getsize(path) == 0
+
+    def write(self, df):
+        df.to_csv(self.path, mode='a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetSink(object):
+    """
+    Appends chunks as row groups of one Parquet file (requires pyarrow).  The schema is
+    taken from the first chunk.
+    """
+
+    def __init__(self, path):
+        if pyarrow is None:
+            raise ImportError("ParquetSink requires pyarrow")
+        self.path = path
+        self._writer = None
+
+    def write(self, df):
+        table = pyarrow.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        else:
+            # categoricals and all-null columns can come out with another type per chunk
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLSink(object):
+    """
+    Appends chunks to a database table through DataFrame.to_sql, con is a sqlite3
+    connection or an SQLAlchemy connectable.  Categoricals are written as text.
+    """
+
+    def __init__(self, con, table='gamelogs'):
+        self.con = con
+        self.table = table
+
+    def write(self, df):
+        categories = [column for column in df.columns if df[column].dtype == 'category']
+        df.astype({column: object for column in categories}).to_sql(self.table, self.con, if_exists='append',
+                                                                     index=False)
+
+    def close(self):
+        if hasattr(self.con, 'commit'):
+            self.con.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_gamelogs(chunks, sink):
+    """
+    Writes every chunk with a frame to sink and closes it.  Returns (rows written, failed chunks).
+    """
+    rows, failed = 0, []
+    with sink:
+        for chunk in chunks:
+            if chunk.frame is None:
+                failed.append(chunk)
+                continue
+            sink.write(chunk.frame)
+            rows += len(chunk.frame)
+    return rows, failed
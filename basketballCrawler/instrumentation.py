@@ -0,0 +1,153 @@
+import re
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+PAGE_TYPE_PATTERNS = [
+    ('gamelog', re.compile('/gamelog/')),
+    ('index', re.compile('/players/[a-z]/?$')),
+    ('player', re.compile('/players/[a-z]/[^/]+\\.html')),
+    ('coach', re.compile('/coaches/')),
+    ('team', re.compile('/teams/')),
+]
+
+COUNTERS = ['requests', 'bytes', 'cache_hits', 'cache_misses', 'not_modified', 'retries', 'errors']
+STAGES = ['fetch', 'parse', 'dataframe']
+
+
+def page_type(url):
+    """
+    Classifies a url as gamelog, index, player, coach, team or other
+    """
+    for name, pattern in PAGE_TYPE_PATTERNS:
+        if pattern.search(url):
+            return name
+    return 'other'
+
+
+class CrawlMetrics(object):
+    """
+    Counters and stage timings broken down by page type.
+
+    Counters are requests, bytes downloaded, cache hits and misses, 304s,
+    retries and errors.  Timings (count, total and max seconds) are kept for
+    the fetch, parse and dataframe stages.  Listeners are called with
+    (name, page_type, value) for every recorded value, progress callbacks
+    with (stage, done, total) as crawl_map completes items.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._progress_callbacks = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+            self.timings = defaultdict(lambda: {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def add_progress_callback(self, callback):
+        self._progress_callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        for callbacks in (self._listeners, self._progress_callbacks):
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def count(self, name, kind, value=1):
+        with self._lock:
+            self.counters[kind][name] += value
+        for listener in self._listeners:
+            listener(name, kind, value)
+
+    def observe(self, stage, kind, seconds):
+        with self._lock:
+            timing = self.timings[(stage, kind)]
+            timing['count'] += 1
+            timing['seconds'] += seconds
+            timing['max_seconds'] = max(timing['max_seconds'], seconds)
+        for listener in self._listeners:
+            listener(stage + '_seconds', kind, seconds)
+
+    @contextmanager
+    def timer(self, stage, kind):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, kind, time.perf_counter() - start)
+
+    def report_progress(self, stage, done, total):
+        for callback in self._progress_callbacks:
+            callback(stage, done, total)
+
+    def snapshot(self):
+        """
+        {'counters': {page_type: {counter: value}}, 'timings': {stage: {page_type: timing}}}
+        """
+        with self._lock:
+            timings = {}
+            for (stage, kind), timing in self.timings.items():
+                timings.setdefault(stage, {})[kind] = dict(timing)
+            return {'counters': {kind: dict(values) for kind, values in self.counters.items()},
+                    'timings': timings}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix='basketballcrawler'):
+        """
+        The metrics in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name in COUNTERS:
+            metric = '%s_%s_total' % (prefix, name)
+            lines.append('# TYPE %s counter' % metric)
+            for kind, values in sorted(snapshot['counters'].items()):
+                lines.append('%s{page_type="%s"} %d' % (metric, kind, values[name]))
+        for stage in STAGES:
+            metric = '%s_%s_seconds' % (prefix, stage)
+            lines.append('# TYPE %s summary' % metric)
+            for kind, timing in sorted(snapshot['timings'].get(stage, {}).items()):
+                lines.append('%s_count{page_type="%s"} %d' % (metric, kind, timing['count']))
+                lines.append('%s_sum{page_type="%s"} %.6f' % (metric, kind, timing['seconds']))
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = CrawlMetrics()
+
+
+def get_metrics():
+    """
+    The metrics object every fetch, parse and dataframe build reports to
+    """
+    return _metrics
+
+
+def set_metrics(metrics):
+    global _metrics
+    _metrics = metrics
+
+
+BASKETBALL_LOG = 'basketball.log'
+
+
+def enable_file_logging(path=BASKETBALL_LOG, level=logging.DEBUG):
+    """
+    Sends the package's log records to a file, what importing the package used to do
+    """
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    package_logger = logging.getLogger('basketballCrawler')
+    package_logger.addHandler(handler)
+    package_logger.setLevel(level)
+    return handler
@@ -0,0 +1,166 @@
+import json
+import time
+import logging
+import sqlite3
+import threading
+import traceback
+
+from .crawl import crawl_map, get_max_concurrency
+from .player import Player
+from .soup_utils import getHTMLFromURL
+from .store import GameLogStore, store_frame_from_html, player_id_from_url, season_from_gamelog_url
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class HarvestJob(object):
+    """
+    Resumable full-league harvest: player overview pages, then every game log of every player.
+
+    The work queue and each unit's state live in a SQLite file.  A unit is a
+    url, either a player overview ('player') or one season's game log
+    ('gamelog').  Finished player units store the scraped Player and queue
+    that player's game logs, finished game log units are written to a
+    GameLogStore.  Each unit commits as soon as it is done, so after a crash
+    or Ctrl-C run() picks up exactly where it stopped.  A unit that keeps
+    failing is moved to the dead-letter list (state 'failed') instead of
+    stopping the run.
+    """
+
+    def __init__(self, db_path, store):
+        self.db_path = db_path
+        self.store = store if isinstance(store, GameLogStore) else GameLogStore(store)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS units (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                player_name TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL);
+            CREATE INDEX IF NOT EXISTS units_state ON units (state, kind);
+            CREATE TABLE IF NOT EXISTS players (
+                name TEXT PRIMARY KEY,
+                data TEXT NOT NULL);
+        """)
+        self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def add_players(self, playerNamesURLs):
+        """
+        Queues {name: overview url} players, already queued urls are left as they are
+        """
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO units (url, kind, player_name) VALUES (?, 'player', ?)",
+                                   [(url, name) for name, url in playerNamesURLs.items()])
+            self._conn.commit()
+
+    def add_gamelogs(self, player):
+        """
+        Queues every game log of an already scraped Player
+        """
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO units (url, kind, player_name) VALUES (?, 'gamelog', ?)",
+                                   [(url, player.name) for url in player.gamelog_url_list])
+            self._conn.execute("INSERT OR REPLACE INTO players VALUES (?, ?)",
+                               (player.name, json.dumps(player.to_dict())))
+            self._conn.commit()
+
+    def counts(self):
+        """
+        {(kind, state): number of units}
+        """
+        return {(kind, state): n for kind, state, n in
+                self._query("SELECT kind, state, COUNT(*) FROM units GROUP BY kind, state")}
+
+    def dead_letters(self):
+        """
+        [(url, kind, player name, attempts, error)] of the units that gave up
+        """
+        return self._query("SELECT url, kind, player_name, attempts, error FROM units WHERE state = ?", (FAILED,))
+
+    def retry_failed(self):
+        """
+        Puts the dead-letter units back in the queue
+        """
+        self._execute("UPDATE units SET state = ?, attempts = 0 WHERE state = ?", (PENDING, FAILED))
+
+    def players(self):
+        """
+        The {name: Player} dictionary of every player scraped so far
+        """
+        return {name: Player.from_dict(json.loads(data))
+                for name, data in self._query("SELECT name, data FROM players")}
+
+    def _run_unit(self, unit):
+        url, kind, name = unit
+        if kind == 'player':
+            self.add_gamelogs(Player(name, url, scrape_data=True))
+        else:
+            html = getHTMLFromURL(url)
+            if html is None:
+                raise IOError("couldn't fetch %s" % url)
+            df = store_frame_from_html(html)
+            if df is not None:
+                player_url = url.split('/gamelog/')[0] + '.html'
+                self.store.write(player_id_from_url(player_url), season_from_gamelog_url(url), df)
+
+    def _work(self, unit, max_attempts):
+        url = unit[0]
+        try:
+            self._run_unit(unit)
+        except Exception as e:
+            logger.error("%s failed: %s", url, e)
+            self._execute("""UPDATE units SET attempts = attempts + 1, error = ?, updated_at = ?,
+                                 state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                             WHERE url = ?""",
+                          (traceback.format_exc(), time.time(), max_attempts, url))
+            return False
+        self._execute("UPDATE units SET state = ?, error = NULL, updated_at = ? WHERE url = ?",
+                      (DONE, time.time(), url))
+        return True
+
+    def run(self, max_attempts=3, batch_size=None):
+        """
+        Works through the queue until nothing is pending, players first.
+        Returns the number of units finished by this call.
+        """
+        batch_size = get_max_concurrency() * 8 if batch_size is None else batch_size
+        finished = 0
+        while True:
+            batch = self._query("""SELECT url, kind, player_name FROM units WHERE state = ?
+                                   ORDER BY kind = 'gamelog', rowid LIMIT ?""", (PENDING, batch_size))
+            if not batch:
+                return finished
+            finished += sum(crawl_map(lambda unit: self._work(unit, max_attempts), batch, stage='harvest'))
+
+    def close(self):
+        self._conn.close()
+
+
+def harvestGameLogs(playerNamesURLs, db_path, store_root, max_attempts=3):
+    """
+    Queues the players and runs the harvest, or resumes it if db_path already has a queue.
+    Returns the HarvestJob, see counts() and dead_letters().
+    """
+    job = HarvestJob(db_path, store_root)
+    job.add_players(playerNamesURLs)
+    job.run(max_attempts)
+    return job
@@ -0,0 +1,266 @@
+import re
+import logging
+from collections import namedtuple
+
+import pandas as pd
+
+from .crawl import crawl_map
+from .gamelog import extract_table_html, typed_gamelog
+from .soup_utils import getHTMLFromURL, make_soup
+from .store import RAW_COLUMNS
+
+
+logger = logging.getLogger(__name__)
+
+SITE = 'https://www.basketball-reference.com'
+SEASON_URL = SITE + '/leagues/NBA_%d%s.html'
+
+# season wide tables, one row per player and team (plus a total row for traded players)
+SEASON_TABLES = {
+    'per_game': ('_per_game', 'per_game_stats'),
+    'totals': ('_totals', 'totals_stats'),
+}
+
+TEAM_HREF_PATTERN = re.compile('/teams/([A-Z]{3})/')
+PLAYER_HREF_PATTERN = re.compile('/players/[a-z]/([a-z0-9]+)\\.html')
+MONTH_PAGE_PATTERN = re.compile('/leagues/NBA_[0-9]{4}_games-[a-z]+\\.html')
+BOX_SCORE_PATTERN = re.compile('/boxscores/([0-9]{4})([0-9]{2})([0-9]{2})[0-9]([A-Z]{3})\\.html')
+BOX_TABLE_PATTERN = re.compile('<table[^>]*\\sid="box-([A-Z]{3})-game-basic"')
+
+# box score data-stat -> game log column
+BOX_SCORE_STATS = [('fg', 'FG'), ('fga', 'FGA'), ('fg_pct', 'FG%'), ('fg3', '3P'), ('fg3a', '3PA'),
+                   ('fg3_pct', '3P%'), ('ft', 'FT'), ('fta', 'FTA'), ('ft_pct', 'FT%'), ('orb', 'ORB'),
+                   ('drb', 'DRB'), ('trb', 'TRB'), ('ast', 'AST'), ('stl', 'STL'), ('blk', 'BLK'),
+                   ('tov', 'TOV'), ('pf', 'PF'), ('pts', 'PTS'), ('game_score', 'GmSc'), ('plus_minus', '+/-')]
+
+# what validate_box_scores compares.  Age isn't on box score pages and G is
+# counted from the games found, so neither is checked
+COMPARED_COLUMNS = ['Tm', 'Opp', 'HomeAway', 'WinLoss', 'Margin', 'GS', 'SecondsPlayed',
+                    'FG', 'FGA', '3P', '3PA', 'FT', 'FTA', 'ORB', 'DRB', 'TRB',
+                    'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', '+/-']
+
+ScheduledGame = namedtuple('ScheduledGame', ['date', 'visitor', 'home', 'visitor_pts', 'home_pts',
+                                             'box_score_url', 'playoffs'])
+
+
+def season_url(season, suffix=''):
+    return SEASON_URL % (season, suffix)
+
+
+def _cells(row):
+    return {cell.get('data-stat'): cell for cell in row.find_all(['th', 'td']) if cell.get('data-stat')}
+
+
+def season_table(season, kind='per_game'):
+    """
+    The season's per_game or totals table for every player in one request.
+    Columns are the site's data-stat names (pts_per_g, fg3a, ...), numbers are
+    converted, player_id and season are added.
+    """
+    suffix, table_id = SEASON_TABLES[kind]
+    html = getHTMLFromURL(season_url(season, suffix))
+    table_html = extract_table_html(html or '', table_id)
+    if table_html is None:
+        logger.error("No %s table for %d", kind, season)
+        return None
+    records = []
+    for row in make_soup(table_html).find('tbody').find_all('tr'):
+        if 'thead' in (row.get('class') or []):
+            continue
+        cells = _cells(row)
+        if 'player' not in cells:
+            continue
+        record = {stat: cell.get_text() for stat, cell in cells.items()}
+        link = cells['player'].find('a')
+        match = PLAYER_HREF_PATTERN.search(link.get('href', '')) if link is not None else None
+        record['player_id'] = cells['player'].get('data-append-csv') or (match and match.group(1))
+        records.append(record)
+    df = pd.DataFrame.from_records(records)
+    for column in df.columns:
+        if column not in ('player', 'player_id', 'pos', 'team_id', 'team_name_abbr', 'lg_id', 'awards'):
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    df['season'] = season
+    return df
+
+
+def schedule_from_html(html, playoffs=False):
+    """
+    [ScheduledGame] of one month's schedule page and whether the playoffs had
+    started by its end (the table marks where they begin with a Playoffs row)
+    """
+    table_html = extract_table_html(html or '', 'schedule')
+    if table_html is None:
+        return [], playoffs
+    games = []
+    for row in make_soup(table_html).find('tbody').find_all('tr'):
+        if row.get_text().strip() == 'Playoffs':
+            playoffs = True
+            continue
+        cells = _cells(row)
+        if 'home_team_name' not in cells:
+            continue
+        visitor = TEAM_HREF_PATTERN.search(cells['visitor_team_name'].find('a').get('href')).group(1)
+        home = TEAM_HREF_PATTERN.search(cells['home_team_name'].find('a').get('href')).group(1)
+        box_score = cells.get('box_score_text')
+        box_score = box_score.find('a') if box_score is not None else None
+        url = SITE + box_score.get('href') if box_score is not None else None
+        match = BOX_SCORE_PATTERN.search(url or '')
+        if match is not None:
+            date = '%s-%s-%s' % match.group(1, 2, 3)
+        else:
+            date = pd.to_datetime(cells['date_game'].get_text(), errors='coerce')
+            date = None if pd.isna(date) else date.strftime('%Y-%m-%d')
+        points = [pd.to_numeric(cells[stat].get_text(), errors='coerce') if stat in cells else None
+                  for stat in ('visitor_pts', 'home_pts')]
+        games.append(ScheduledGame(date, visitor, home, points[0], points[1], url, playoffs))
+    return games, playoffs
+
+
+def season_schedule(season):
+    """
+    Every game of the season as [ScheduledGame], from the month by month
+    schedule pages (about 9 requests).  Games not played yet have no box score url.
+    """
+    first = getHTMLFromURL(season_url(season, '_games'))
+    if first is None:
+        return []
+    months = []
+    for path in MONTH_PAGE_PATTERN.findall(first):
+        if SITE + path not in months:
+            months.append(SITE + path)
+    pages = crawl_map(getHTMLFromURL, months, stage='schedule') if months else [first]
+    games, playoffs = [], False
+    for html in pages:
+        month, playoffs = schedule_from_html(html, playoffs)
+        games.extend(month)
+    return games
+
+
+def _box_score_team_rows(table_html):
+    rows = []
+    starter = True
+    for row in make_soup(table_html).find('tbody').find_all('tr'):
+        if 'thead' in (row.get('class') or []):
+            # the Reserves header row
+            starter = False
+            continue
+        cells = _cells(row)
+        if 'player' not in cells or 'reason' in cells or 'mp' not in cells:
+            continue
+        link = cells['player'].find('a')
+        match = PLAYER_HREF_PATTERN.search(link.get('href', '')) if link is not None else None
+        record = {'player_id': cells['player'].get('data-append-csv') or (match and match.group(1)),
+                  'GS': '1' if starter else '0', 'MP': cells['mp'].get_text()}
+        for stat, column in BOX_SCORE_STATS:
+            record[column] = cells[stat].get_text() if stat in cells else None
+        rows.append(record)
+    return rows
+
+
+def box_score_rows(html, game):
+    """
+    The player-game rows of one box score page, for both teams, as raw game
+    log rows (strings, RAW_COLUMNS plus player_id and Playoffs).  Only players
+    who got on the floor are included.
+    """
+    date, home = game.date, game.home
+    teams = BOX_TABLE_PATTERN.findall(html or '')
+    rows = []
+    points = {}
+    for team in teams:
+        team_rows = _box_score_team_rows(extract_table_html(html, 'box-%s-game-basic' % team))
+        points[team] = sum(int(row['PTS'] or 0) for row in team_rows)
+        for row in team_rows:
+            row['Tm'] = team
+        rows.extend(team_rows)
+    if game.home_pts is not None and game.visitor_pts is not None and not pd.isna(game.home_pts):
+        points = {game.home: int(game.home_pts), game.visitor: int(game.visitor_pts)}
+    for row in rows:
+        opponent = [team for team in teams if team != row['Tm']]
+        row['Opp'] = opponent[0] if opponent else (game.visitor if row['Tm'] == home else home)
+        row['HomeAway'] = '' if row['Tm'] == home else '@'
+        margin = points.get(row['Tm'], 0) - points.get(row['Opp'], 0)
+        row['WinLoss'] = '%s (%+d)' % ('W' if margin > 0 else 'L', margin)
+        row['Date'] = date
+        row['Playoffs'] = game.playoffs
+        if row['GmSc'] is None:
+            row['GmSc'] = game_score(row)
+    return rows
+
+
+def game_score(row):
+    """
+    Hollinger's game score, for box scores older than the site's GmSc column
+    """
+    value = dict((column, pd.to_numeric(row.get(column), errors='coerce')) for column in
+                 ('PTS', 'FG', 'FGA', 'FT', 'FTA', 'ORB', 'DRB', 'STL', 'AST', 'BLK', 'PF', 'TOV'))
+    value = dict((column, 0 if pd.isna(v) else v) for column, v in value.items())
+    score = (value['PTS'] + 0.4 * value['FG'] - 0.7 * value['FGA'] - 0.4 * (value['FTA'] - value['FT'])
+             + 0.7 * value['ORB'] + 0.3 * value['DRB'] + value['STL'] + 0.7 * value['AST'] + 0.7 * value['BLK']
+             - 0.4 * value['PF'] - value['TOV'])
+    return '%.1f' % score
+
+
+def season_box_scores(season, schedule=None, since=None):
+    """
+    Player-game rows for every player of the season, typed like
+    GameLogStore.read(): the game log columns plus player_id, season and
+    Playoffs.  One request per game (about 1,230 for a regular season) plus
+    the schedule; since (a 'YYYY-MM-DD' date) only fetches later games, which
+    keeps refreshing a season in progress down to the last few days' games.
+    """
+    schedule = season_schedule(season) if schedule is None else schedule
+    games = [game for game in schedule
+             if game.box_score_url is not None and (since is None or game.date > since)]
+
+    def fetch(game):
+        html = getHTMLFromURL(game.box_score_url)
+        if html is None:
+            logger.error("Couldn't fetch box score %s", game.box_score_url)
+            return []
+        return box_score_rows(html, game)
+
+    rows = [row for game_rows in crawl_map(fetch, games, stage='boxscore') for row in game_rows]
+    if not rows:
+        return None
+    df = pd.DataFrame.from_records(rows)
+    df = df.sort_values(['player_id', 'Playoffs', 'Date'], kind='stable').reset_index(drop=True)
+    # G is the player's game number, regular season and playoffs counted apart
+    df['G'] = (df.groupby(['player_id', 'Playoffs']).cumcount() + 1).astype(str)
+    # box scores don't show ages
+    df['Age'] = ''
+    df = df.reindex(RAW_COLUMNS + ['Playoffs', 'player_id'], axis='columns')
+    df = typed_gamelog(df)
+    df['season'] = season
+    return df
+
+
+def validate_box_scores(box_scores, gamelogs):
+    """
+    Compares player-game rows built from box scores with the same players'
+    game logs (both typed, with player_id, e.g. GameLogStore.read()).  Returns a
+    DataFrame of (player_id, Date, column, box_score, gamelog) differences,
+    column 'row' for games found on one side only; empty when both agree.
+    """
+    keys = ['player_id', 'Date'] + (['Playoffs'] if 'Playoffs' in box_scores and 'Playoffs' in gamelogs else [])
+    played = gamelogs[gamelogs['SecondsPlayed'].fillna(0) > 0]
+    box_scores = box_scores[box_scores['player_id'].isin(played['player_id'].unique())]
+    columns = [c for c in COMPARED_COLUMNS if c in box_scores and c in played]
+    left = box_scores[keys + columns].astype({'player_id': str})
+    right = played[keys + columns].astype({'player_id': str})
+    merged = left.merge(right, on=keys, how='outer', suffixes=('_box', '_log'), indicator=True)
+    differences = []
+    for side, missing in (('left_only', 'gamelog'), ('right_only', 'box_score')):
+        only = merged[merged['_merge'] == side]
+        differences.append(pd.DataFrame({'player_id': only['player_id'], 'Date': only['Date'], 'column': 'row',
+                                         'box_score': missing == 'gamelog', 'gamelog': missing == 'box_score'}))
+    both = merged[merged['_merge'] == 'both']
+    for column in columns:
+        box = both[column + '_box'].astype(object)
+        log = both[column + '_log'].astype(object)
+        box, log = box.where(box.notna(), None), log.where(log.notna(), None)
+        differ = ~((box == log) | (box.isna() & log.isna()))
+        if differ.any():
+            differences.append(pd.DataFrame({'player_id': both['player_id'][differ], 'Date': both['Date'][differ],
+                                             'column': column, 'box_score': box[differ], 'gamelog': log[differ]}))
+    return pd.concat(differences, ignore_index=True)
@@ -0,0 +1,181 @@
+import re
+import heapq
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+PUNCTUATION_PATTERN = re.compile("[.'`,]")
+SEPARATOR_PATTERN = re.compile("[-_\\s]+")
+
+
+def normalize_name(name):
+    """
+    Lower case, accents and punctuation removed: "Nenê" -> "nene", "J.J. Redick" -> "jj redick"
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    stripped = PUNCTUATION_PATTERN.sub('', stripped.lower())
+    return SEPARATOR_PATTERN.sub(' ', stripped).strip()
+
+
+def ngrams(text, n=3):
+    padded = ' %s ' % text
+    return set(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+# keys are bit vectors of one machine word in the LCS bound, longer ones are always scored
+MAX_MASK_LENGTH = 64
+
+
+def popcount(values):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    return np.unpackbits(values.view(np.uint8).reshape(len(values), 8), axis=1).sum(axis=1)
+
+
+class NameIndex(object):
+    """
+    Prebuilt search index over the player names (and scraped nicknames) of a player dictionary.
+
+    search() returns the same kind of result as searchForName: every player
+    whose name contains the search string or whose difflib ratio is above the
+    threshold.  Substring matches are found by intersecting character trigram
+    lists.  Fuzzy candidates come from an upper bound on difflib's ratio computed
+    for every name at once: the characters difflib matches are a common
+    subsequence, so 2 * LCS / (len(a) + len(b)) is never below the ratio, and the
+    LCS of the query with all names is one bit-parallel pass over numpy arrays.
+    Only names whose bound is above the threshold get the full ratio, so results
+    are the same as a linear scan.  top_k() scores names in order of the same
+    bound and returns the best scored players.
+    """
+
+    def __init__(self, playerDictionary, include_nicknames=True, normalize=True):
+        self.normalize = normalize_name if normalize else (lambda name: name.lower())
+        self.keys = []  # normalized strings
+        self.players = []  # for each key, the set of dictionary names it points to
+        key_ids = {}
+        for player_name, player in playerDictionary.items():
+            names = [player_name]
+            if include_nicknames and player is not None:
+                names += getattr(player, 'nicknames', None) or []
+            for name in names:
+                key = self.normalize(name)
+                if key not in key_ids:
+                    key_ids[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.players.append(set())
+                self.players[key_ids[key]].add(player_name)
+
+        # one matcher per key with the key as the second sequence: difflib caches
+        # its index of the second sequence, so each query only sets the first one
+        self.matchers = [SequenceMatcher(None, '', key) for key in self.keys]
+        self.postings = {}
+        for i, key in enumerate(self.keys):
+            for gram in ngrams(key):
+                self.postings.setdefault(gram, set()).add(i)
+
+        # for every character, the bit mask of its positions in each key
+        self.lengths = np.array([len(key) for key in self.keys], dtype=np.int64)
+        self.length_masks = np.array([(1 << min(len(key), MAX_MASK_LENGTH)) - 1 for key in self.keys],
+                                     dtype=np.uint64)
+        masks = {}
+        for i, key in enumerate(self.keys):
+            for position, char in enumerate(key[:MAX_MASK_LENGTH]):
+                masks.setdefault(char, {}).setdefault(i, 0)
+                masks[char][i] |= 1 << position
+        self.char_masks = {}
+        for char, by_key in masks.items():
+            mask = np.zeros(len(self.keys), dtype=np.uint64)
+            mask[list(by_key)] = list(by_key.values())
+            self.char_masks[char] = mask
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _substring_candidates(self, query):
+        grams = [gram for gram in ngrams(query) if ' ' not in (gram[0], gram[-1])]
+        if not grams:
+            return range(len(self.keys))
+        lists = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        return set.intersection(*lists)
+
+    def ratio_bounds(self, query):
+        """
+        For every key, an upper bound on SequenceMatcher(None, query, key).ratio()
+        """
+        # Hyyro's bit-parallel LCS, one uint64 word per key
+        v = np.full(len(self.keys), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for char in query:
+            mask = self.char_masks.get(char)
+            if mask is None:
+                continue
+            u = v & mask
+            v = (v + u) | (v - u)
+        lcs = popcount(~v & self.length_masks)
+        total = self.lengths + len(query)
+        bounds = np.where(total > 0, 2.0 * lcs / np.maximum(total, 1), 1.0)
+        bounds[self.lengths > MAX_MASK_LENGTH] = 1.0
+        return bounds
+
+    def _result(self, ids):
+        names = set()
+        for i in ids:
+            names.update(self.players[i])
+        return list(names)
+
+    def search_ids(self, query, threshold=0.5):
+        query = self.normalize(query)
+        hits = set(i for i in self._substring_candidates(query) if query in self.keys[i])
+        if not self.keys:
+            return hits
+        for i in np.flatnonzero(self.ratio_bounds(query) > threshold).tolist():
+            if i in hits:
+                continue
+            matcher = self.matchers[i]
+            matcher.set_seq1(query)
+            if matcher.ratio() > threshold:
+                hits.add(i)
+        return hits
+
+    def search(self, query, threshold=0.5):
+        """
+        Player names containing query or matching it with a ratio above threshold
+        """
+        return self._result(self.search_ids(query, threshold))
+
+    def search_many(self, queries, threshold=0.5):
+        """
+        Batch version of search, returns {query: [player names]}
+        """
+        return {query: self.search(query, threshold) for query in set(queries)}
+
+    def top_k(self, query, k=5):
+        """
+        The k best (player name, score) pairs for query, best first.  Keys are
+        scored in order of their ratio bound and scoring stops once no remaining
+        key can beat the k-th best score.
+        """
+        query = self.normalize(query)
+        if not self.keys or k <= 0:
+            return []
+        bounds = self.ratio_bounds(query)
+        order = np.argsort(-bounds, kind='stable')
+
+        best = {}
+        heap = []  # (score, key id), the k best keys
+        for bound, i in zip(bounds[order].tolist(), order.tolist()):
+            if len(heap) >= k and bound <= heap[0][0]:
+                break
+            matcher = self.matchers[i]
+            matcher.set_seq1(query)
+            score = matcher.ratio()
+            if len(heap) < k:
+                heapq.heappush(heap, (score, i))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, i))
+        for score, i in heap:
+            for name in self.players[i]:
+                best[name] = max(score, best.get(name, 0))
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
@@ -0,0 +1,149 @@
+import queue
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .crawl import get_max_concurrency
+from .player import Player, parse_player_html
+from .soup_utils import getHTMLFromURL
+from .store import store_frame_from_html
+
+
+# top level parse functions run in the worker processes: raw html in, compact
+# picklable results out (Player field dicts, typed game log frames)
+PARSERS = {
+    'player': parse_player_html,
+    'gamelog': store_frame_from_html,
+}
+
+ParseResult = namedtuple('ParseResult', ['key', 'kind', 'url', 'result', 'error'])
+
+
+class ParsePipeline(object):
+    """
+    Fetching and parsing as two stages connected by bounded queues.
+
+    fetch_workers threads download raw html (through the shared fetcher, so
+    the rate limiter and the response cache apply) into a queue of at most
+    queue_size pages.  A process pool of parse_workers turns each page into a
+    compact result with the parser registered for its kind.  No more than
+    queue_size pages are parsed or waiting to be consumed at any time, so
+    fetching pauses when parsing or the consumer fall behind.
+    """
+
+    def __init__(self, fetch_workers=None, parse_workers=None, queue_size=64, parsers=None):
+        self.fetch_workers = get_max_concurrency() if fetch_workers is None else fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.parsers = PARSERS if parsers is None else parsers
+
+    def run(self, jobs):
+        """
+        jobs is an iterable of (key, kind, url).  Yields a ParseResult per job
+        as soon as it is parsed, in completion order.  error holds the
+        exception if the page couldn't be fetched or parsed.
+        """
+        jobs = list(jobs)
+        pending = queue.Queue()
+        for job in jobs:
+            pending.put(job)
+        pages = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue()
+        slots = threading.Semaphore(self.queue_size)
+        # set when the consumer goes away, so the fetch and dispatch threads don't stay blocked on the queues
+        stop = threading.Event()
+
+        def fetch():
+            while not stop.is_set():
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    page = (job, getHTMLFromURL(job[2]), None)
+                except Exception as e:
+                    page = (job, None, e)
+                while not stop.is_set():
+                    try:
+                        pages.put(page, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+
+        def finished(job, future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            results.put(ParseResult(job[0], job[1], job[2], None if error else future.result(), error))
+
+        def dispatch(executor):
+            dispatched = 0
+            while dispatched < len(jobs) and not stop.is_set():
+                try:
+                    job, html, error = pages.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                dispatched += 1
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if html is None:
+                    results.put(ParseResult(job[0], job[1], job[2], None,
+                                            error or IOError("couldn't fetch %s" % job[2])))
+                    continue
+                try:
+                    future = executor.submit(self.parsers[job[1]], html)
+                except Exception as e:
+                    # an unknown kind or a broken pool fails this job, the consumer still gets a result
+                    results.put(ParseResult(job[0], job[1], job[2], None, e))
+                    continue
+                future.add_done_callback(lambda f, job=job: finished(job, f))
+
+        # the pool starts while fetch threads are running, so don't fork this process
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        executor = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=context)
+        threads = [threading.Thread(target=fetch, daemon=True) for _ in range(self.fetch_workers)]
+        threads.append(threading.Thread(target=dispatch, args=(executor,), daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            for _ in range(len(jobs)):
+                result = results.get()
+                slots.release()
+                yield result
+        finally:
+            stop.set()
+            for drained in (pending, pages):
+                while True:
+                    try:
+                        drained.get_nowait()
+                    except queue.Empty:
+                        break
+            for thread in threads:
+                thread.join()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_players(playerNamesURLs, pipeline=None):
+    """
+    Builds {name: Player} for {name: overview url} with fetching and parsing in parallel.
+    Players whose page failed are left out.
+    """
+    pipeline = ParsePipeline() if pipeline is None else pipeline
+    players = {}
+    for result in pipeline.run((name, 'player', url) for name, url in playerNamesURLs.items()):
+        if result.error is None:
+            fields = dict(result.result, name=result.key, overview_url=result.url)
+            players[result.key] = Player.from_dict(fields)
+    return players
+
+
+def parse_gamelogs(urls, pipeline=None):
+    """
+    Yields (url, typed DataFrame or None, error) for game log urls as they are parsed
+    """
+    pipeline = ParsePipeline() if pipeline is None else pipeline
+    for result in pipeline.run((url, 'gamelog', url) for url in urls):
+        yield result.url, result.result, result.error
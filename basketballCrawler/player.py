@@ -1,22 +1,35 @@
-from .soup_utils import getSoupFromURL
+from .soup_utils import getSoupFromURL, make_soup
+from .gamelog import concat_gamelogs, typed_gamelog
+from .gamelog_cache import get_gamelog_cache
 import re
+import sys
 import logging
 import json
 
 
+logger = logging.getLogger(__name__)
+
+
+def intern_all(values):
+    return [sys.intern(value) for value in values]
+
+
 class Player(object):
+    # a full league dictionary is held in memory by long running processes, so
+    # players have fixed slots and the page text is only kept on request
+    __slots__ = ('name', 'overview_url', 'nicknames', 'positions', 'height', 'weight', 'teams_dict',
+                 'overview_url_content', 'gamelog_data', 'gamelog_url_list', 'gamelog_url_dict')
+
     # Regex patterns for player info
     POSN_PATTERN = re.compile('(Point Guard|Center|Power Forward|Shooting Guard|Small Forward)')
     HEIGHT_PATTERN = re.compile('(^[0-9]-[0-9]{1,2})')
     WEIGHT_PATTERN = re.compile('([0-9]{2,3})lb')
     NICKNAMES_PATTERN = re.compile("[(]([A-Za-z, 0-9-.]+)[)]")
 
-    def __init__(self, _name, _overview_url, scrape_data=True):
+    def __init__(self, _name, _overview_url, scrape_data=True, keep_content=False):
         self.name = _name
         self.overview_url = _overview_url
 
-        # Explicitly declaring all fields in the constructor will ensure that
-        # they're included in JSON serialization
         self.nicknames = []
         self.positions = []
         self.height = None
@@ -28,29 +41,39 @@ class Player(object):
         self.gamelog_url_dict = {}
 
         if scrape_data:
-            self.scrape_data()
+            self.scrape_data(keep_content=keep_content)
 
-    def scrape_data(self):
-        print(self.name, self.overview_url)
-        if self.overview_url_content is not None:
+    def scrape_data(self, html=None, keep_content=False):
+        """
+        Fetches the overview page and fills in the player's fields, or parses html if given.
+        The page text is kept in overview_url_content only with keep_content=True.
+        """
+        logger.info("%s %s", self.name, self.overview_url)
+        if self.overview_url_content is not None or self.gamelog_url_list:
             raise Exception("Can't populate this!")
 
-        overview_soup = getSoupFromURL(self.overview_url)
-        self.overview_url_content = overview_soup.text
+        if html is None:
+            overview_soup = getSoupFromURL(self.overview_url, expect='meta')
+        else:
+            overview_soup = make_soup(html, expect='meta')
+        if overview_soup is None:
+            raise Exception("Couldn't fetch %s" % self.overview_url)
+        if keep_content:
+            self.overview_url_content = overview_soup.text
 
         try:
             player_position_text = overview_soup.find_all(text=self.POSN_PATTERN)[0]
             player_height_text = overview_soup.find_all(text=self.HEIGHT_PATTERN)[0]
             player_weight_text = overview_soup.find_all(text=self.WEIGHT_PATTERN)[0]
-            self.height = self.HEIGHT_PATTERN.findall(player_height_text)[0].strip()
-            self.weight = self.WEIGHT_PATTERN.findall(player_weight_text)[0].strip()
+            self.height = sys.intern(self.HEIGHT_PATTERN.findall(player_height_text)[0].strip())
+            self.weight = sys.intern(self.WEIGHT_PATTERN.findall(player_weight_text)[0].strip())
             tempPositions = self.POSN_PATTERN.findall(player_position_text)
-            self.positions = [position.strip() for position in tempPositions]
+            self.positions = intern_all(position.strip() for position in tempPositions)
             self.scrape_player_nicknames(overview_soup)
             self.scrape_teams(overview_soup)
 
         except Exception as ex:
-            logging.error(ex)
+            logger.error(ex)
             self.positions = []
             self.nicknames = []
             self.height = None
@@ -66,7 +89,7 @@ class Player(object):
                     link_suffix = link.get('href')
                     if "/gamelog/" in link_suffix:
                         full_link = link_prefix + link_suffix
-                        season = link.get_text().strip()
+                        season = sys.intern(link.get_text().strip())
                         self.gamelog_url_list.append(full_link)
                         self.gamelog_url_dict[season] = full_link
                 if len(self.gamelog_url_list) > 0:
@@ -93,8 +116,89 @@ class Player(object):
             team = row.find("td", attrs={"data-stat": "team_id"}).find("a")
             if team is None:
                 continue
-            self.teams_dict[season] = team.get_text()
+            self.teams_dict[sys.intern(season)] = sys.intern(team.get_text())
+
+    def season_gamelog_url(self, season):
+        """
+        The game log url of a season, given as a key of gamelog_url_dict ('2015-16') or its end year (2016)
+        """
+        url = self.gamelog_url_dict.get(str(season))
+        if url is None:
+            suffix = '/gamelog/%s' % season
+            url = next((u for u in self.gamelog_url_list if u.endswith(suffix)), None)
+        if url is None:
+            raise KeyError("%s has no game log for %s" % (self.name, season))
+        return url
+
+    def season_gamelog(self, season, typed=False):
+        """
+        One season's game log, fetched on first access and then served from the
+        shared in-memory game log cache
+        """
+        df = get_gamelog_cache().get(self.season_gamelog_url(season))
+        return typed_gamelog(df) if typed and df is not None else df
+
+    @property
+    def gamelogs(self):
+        """
+        Every season's game log in one DataFrame, see all_gamelogs()
+        """
+        return self.all_gamelogs()
+
+    def all_gamelogs(self, typed=False):
+        cache = get_gamelog_cache()
+        futures = cache.prefetch(self.gamelog_url_list)
+        return concat_gamelogs([future.result() for future in futures], typed)
+
+    def prefetch_gamelogs(self, seasons=None):
+        """
+        Starts loading the game logs of seasons (all of them by default) in the
+        background and returns right away with a Future per season
+        """
+        urls = self.gamelog_url_list if seasons is None else [self.season_gamelog_url(s) for s in seasons]
+        return get_gamelog_cache().prefetch(urls)
+
+    def to_dict(self, include_content=False):
+        """
+        The player's fields as a plain dict, the page content only with include_content=True
+        """
+        data = {field: getattr(self, field) for field in self.__slots__}
+        if not include_content:
+            data['overview_url_content'] = None
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a Player from to_dict() output, unknown keys are ignored
+        """
+        player = cls(data.get('name'), data.get('overview_url'), scrape_data=False)
+        player.overview_url_content = data.get('overview_url_content')
+        player.gamelog_data = data.get('gamelog_data')
+        player.nicknames = data.get('nicknames') or []
+        player.positions = intern_all(data.get('positions') or [])
+        player.height = sys.intern(data['height']) if data.get('height') else data.get('height')
+        player.weight = sys.intern(data['weight']) if data.get('weight') else data.get('weight')
+        player.teams_dict = {sys.intern(season): sys.intern(team)
+                             for season, team in (data.get('teams_dict') or {}).items()}
+        player.gamelog_url_list = data.get('gamelog_url_list') or []
+        # share the url strings between the list and the dict, as a scraped player does
+        urls = {url: url for url in player.gamelog_url_list}
+        player.gamelog_url_dict = {sys.intern(season): urls.get(url, url)
+                                   for season, url in (data.get('gamelog_url_dict') or {}).items()}
+        return player
 
     def to_json(self):
-        self.overview_url_content = None
-        return json.dumps(self.__dict__)
\ No newline at end of file
+        return json.dumps(self.to_dict())
+
+
+def parse_player_html(html):
+    """
+    Parses an overview page into the fields of Player.to_dict(), without name
+    and url.  A top level function so that it can run in a process pool.
+    """
+    player = Player(None, None, scrape_data=False)
+    player.scrape_data(html)
+    fields = player.to_dict()
+    del fields['name'], fields['overview_url']
+    return fields
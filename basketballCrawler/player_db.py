@@ -0,0 +1,121 @@
+import os
+import json
+import zlib
+import sqlite3
+from collections.abc import Mapping
+from urllib.parse import quote
+
+from .player import Player
+from .roster_index import RosterIndex
+
+
+FORMAT_VERSION = 1
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+
+def is_player_db(path):
+    """
+    True if path is a compact player database rather than a legacy JSON file
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def encode_player(player):
+    return zlib.compress(json.dumps(player.to_dict(), separators=(',', ':')).encode('utf-8'))
+
+
+def decode_player(data):
+    return Player.from_dict(json.loads(zlib.decompress(data).decode('utf-8')))
+
+
+def encode_roster(roster):
+    return zlib.compress(json.dumps(roster.to_dict(), separators=(',', ':')).encode('utf-8'))
+
+
+def decode_roster(data):
+    return RosterIndex.from_dict(json.loads(zlib.decompress(data).decode('utf-8')))
+
+
+def save_player_db(playerDictionary, path, roster=None):
+    """
+    Writes the player dictionary as a single SQLite file, one compressed
+    record per player keyed by name, so a player can be read on its own.
+    The RosterIndex of the players (built here unless given) is stored
+    alongside them.
+    """
+    roster = RosterIndex(playerDictionary) if roster is None else roster
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("DROP TABLE IF EXISTS meta")
+        conn.execute("DROP TABLE IF EXISTS players")
+        conn.execute("DROP TABLE IF EXISTS roster")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE players (name TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        conn.execute("CREATE TABLE roster (data BLOB NOT NULL)")
+        conn.execute("INSERT INTO meta VALUES ('version', ?)", (str(FORMAT_VERSION),))
+        conn.execute("INSERT INTO roster VALUES (?)", (encode_roster(roster),))
+        conn.executemany("INSERT INTO players VALUES (?, ?)",
+                         ((name, encode_player(player)) for name, player in playerDictionary.items()))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class PlayerDB(Mapping):
+    """
+    Read-only {name: Player} mapping over a file written by save_player_db.
+    Only the names are read up front, each Player is decoded on first access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect('file:%s?mode=ro' % quote(os.path.abspath(path)), uri=True, check_same_thread=False)
+        version = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) > FORMAT_VERSION:
+            raise ValueError("unsupported player database version: %s" % (version and version[0]))
+        self._names = [row[0] for row in self._conn.execute("SELECT name FROM players ORDER BY rowid")]
+        self._name_set = set(self._names)
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            row = self._conn.execute("SELECT data FROM players WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+            self._loaded[name] = decode_player(row[0])
+        return self._loaded[name]
+
+    def __contains__(self, name):
+        return name in self._name_set
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def roster(self):
+        """
+        The stored RosterIndex, None for files written before it was added
+        """
+        try:
+            row = self._conn.execute("SELECT data FROM roster").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return None if row is None else decode_roster(row[0])
+
+    def close(self):
+        self._conn.close()
+
+
+def load_legacy_json(path):
+    """
+    Reads the old JSON format written by savePlayerDictionary
+    """
+    result = {}
+    with open(path) as f:
+        json_dict = json.loads(f.read())
+        for player_name in json_dict:
+            result[player_name] = Player.from_dict(json.loads(json_dict[player_name]))
+    return result
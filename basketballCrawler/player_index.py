@@ -0,0 +1,187 @@
+import re
+import sys
+import sqlite3
+import logging
+import pandas as pd
+
+from .store import player_id_from_url
+
+
+logger = logging.getLogger(__name__)
+
+SITE = 'https://www.basketball-reference.com'
+LETTER_PAGE_URLS = ['%s/players/%s/' % (SITE, letter) for letter in 'abcdefghijklmnopqrstuvwxyz']
+
+COLUMNS = ['player_id', 'name', 'year_min', 'year_max', 'pos', 'height', 'weight', 'active', 'url']
+HEIGHT_PATTERN = re.compile('^([0-9])-([0-9]{1,2})$')
+
+FORMAT_VERSION = 1
+
+
+def height_inches(text):
+    """
+    '6-11' -> 83, None if the height isn't given
+    """
+    match = HEIGHT_PATTERN.match(text.strip())
+    return int(match.group(1)) * 12 + int(match.group(2)) if match else None
+
+
+def _int_or_none(text):
+    text = text.strip()
+    return int(text) if text.isdigit() else None
+
+
+def player_index_rows(letter_page):
+    """
+    One tuple per player on a letter index page, in the order of COLUMNS.
+    Each row is read in a single pass over its cells.
+    """
+    rows = []
+    for row in letter_page.find("table", id="players").find("tbody").find_all("tr"):
+        cells = {}
+        for cell in row.find_all(['th', 'td'], recursive=False):
+            cells[cell.get('data-stat')] = cell
+        player = cells.get('player')
+        link = player.find("a") if player is not None else None
+        if link is None:
+            continue
+        try:
+            url = SITE + link.attrs['href']
+            rows.append((player_id_from_url(url), link.get_text(),
+                         int(cells['year_min'].get_text()), int(cells['year_max'].get_text()),
+                         sys.intern(cells['pos'].get_text().strip()) if 'pos' in cells else '',
+                         height_inches(cells['height'].get_text()) if 'height' in cells else None,
+                         _int_or_none(cells['weight'].get_text()) if 'weight' in cells else None,
+                         player.find("strong") is not None, url))
+        except Exception as e:
+            logger.error(e)
+    return rows
+
+
+def _typed(frame):
+    frame = frame.reindex(COLUMNS, axis='columns')
+    return frame.astype({'player_id': object, 'name': object, 'year_min': 'int16', 'year_max': 'int16',
+                         'pos': 'category', 'height': 'Int8', 'weight': 'Int16', 'active': bool, 'url': object})
+
+
+def _display_names(frame):
+    names = []
+    seen = set()
+    for player_id, name in zip(frame['player_id'], frame['name']):
+        if name in seen:
+            name = '%s (%s)' % (name, player_id)
+        seen.add(name)
+        names.append(name)
+    return pd.Series(names, index=frame.index, dtype=object)
+
+
+class PlayerIndex(object):
+    """
+    The roster table of the 26 letter index pages, one row per player keyed by player id:
+    player_id, name, year_min, year_max, pos, height (inches), weight (lb), active, url.
+
+    It is built from a single read of each letter page, and every listing function is
+    a filter over it.  Players who share a name are separate rows.  The table can be
+    saved to and loaded from a small SQLite file.
+    """
+
+    def __init__(self, frame, display_names=None):
+        self.frame = _typed(frame).set_index('player_id', drop=False).sort_index()
+        self.frame.index.name = None
+        # told apart once over the whole index, so a subset uses the same names as the full listing
+        self.display_names = (_display_names(self.frame) if display_names is None
+                              else display_names.reindex(self.frame.index))
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(pd.DataFrame.from_records(rows, columns=COLUMNS))
+
+    @classmethod
+    def from_letter_pages(cls, letter_pages):
+        """
+        Builds the index from the letter page soups, pages that are None are skipped
+        """
+        rows = []
+        for letter_page in letter_pages:
+            if letter_page is not None:
+                rows.extend(player_index_rows(letter_page))
+        return cls.from_rows(rows)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, player_id):
+        return player_id in self.frame.index
+
+    def __getitem__(self, player_id):
+        return self.frame.loc[player_id]
+
+    def select(self, active=None, min_year_active=None, position=None, **ranges):
+        """
+        A new index with only the matching players.
+        active: True/False for the players in bold (active) or not
+        min_year_active: last season is this one or later
+        position: players whose pos contains this ('C' matches 'C' and 'F-C')
+        ranges: min_<column>/max_<column> bounds, e.g. min_height=82, max_year_min=2000
+        """
+        frame = self.frame
+        mask = pd.Series(True, index=frame.index)
+        if active is not None:
+            mask &= frame['active'] == active
+        if min_year_active is not None:
+            mask &= frame['year_max'] >= min_year_active
+        if position is not None:
+            mask &= frame['pos'].astype(str).str.split('-').apply(lambda positions: position in positions)
+        for key, value in ranges.items():
+            bound, _, column = key.partition('_')
+            if bound not in ('min', 'max') or column not in frame.columns:
+                raise TypeError("unknown filter: %s" % key)
+            mask &= (frame[column] >= value if bound == 'min' else frame[column] <= value).fillna(False)
+        return PlayerIndex(frame[mask], self.display_names)
+
+    def current(self):
+        return self.select(active=True)
+
+    def names_and_urls(self):
+        """
+        {name: url}.  Players who share a name keep it for the first one, the others
+        get their id appended, 'Tony Mitchell (mitchto02)', so nobody is dropped.
+        The names are assigned over the index a subset was selected from, so a
+        name means the same player in every listing.
+        """
+        return dict(zip(self.display_names, self.frame['url']))
+
+    def save(self, path):
+        """
+        Writes the table to a SQLite file, replacing what was there
+        """
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("DROP TABLE IF EXISTS player_index")
+            conn.execute("DROP TABLE IF EXISTS player_index_meta")
+            conn.execute("CREATE TABLE player_index_meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE player_index (player_id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+                         "year_min INTEGER, year_max INTEGER, pos TEXT, height INTEGER, weight INTEGER, "
+                         "active INTEGER, url TEXT NOT NULL)")
+            conn.execute("INSERT INTO player_index_meta VALUES ('version', ?)", (str(FORMAT_VERSION),))
+            frame = self.frame.astype({'pos': object, 'height': object, 'weight': object})
+            conn.executemany("INSERT INTO player_index VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             ((player_id, name, int(year_min), int(year_max), pos,
+                               None if pd.isna(height) else int(height), None if pd.isna(weight) else int(weight),
+                               int(active), url)
+                              for player_id, name, year_min, year_max, pos, height, weight, active, url
+                              in frame[COLUMNS].itertuples(index=False)))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @classmethod
+    def load(cls, path):
+        conn = sqlite3.connect(path)
+        try:
+            version = conn.execute("SELECT value FROM player_index_meta WHERE key = 'version'").fetchone()
+            if version is None or int(version[0]) > FORMAT_VERSION:
+                raise ValueError("unsupported player index version: %s" % (version and version[0]))
+            return cls(pd.read_sql_query("SELECT %s FROM player_index" % ', '.join(COLUMNS), conn))
+        finally:
+            conn.close()
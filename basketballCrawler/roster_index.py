@@ -0,0 +1,183 @@
+import sys
+import bisect
+
+from .player_index import height_inches
+from .soup_utils import season_key
+
+
+# Player.positions holds the full names, queries can also use the usual abbreviations
+POSITION_ALIASES = {
+    'PG': ['Point Guard'],
+    'SG': ['Shooting Guard'],
+    'SF': ['Small Forward'],
+    'PF': ['Power Forward'],
+    'C': ['Center'],
+    'G': ['Point Guard', 'Shooting Guard'],
+    'F': ['Small Forward', 'Power Forward'],
+}
+
+
+def weight_pounds(text):
+    """
+    '250' -> 250, None if the weight isn't given
+    """
+    return int(text) if text and str(text).isdigit() else None
+
+
+class RosterIndex(object):
+    """
+    Inverted indexes over a {name: Player} dictionary, so roster queries don't scan every player:
+
+        by_team_season  (team, '2014-15') -> set of names, from Player.teams_dict
+        by_position     'Center' -> set of names, from Player.positions
+        by_season       '2014-15' -> {name: game log url}, from Player.gamelog_url_dict
+        heights         name -> inches, parsed from Player.height
+        weights         name -> pounds, parsed from Player.weight
+
+    Seasons can be given as '2014-15' or as the year they end in, 2015.  update()
+    and remove() keep the indexes in step with the dictionary one player at a time.
+    """
+
+    def __init__(self, players=None):
+        self.by_team_season = {}
+        self.by_position = {}
+        self.by_season = {}
+        self.heights = {}
+        self.weights = {}
+        self._entries = {}
+        self._sorted = None
+        if players is not None:
+            self.update(players)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def update(self, players):
+        """
+        Adds {name: Player}, replacing the entries of names that are already indexed
+        """
+        for name, player in players.items():
+            self._add(name, [(team, season) for season, team in player.teams_dict.items()],
+                      list(player.positions), dict(player.gamelog_url_dict),
+                      height_inches(player.height) if player.height else None, weight_pounds(player.weight))
+
+    def remove(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        team_seasons, positions, gamelogs = entry
+        for key in team_seasons:
+            self._discard(self.by_team_season, key, name)
+        for position in positions:
+            self._discard(self.by_position, position, name)
+        for season in gamelogs:
+            urls = self.by_season.get(season)
+            if urls is not None:
+                urls.pop(name, None)
+                if not urls:
+                    del self.by_season[season]
+        self.heights.pop(name, None)
+        self.weights.pop(name, None)
+        self._sorted = None
+
+    @staticmethod
+    def _discard(index, key, name):
+        names = index.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del index[key]
+
+    def _add(self, name, team_seasons, positions, gamelogs, height, weight):
+        self.remove(name)
+        name = sys.intern(name)
+        team_seasons = [(sys.intern(team), sys.intern(season)) for team, season in team_seasons]
+        for key in team_seasons:
+            self.by_team_season.setdefault(key, set()).add(name)
+        for position in positions:
+            self.by_position.setdefault(sys.intern(position), set()).add(name)
+        for season, url in gamelogs.items():
+            self.by_season.setdefault(sys.intern(season), {})[name] = url
+        if height is not None:
+            self.heights[name] = height
+        if weight is not None:
+            self.weights[name] = weight
+        self._entries[name] = (team_seasons, positions, list(gamelogs))
+        self._sorted = None
+
+    def team_season(self, team, season):
+        """
+        Names of the players on team in season, e.g. ('BOS', 2015)
+        """
+        return set(self.by_team_season.get((team, season_key(season)), ()))
+
+    def position(self, position):
+        """
+        Names of the players listed at a position, 'Center' or an abbreviation ('C', 'PG', 'G')
+        """
+        names = set()
+        for name in POSITION_ALIASES.get(position, [position]):
+            names |= self.by_position.get(name, set())
+        return names
+
+    def season_gamelogs(self, season):
+        """
+        {name: game log url} of every player with a game log for season
+        """
+        return dict(self.by_season.get(season_key(season), {}))
+
+    def _range(self, values, key, low, high):
+        # (value, name) pairs sorted once per change, so a range is two bisections
+        if self._sorted is None:
+            self._sorted = {}
+        if key not in self._sorted:
+            self._sorted[key] = sorted((value, name) for name, value in values.items())
+        pairs = self._sorted[key]
+        start = 0 if low is None else bisect.bisect_left(pairs, (low, ''))
+        end = len(pairs) if high is None else bisect.bisect_left(pairs, (high + 1, ''))
+        return set(name for _, name in pairs[start:end])
+
+    def players(self, team=None, season=None, position=None, gamelog_season=None,
+                min_height=None, max_height=None, min_weight=None, max_weight=None):
+        """
+        Sorted names of the players matching every filter given:
+        team and season together, position, having a game log for gamelog_season,
+        and height (inches) or weight (pounds) bounds, inclusive.
+
+            index.players(team='BOS', season=2015)
+            index.players(position='C', min_height=84)
+        """
+        sets = []
+        if team is not None or season is not None:
+            if team is None or season is None:
+                raise ValueError("team and season go together")
+            sets.append(self.team_season(team, season))
+        if position is not None:
+            sets.append(self.position(position))
+        if gamelog_season is not None:
+            sets.append(set(self.by_season.get(season_key(gamelog_season), {})))
+        if min_height is not None or max_height is not None:
+            sets.append(self._range(self.heights, 'height', min_height, max_height))
+        if min_weight is not None or max_weight is not None:
+            sets.append(self._range(self.weights, 'weight', min_weight, max_weight))
+        if not sets:
+            return sorted(self._entries)
+        sets.sort(key=len)
+        return sorted(sets[0].intersection(*sets[1:]))
+
+    def to_dict(self):
+        return {name: {'teams': [list(key) for key in team_seasons], 'positions': positions,
+                       'gamelogs': {season: self.by_season[season][name] for season in gamelogs},
+                       'height': self.heights.get(name), 'weight': self.weights.get(name)}
+                for name, (team_seasons, positions, gamelogs) in self._entries.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        for name, entry in data.items():
+            index._add(name, [tuple(key) for key in entry['teams']], entry['positions'], entry['gamelogs'],
+                       entry.get('height'), entry.get('weight'))
+        return index
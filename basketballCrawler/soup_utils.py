@@ -1,41 +1,102 @@
-import requests
-from time import sleep
-from bs4 import BeautifulSoup, Comment
+import datetime
+from bs4 import BeautifulSoup, Comment, FeatureNotFound
+from .fetcher import get_default_fetcher
+from .instrumentation import get_metrics, page_type
 
 
-def getSoupFromURL(url, suppressOutput=True, max_retry=3):
+# html5lib is the most lenient parser but several times slower than lxml,
+# so it is only used as a fallback when the fast parser misses the page content
+FALLBACK_PARSER = 'html5lib'
+
+try:
+    import lxml  # noqa: F401
+    _parser = 'lxml'
+except ImportError:
+    _parser = FALLBACK_PARSER
+
+
+def set_parser(parser):
+    """
+    Sets the BeautifulSoup parser used by every scraper: 'lxml', 'html.parser' or 'html5lib'
+    """
+    global _parser
+    _parser = parser
+
+
+def get_parser():
+    return _parser
+
+
+def make_soup(markup, parser=None, expect=None):
+    """
+    Parses markup with the selected parser.  expect is the id of an element
+    the page must contain, if the fast parser loses it (badly malformed html)
+    the page is parsed again with html5lib.
+    """
+    parser = _parser if parser is None else parser
+    try:
+        soup = BeautifulSoup(markup, parser)
+    except FeatureNotFound:
+        return BeautifulSoup(markup, FALLBACK_PARSER)
+    if expect is not None and parser != FALLBACK_PARSER and soup.find(id=expect) is None:
+        return BeautifulSoup(markup, FALLBACK_PARSER)
+    return soup
+
+
+def set_response_cache(cache):
+    """
+    Sets the response cache every scraper reads from.  None disables caching.
+    """
+    get_default_fetcher().cache = cache
+
+
+def get_response_cache():
+    return get_default_fetcher().cache
+
+
+def current_season(today=None):
+    """
+    Returns the year the current season ends in, which is how
+    basketball-reference names seasons in its urls (2015-16 is 2016).
+    """
+    today = datetime.date.today() if today is None else today
+    return today.year + 1 if today.month >= 10 else today.year
+
+
+def season_key(season):
+    """
+    '2015-16' for '2015-16', 2016 or '2016', the way seasons are keyed in
+    Player.teams_dict, Player.gamelog_url_dict and Coach.teams
+    """
+    season = str(season)
+    if len(season) == 4 and season.isdigit():
+        return '%d-%02d' % (int(season) - 1, int(season) % 100)
+    return season
+
+
+def getHTMLFromURL(url, suppressOutput=True, max_retry=3, cache=None, fetcher=None):
+    """
+    This function grabs the url and returns the page text, going through the
+    response cache when there is one.  Returns None if the page couldn't be fetched.
+    """
+    fetcher = get_default_fetcher() if fetcher is None else fetcher
+    return fetcher.fetch(url, suppressOutput, max_retry, cache)
+
+
+def getSoupFromURL(url, suppressOutput=True, max_retry=3, cache=None, fetcher=None, parser=None, expect=None):
     """
     This function grabs the url and returns and returns the BeautifulSoup object
     """
-    if not suppressOutput:
-        print(url)
-
-    num_attempts = 0
-    while num_attempts < max_retry:
-        try:
-            num_attempts += 1
-            r = requests.get(url)
-            r.raise_for_status()
-            return BeautifulSoup(r.text, "html5lib")
-        except requests.exceptions.HTTPError as http:
-            print("ERROR - HTTP:", http)
-            if http.errno == 500:
-                sleep(5)
-        except requests.exceptions.ConnectionError as connection:
-            print("ERROR - Connection:", connection)
-            return None
-        except requests.exceptions.Timeout as timeout:
-            print("ERROR - Timeout:", timeout)
-        except requests.exceptions.TooManyRedirects as redir:
-            print("ERROR - Bad URL:", redir)
-            return None
-        except requests.exceptions.RequestException as e:
-            print("ERROR:", e)
-
-
-def find_html_in_comment(soup):
+    html = getHTMLFromURL(url, suppressOutput, max_retry, cache, fetcher)
+    if html is None:
+        return None
+    with get_metrics().timer('parse', page_type(url)):
+        return make_soup(html, parser, expect)
+
+
+def find_html_in_comment(soup, parser=None):
     for element in soup.children:
         if isinstance(element, Comment):
             comment = str(element.string).strip()
-            return BeautifulSoup(comment, 'html5lib')
+            return make_soup(comment, parser)
     return None
@@ -0,0 +1,155 @@
+import os
+import re
+import logging
+import pandas as pd
+
+from .crawl import crawl_map
+from .gamelog import gamelog_tables_from_html, typed_gamelog, GameLogError
+from .soup_utils import getHTMLFromURL, current_season
+
+
+logger = logging.getLogger(__name__)
+
+
+PLAYER_ID_PATTERN = re.compile('/players/[a-z]/([a-z0-9]+)\\.html')
+GAMELOG_SEASON_PATTERN = re.compile('/gamelog/([0-9]{4})')
+
+# every file in the store has these columns (before typing), so that seasons
+# without +/- still line up with recent ones when the dataset is read back
+RAW_COLUMNS = ['G', 'Date', 'Age', 'Tm', 'HomeAway', 'Opp', 'WinLoss', 'GS', 'MP',
+               'FG', 'FGA', 'FG%', '3P', '3PA', '3P%', 'FT', 'FTA', 'FT%', 'ORB', 'DRB', 'TRB',
+               'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'GmSc', '+/-']
+
+
+def player_id_from_url(url):
+    """
+    '.../players/j/jamesle01.html' -> 'jamesle01'
+    """
+    return PLAYER_ID_PATTERN.search(url).group(1)
+
+
+def season_from_gamelog_url(url):
+    """
+    '.../players/j/jamesle01/gamelog/2016' -> 2016
+    """
+    return int(GAMELOG_SEASON_PATTERN.search(url).group(1))
+
+
+def store_frame_from_html(html):
+    """
+    Builds the typed frame stored for one game log page, with a Playoffs flag.
+    Raises GameLogError when the page has no regular season table.
+    """
+    reg, playoff = gamelog_tables_from_html(html)
+    frames = []
+    for df, is_playoffs in ((reg, False), (playoff, True)):
+        if df is not None:
+            df = df.reindex(RAW_COLUMNS, axis='columns').astype(object)
+            df['Playoffs'] = is_playoffs
+            frames.append(df)
+    if not frames:
+        return None
+    return typed_gamelog(pd.concat(frames, ignore_index=True))
+
+
+class GameLogStore(object):
+    """
+    Local Parquet database of typed game logs, partitioned by player id and season:
+
+        root/player_id=jamesle01/season=2016/gamelog.parquet
+
+    update() only fetches the seasons that aren't stored yet plus the current
+    season, read() is a query over the whole dataset that only opens the
+    partitions and columns it needs.
+    """
+
+    FILE_NAME = 'gamelog.parquet'
+
+    def __init__(self, root):
+        self.root = root
+        if not os.path.isdir(root):
+            os.makedirs(root)
+
+    def _path(self, player_id, season):
+        return os.path.join(self.root, 'player_id=%s' % player_id, 'season=%d' % season, self.FILE_NAME)
+
+    def has(self, player_id, season):
+        return os.path.exists(self._path(player_id, season))
+
+    def seasons(self, player_id):
+        player_dir = os.path.join(self.root, 'player_id=%s' % player_id)
+        if not os.path.isdir(player_dir):
+            return []
+        return sorted(int(d.split('=', 1)[1]) for d in os.listdir(player_dir) if d.startswith('season='))
+
+    def player_ids(self):
+        return sorted(d.split('=', 1)[1] for d in os.listdir(self.root) if d.startswith('player_id='))
+
+    def write(self, player_id, season, df):
+        path = self._path(player_id, season)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        # write then rename so an interrupted update never leaves a half written season
+        df.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+    def missing_urls(self, player, current=None):
+        """
+        The player's game log urls that need fetching: seasons not stored yet and the current one
+        """
+        current = current_season() if current is None else current
+        player_id = player_id_from_url(player.overview_url)
+        return [url for url in player.gamelog_url_list
+                if season_from_gamelog_url(url) >= current
+                or not self.has(player_id, season_from_gamelog_url(url))]
+
+    def update(self, players, current=None):
+        """
+        Fetches and stores the missing seasons for an iterable of Players.
+        Returns the list of (player_id, season) pairs written.
+        """
+        work = [(player_id_from_url(player.overview_url), url)
+                for player in players for url in self.missing_urls(player, current)]
+
+        def fetch(item):
+            player_id, url = item
+            season = season_from_gamelog_url(url)
+            html = getHTMLFromURL(url)
+            if html is None:
+                return None
+            try:
+                df = store_frame_from_html(html)
+            except GameLogError:
+                logger.error("Error retrieving game log from: %s", url)
+                return None
+            if df is None:
+                return None
+            self.write(player_id, season, df)
+            return player_id, season
+
+        return [written for written in crawl_map(fetch, work, stage='gamelog') if written is not None]
+
+    def read(self, player_ids=None, min_season=None, max_season=None, playoffs=None, columns=None):
+        """
+        Returns the stored game logs as one DataFrame, with player_id and season columns.
+        Filters on player, season range and playoffs are pushed down to the
+        Parquet reader, columns limits which columns are loaded.
+        """
+        filters = []
+        if player_ids is not None:
+            filters.append(('player_id', 'in', list(player_ids)))
+        if min_season is not None:
+            filters.append(('season', '>=', min_season))
+        if max_season is not None:
+            filters.append(('season', '<=', max_season))
+        if playoffs is not None:
+            filters.append(('Playoffs', '==', playoffs))
+        if columns is not None:
+            columns = list(columns) + [c for c in ('player_id', 'season') if c not in columns]
+        if not self.player_ids():
+            return None
+        df = pd.read_parquet(self.root, engine='pyarrow', columns=columns, filters=filters or None)
+        # partition keys come back as unordered categoricals, type them like the streamed chunks
+        df['player_id'] = df['player_id'].astype(str)
+        df['season'] = df['season'].astype('int64')
+        return df
@@ -1,12 +1,17 @@
-from .soup_utils import getSoupFromURL
+from .soup_utils import getSoupFromURL, make_soup
 import re
 import logging
 
 
+logger = logging.getLogger(__name__)
+
+
 class Team(object):
+    __slots__ = ('name', 'id', 'overview_url', 'overview_url_content', 'location', 'former_names', 'coach')
+
     ID_PATTERN = "[A-Z]{3}"
 
-    def __init__(self, name, _overview_url, scrape_data=True):
+    def __init__(self, name, _overview_url, scrape_data=True, keep_content=False):
         self.name = name
         self.id = self.get_id_from_url(_overview_url)
         self.overview_url = _overview_url
@@ -16,19 +21,25 @@ class Team(object):
         self.coach = None
 
         if scrape_data:
-            self.scrape_data()
+            self.scrape_data(keep_content=keep_content)
 
     def get_id_from_url(self, url):
         team_id_regex = re.compile(self.ID_PATTERN)
         return team_id_regex.search(url).group(0)
 
-    def scrape_data(self):
-        print(self.name, self.overview_url)
-        if self.overview_url_content is not None:
+    def scrape_data(self, html=None, keep_content=False):
+        logger.info("%s %s", self.name, self.overview_url)
+        if self.overview_url_content is not None or self.location is not None:
             raise Exception("Can't populate this!")
 
-        overview_soup = getSoupFromURL(self.overview_url)
-        self.overview_url_content = overview_soup.text
+        if html is None:
+            overview_soup = getSoupFromURL(self.overview_url, expect='meta')
+        else:
+            overview_soup = make_soup(html, expect='meta')
+        if overview_soup is None:
+            raise Exception("Couldn't fetch %s" % self.overview_url)
+        if keep_content:
+            self.overview_url_content = overview_soup.text
 
         try:
             bio_soup = overview_soup.find('div', attrs={"id": "meta"})
@@ -38,7 +49,7 @@ class Team(object):
             self.scrape_former_names(bio_text_lines)
 
         except Exception as ex:
-            logging.error(ex.message)
+            logger.error("%s: %s", self.overview_url, ex)
             self.location = {}
             self.former_names = []
 
@@ -64,3 +75,17 @@ class Team(object):
 
     def get_name(self):
         return self.name
+
+    def to_dict(self, include_content=False):
+        return {'name': self.name, 'id': self.id, 'overview_url': self.overview_url,
+                'location': self.location, 'former_names': self.former_names, 'coach': self.coach,
+                'overview_url_content': self.overview_url_content if include_content else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        team = cls(data.get('name'), data.get('overview_url'), scrape_data=False)
+        team.overview_url_content = data.get('overview_url_content')
+        team.location = data.get('location')
+        team.former_names = data.get('former_names')
+        team.coach = data.get('coach')
+        return team
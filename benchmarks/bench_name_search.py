@@ -0,0 +1,42 @@
+"""
+Compares searchForName's linear difflib scan with a prebuilt NameIndex.
+
+    python benchmarks/bench_name_search.py /path/to/players.json [queries...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from basketballCrawler.basketballCrawler import loadPlayerDictionary, searchForName  # noqa: E402
+from basketballCrawler.name_search import NameIndex  # noqa: E402
+
+
+DEFAULT_QUERIES = ['Murphey', 'lebron', 'Nene', 'JJ Redick', 'Kareem Abdul Jabar', 'Dirk', 'Shaq', 'Steph Curry']
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main(path, queries, repeat=3):
+    players = loadPlayerDictionary(path)
+    build_time, index = timed(lambda: NameIndex(players, include_nicknames=False, normalize=False), 1)
+    print("%d players, index built in %.1f ms" % (len(players), build_time * 1000))
+    print("%-22s %10s %10s %8s %s" % ('query', 'scan ms', 'index ms', 'speedup', 'same'))
+    for query in queries:
+        scan_time, scan = timed(lambda: searchForName(players, query), repeat)
+        index_time, indexed = timed(lambda: searchForName(players, query, index=index), repeat)
+        print("%-22s %10.2f %10.2f %7.1fx %s" % (query, scan_time * 1000, index_time * 1000,
+                                                 scan_time / index_time, sorted(scan) == sorted(indexed)))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2:] or DEFAULT_QUERIES)
@@ -0,0 +1,321 @@
+"""
+Fixture corpus for the benchmarks: pages stored on disk under the path of their url,
+
+    players/a/index.html                  https://www.basketball-reference.com/players/a/
+    players/j/jamesle01.html              https://www.basketball-reference.com/players/j/jamesle01.html
+    players/j/jamesle01/gamelog/2016.html https://www.basketball-reference.com/players/j/jamesle01/gamelog/2016
+    leagues/NBA_2016_games-march.html     https://www.basketball-reference.com/leagues/NBA_2016_games-march.html
+    boxscores/201603010CLE.html           https://www.basketball-reference.com/boxscores/201603010CLE.html
+
+A corpus can be recorded from the live site (record) or generated (synthesize).
+The generated pages follow the markup of the real ones closely enough for every
+scraper, including game logs whose playoff table is commented out.
+"""
+import os
+import sys
+import string
+import random
+import calendar
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from basketballCrawler.fetcher import Fetcher  # noqa: E402
+
+
+SITE = 'https://www.basketball-reference.com'
+
+GAMELOG_HEADER = ['Rk', 'G', 'Date', 'Age', 'Tm', '\xa0', 'Opp', '\xa0', 'GS', 'MP', 'FG', 'FGA', 'FG%',
+                  '3P', '3PA', '3P%', 'FT', 'FTA', 'FT%', 'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK',
+                  'TOV', 'PF', 'PTS', 'GmSc', '+/-']
+TEAMS = ['ATL', 'BOS', 'BRK', 'CHI', 'CHO', 'CLE', 'DAL', 'DEN', 'DET', 'GSW', 'HOU', 'IND', 'LAC', 'LAL', 'MEM',
+         'MIA', 'MIL', 'MIN', 'NOP', 'NYK', 'OKC', 'ORL', 'PHI', 'PHO', 'POR', 'SAC', 'SAS', 'TOR', 'UTA', 'WAS']
+POSITIONS = ['Point Guard', 'Shooting Guard', 'Small Forward', 'Power Forward', 'Center']
+
+
+def path_for_url(url):
+    path = url[len(SITE):].strip('/') if url.startswith(SITE) else url.split('://', 1)[-1].strip('/')
+    if url.endswith('/'):
+        path += '/index'
+    return path if path.endswith('.html') else path + '.html'
+
+
+class ReplayFetcher(Fetcher):
+    """
+    Serves pages from a fixture directory, never touches the network
+    """
+
+    def __init__(self, root, **kwargs):
+        super(ReplayFetcher, self).__init__(**kwargs)
+        self.root = root
+        self.bytes = 0
+
+    def fetch(self, url, suppressOutput=True, max_retry=None, cache=None):
+        try:
+            with open(os.path.join(self.root, path_for_url(url)), encoding='utf-8') as f:
+                html = f.read()
+        except (IOError, OSError):
+            return None
+        self.bytes += len(html)
+        return html
+
+
+class RecordingFetcher(Fetcher):
+    """
+    Fetches from the live site and saves every page it gets into a fixture directory
+    """
+
+    def __init__(self, root, **kwargs):
+        super(RecordingFetcher, self).__init__(**kwargs)
+        self.root = root
+
+    def fetch(self, url, suppressOutput=True, max_retry=None, cache=None):
+        html = super(RecordingFetcher, self).fetch(url, suppressOutput, max_retry, cache)
+        if html is not None:
+            path = os.path.join(self.root, path_for_url(url))
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+        return html
+
+
+def fixture_urls(root):
+    """
+    Every url in a corpus, grouped by page type
+    """
+    urls = {'index': [], 'player': [], 'gamelog': []}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.relpath(os.path.join(directory, name), root)
+            if not path.startswith('players/'):
+                continue
+            if path.endswith('/index.html'):
+                urls['index'].append(SITE + '/' + path[:-len('index.html')])
+            elif '/gamelog/' in path:
+                urls['gamelog'].append(SITE + '/' + path[:-len('.html')])
+            else:
+                urls['player'].append(SITE + '/' + path)
+    return {kind: sorted(found) for kind, found in urls.items()}
+
+
+def record(root, players, seasons=None):
+    """
+    Records the letter pages, the overview page of each player in players
+    ({name: url}) and their game logs (only the given seasons if set)
+    """
+    from basketballCrawler.fetcher import set_default_fetcher
+    from basketballCrawler.player import Player
+
+    fetcher = RecordingFetcher(root)
+    set_default_fetcher(fetcher)
+    for letter in string.ascii_lowercase:
+        fetcher.fetch('%s/players/%s/' % (SITE, letter))
+    for name, url in players.items():
+        player = Player(name, url)
+        for season, gamelog_url in player.gamelog_url_dict.items():
+            if seasons is None or season in seasons:
+                fetcher.fetch(gamelog_url)
+
+
+def _td(value, stat):
+    return '<td data-stat="%s">%s</td>' % (stat, value)
+
+
+def _gamelog_table(table_id, rng, season, team, games, played=None):
+    """
+    A generated game log table.  The games played are appended to played as
+    {column: value} rows, for the league pages.
+    """
+    head = '<thead><tr>%s</tr></thead>' % ''.join('<th>%s</th>' % h for h in GAMELOG_HEADER)
+    rows = []
+    for g in range(1, games + 1):
+        date = '%d-%02d-%02d' % (season - 1 if g < 40 else season, (g % 12) + 1, (g % 28) + 1)
+        opp, result, margin = rng.choice(TEAMS), rng.choice('WL'), rng.randint(1, 25)
+        margin = margin if result == 'W' else -margin
+        prefix = ''.join([_td(g, 'game_season'), _td(date, 'date_game'), _td('25-%03d' % g, 'age'),
+                          _td('<a href="/teams/%s/%d.html">%s</a>' % (team, season, team), 'team_id'),
+                          _td('@' if g % 2 else '', 'game_location'),
+                          _td('<a>%s</a>' % opp, 'opp_id'),
+                          _td('%s (%+d)' % (result, margin), 'game_result')])
+        if g % 17 == 0:
+            cells = prefix.replace(_td(g, 'game_season'), _td('', 'game_season')) + \
+                '<td class="center" colspan="21">Inactive</td>'
+        else:
+            fga = rng.randint(5, 25)
+            fg = rng.randint(0, fga)
+            stats = [1, '%d:%02d' % (rng.randint(10, 44), rng.randint(0, 59)), fg, fga, '%.3f' % (fg / float(fga)),
+                     1, 4, '.250', 3, 4, '.750', 2, 5, 7, 4, 1, 0, 2, 3, 2 * fg + 4, '%.1f' % rng.uniform(-5, 30),
+                     '%+d' % rng.randint(-20, 20)]
+            cells = prefix + ''.join(_td(v, GAMELOG_HEADER[8 + i]) for i, v in enumerate(stats))
+            if played is not None:
+                row = dict((GAMELOG_HEADER[8 + i], str(v)) for i, v in enumerate(stats))
+                row.update(Date=date, Tm=team, Opp=opp, Home=not g % 2, Margin=margin)
+                played.append(row)
+        rows.append('<tr id="%s.%d"><th scope="row" class="right">%d</th>%s</tr>' % (table_id, g, g, cells))
+        if g % 20 == 0:
+            rows.append('<tr class="thead">%s</tr>' % ''.join('<th>%s</th>' % h for h in GAMELOG_HEADER))
+    return '<table class="stats_table" id="%s">%s<tbody>%s</tbody></table>' % (table_id, head, ''.join(rows))
+
+
+def _write(root, url, html):
+    path = os.path.join(root, path_for_url(url))
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+def synthesize(root, players_per_letter=5, seasons=3, games=82, seed=0):
+    """
+    Writes a generated corpus into root and returns its {name: url} players
+    """
+    rng = random.Random(seed)
+    players = {}
+    league = []
+    for letter in string.ascii_lowercase:
+        rows = []
+        for n in range(players_per_letter):
+            player_id = '%s%sxx%02d' % (letter, ''.join(rng.choice(string.ascii_lowercase) for _ in range(3)), n)
+            name = '%s %s%s' % (rng.choice(['Al', 'Bo', 'Cy', 'Dee', 'Ed', 'Nenê', 'J.J.']),
+                                letter.upper(), ''.join(rng.choice(string.ascii_lowercase) for _ in range(5)))
+            url = '%s/players/%s/%s.html' % (SITE, letter, player_id)
+            players[name] = url
+            first, last = 2017 - seasons, 2016
+            rows.append('<tr><th data-stat="player" scope="row"><strong><a href="/players/%s/%s.html">%s</a></strong>'
+                        '</th><td data-stat="year_min">%d</td><td data-stat="year_max">%d</td>'
+                        '<td data-stat="pos">C-F</td><td data-stat="height">6-11</td><td data-stat="weight">250</td>'
+                        '<td data-stat="birth_date">June 1, 1990</td><td data-stat="colleges">Duke</td></tr>'
+                        % (letter, player_id, name, first, last))
+
+            team = rng.choice(TEAMS)
+            links = ''.join('<li><a href="/players/%s/%s/gamelog/%d">%d-%02d</a></li>'
+                            % (letter, player_id, s, s - 1, s % 100) for s in range(first, last + 1))
+            per_game = ''.join('<tr><th data-stat="season"><a>%d-%02d</a></th><td data-stat="team_id"><a>%s</a></td></tr>'
+                               % (s - 1, s % 100, team) for s in range(first, last + 1))
+            overview = ('<html><head><title>%s</title></head><body><div id="meta"><h1>%s</h1><p>(Big %s)</p>'
+                        '<p><strong>Position:</strong> %s</p><p><span>6-11</span>, <span>250lb</span> (211cm, 113kg)</p>'
+                        '</div><div id="bottom_nav"><ul><li><span>Game Logs</span><ul>%s</ul></li></ul></div>'
+                        '<table id="per_game"><tbody>%s</tbody></table>%s</body></html>'
+                        % (name, name, letter.upper(), rng.choice(POSITIONS), links, per_game, '<p>filler</p>' * 200))
+            _write(root, url, overview)
+
+            for s in range(first, last + 1):
+                played = {False: [], True: []}
+                playoffs = ''
+                if s % 2 == 0:
+                    playoffs = ('<div id="all_pgl_basic_playoffs" class="table_wrapper"><!--\n<div class="table_container">'
+                                '%s</div>\n--></div>'
+                                % _gamelog_table('pgl_basic_playoffs', rng, s, team, 12, played[True]))
+                gamelog = ('<html><head><title>%s %d Game Log</title></head><body><div id="meta"><h1>%s</h1></div>'
+                           '<div id="all_pgl_basic">%s</div>%s%s</body></html>'
+                           % (name, s, name, _gamelog_table('pgl_basic', rng, s, team, games, played[False]),
+                              playoffs, '<p>filler</p>' * 200))
+                for is_playoffs, rows_played in played.items():
+                    for row in rows_played:
+                        row.update(player_id=player_id, name=name, season=s, Playoffs=is_playoffs)
+                        league.append(row)
+                _write(root, '%s/players/%s/%s/gamelog/%d' % (SITE, letter, player_id, s), gamelog)
+
+        index = ('<html><body><table id="players"><thead><tr><th>Player</th></tr></thead><tbody>%s</tbody></table>'
+                 '</body></html>' % ''.join(rows))
+        _write(root, '%s/players/%s/' % (SITE, letter), index)
+    _write_league(root, league)
+    return players
+
+
+def _box_score_table(team, rows):
+    stats = [('mp', 'MP'), ('fg', 'FG'), ('fga', 'FGA'), ('fg_pct', 'FG%'), ('fg3', '3P'), ('fg3a', '3PA'),
+             ('fg3_pct', '3P%'), ('ft', 'FT'), ('fta', 'FTA'), ('ft_pct', 'FT%'), ('orb', 'ORB'), ('drb', 'DRB'),
+             ('trb', 'TRB'), ('ast', 'AST'), ('stl', 'STL'), ('blk', 'BLK'), ('tov', 'TOV'), ('pf', 'PF'),
+             ('pts', 'PTS'), ('game_score', 'GmSc'), ('plus_minus', '+/-')]
+
+    def player(row):
+        return ('<th scope="row" data-stat="player" data-append-csv="%s"><a href="/players/%s/%s.html">%s</a></th>'
+                % (row['player_id'], row['player_id'][0], row['player_id'], row['name']))
+
+    body = []
+    for starters in (True, False):
+        if not starters:
+            body.append('<tr class="thead"><th data-stat="player">Reserves</th></tr>')
+        for row in rows:
+            if (row['GS'] == '1') == starters:
+                body.append('<tr>%s%s</tr>' % (player(row), ''.join(_td(row[column], stat) for stat, column in stats)))
+    body.append('<tr><th scope="row" data-stat="player" data-append-csv="dnpxx01"><a href="/players/d/dnpxx01.html">'
+                'Bench Warmer</a></th><td data-stat="reason" colspan="21">Did Not Play</td></tr>')
+    head = '<thead><tr><th data-stat="player">Starters</th>%s</tr></thead>' % ''.join(
+        '<th data-stat="%s">%s</th>' % (stat, column) for stat, column in stats)
+    return ('<table class="sortable stats_table" id="box-%s-game-basic">%s<tbody>%s</tbody></table>'
+            % (team, head, ''.join(body)))
+
+
+def _write_league(root, league):
+    """
+    Schedule, box score and season table pages for the generated game logs.
+    Every box score holds the players whose game log rows agree on the date,
+    the teams and the score.  The generator can pair a team with itself, such
+    games have no box score.
+    """
+    games = {}
+    for row in league:
+        if row['Tm'] == row['Opp']:
+            continue
+        team_pts, opp_pts = 100 + max(row['Margin'], 0), 100 - min(row['Margin'], 0)
+        home, visitor = (row['Tm'], row['Opp']) if row['Home'] else (row['Opp'], row['Tm'])
+        home_pts, visitor_pts = (team_pts, opp_pts) if row['Home'] else (opp_pts, team_pts)
+        key = (row['season'], row['Playoffs'], row['Date'], visitor, home, visitor_pts, home_pts)
+        games.setdefault(key, []).append(row)
+
+    for season in sorted(set(key[0] for key in games)):
+        pages = {}
+        numbers = {}
+        for key in sorted(k for k in games if k[0] == season):
+            _, playoffs, date, visitor, home, visitor_pts, home_pts = key
+            number = numbers[date, home] = numbers.get((date, home), -1) + 1
+            box_score = '/boxscores/%s%d%s.html' % (date.replace('-', ''), number, home)
+            tables = ''.join(_box_score_table(team, [row for row in games[key] if row['Tm'] == team])
+                             for team in (visitor, home))
+            _write(root, SITE + box_score, '<html><body><div class="scorebox"></div>%s</body></html>' % tables)
+            day = datetime.date(*map(int, date.split('-')))
+            month = 'playoffs' if playoffs else calendar.month_name[day.month].lower()
+            pages.setdefault(month, []).append(
+                '<tr><th scope="row" data-stat="date_game"><a>%s</a></th>'
+                '<td data-stat="visitor_team_name"><a href="/teams/%s/%d.html">%s</a></td><td data-stat="visitor_pts">%d</td>'
+                '<td data-stat="home_team_name"><a href="/teams/%s/%d.html">%s</a></td><td data-stat="home_pts">%d</td>'
+                '<td data-stat="box_score_text"><a href="%s">Box Score</a></td></tr>'
+                % (day.strftime('%a, %b %d, %Y'), visitor, season, visitor, visitor_pts,
+                   home, season, home, home_pts, box_score))
+        head = ('<thead><tr><th data-stat="date_game">Date</th><th data-stat="visitor_team_name">Visitor</th>'
+                '<th data-stat="visitor_pts">PTS</th><th data-stat="home_team_name">Home</th>'
+                '<th data-stat="home_pts">PTS</th><th data-stat="box_score_text"></th></tr></thead>')
+        months = sorted(pages, key=lambda m: (m == 'playoffs', m))
+        links = ''.join('<a href="/leagues/NBA_%d_games-%s.html">%s</a>' % (season, m, m.title()) for m in months)
+        for month in months:
+            separator = '<tr class="thead"><th colspan="6">Playoffs</th></tr>' if month == 'playoffs' else ''
+            _write(root, '%s/leagues/NBA_%d_games-%s.html' % (SITE, season, month),
+                   '<html><body><div class="filter">%s</div><table id="schedule">%s<tbody>%s%s</tbody></table>'
+                   '</body></html>' % (links, head, separator, ''.join(pages[month])))
+        _write(root, '%s/leagues/NBA_%d_games.html' % (SITE, season),
+               '<html><body><div class="filter">%s</div></body></html>' % links)
+
+        totals = {}
+        for row in league:
+            if row['season'] == season and not row['Playoffs']:
+                total = totals.setdefault((row['player_id'], row['name'], row['Tm']), [0] * 5)
+                minutes, seconds = row['MP'].split(':')
+                for i, value in enumerate((1, int(minutes) * 60 + int(seconds), row['FG'], row['FGA'], row['PTS'])):
+                    total[i] += int(value)
+        for suffix, table_id, per_game in (('totals', 'totals_stats', False), ('per_game', 'per_game_stats', True)):
+            rows = []
+            for (player_id, name, team), (g, seconds, fg, fga, pts) in sorted(totals.items()):
+                values = [seconds / 60.0, fg, fga, pts]
+                values = ['%.1f' % (v / g) for v in values] if per_game else ['%d' % v for v in values]
+                stats = ['mp', 'fg', 'fga', 'pts']
+                rows.append('<tr><th scope="row" data-stat="ranker">%d</th>'
+                            '<td data-stat="player" data-append-csv="%s"><a href="/players/%s/%s.html">%s</a></td>'
+                            '<td data-stat="team_id">%s</td><td data-stat="g">%d</td>%s</tr>'
+                            % (len(rows) + 1, player_id, player_id[0], player_id, name, team, g,
+                               ''.join(_td(v, stat + ('_per_g' if per_game else '')) for v, stat in zip(values, stats))))
+            _write(root, '%s/leagues/NBA_%d_%s.html' % (SITE, season, suffix),
+                   '<html><body><table id="%s"><thead><tr><th>Rk</th></tr></thead><tbody>%s</tbody></table>'
+                   '</body></html>' % (table_id, ''.join(rows)))
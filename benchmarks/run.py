@@ -0,0 +1,301 @@
+"""
+Offline benchmarks for the scrape and parse pipeline, replayed from a fixture corpus.
+
+    python benchmarks/run.py                          # generated corpus in a temp dir
+    python benchmarks/run.py --fixtures DIR           # recorded or generated corpus
+    python benchmarks/run.py --save-baseline base.json
+    python benchmarks/run.py --baseline base.json     # exit 1 on regressions
+
+Each stage runs in its own process so that its peak RSS can be reported.
+The fetch stage serves the corpus from a local HTTP server and goes through
+the real Fetcher (Session, rate limiter, parsing), every other stage gets its
+pages from an injected ReplayFetcher.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+import http.server
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import SITE, ReplayFetcher, fixture_urls, path_for_url, synthesize  # noqa: E402
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def setup(root):
+    from basketballCrawler.crawl import configure_crawl
+    from basketballCrawler.fetcher import set_default_fetcher
+    configure_crawl(requests_per_second=1e9, burst=1e9)
+    fetcher = ReplayFetcher(root)
+    set_default_fetcher(fetcher)
+    return fetcher
+
+
+def stage_fetch(root):
+    from basketballCrawler.crawl import configure_crawl
+    from basketballCrawler.fetcher import Fetcher
+    from basketballCrawler.soup_utils import getSoupFromURL
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            try:
+                with open(os.path.join(root, path_for_url(SITE + self.path)), 'rb') as f:
+                    body = f.read()
+            except (IOError, OSError):
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    local = 'http://127.0.0.1:%d' % server.server_address[1]
+    configure_crawl(requests_per_second=1e9, burst=1e9)
+    fetcher = Fetcher()
+
+    urls = [url.replace(SITE, local) for kind in ('index', 'player', 'gamelog') for url in fixture_urls(root)[kind]]
+    start = time.perf_counter()
+    for url in urls:
+        getSoupFromURL(url, fetcher=fetcher)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return {'pages': len(urls), 'pages_per_sec': len(urls) / elapsed, 'ms_per_page': 1000 * elapsed / len(urls)}
+
+
+def stage_player(root):
+    from basketballCrawler.player import Player
+    setup(root)
+    urls = fixture_urls(root)['player']
+    start = time.perf_counter()
+    for url in urls:
+        Player(url, url)
+    elapsed = time.perf_counter() - start
+    return {'pages': len(urls), 'pages_per_sec': len(urls) / elapsed, 'ms_per_page': 1000 * elapsed / len(urls)}
+
+
+def stage_gamelog(root, typed=False):
+    from basketballCrawler.basketballCrawler import dfFromGameLogURL
+    setup(root)
+    urls = fixture_urls(root)['gamelog']
+    rows = 0
+    start = time.perf_counter()
+    for url in urls:
+        rows += len(dfFromGameLogURL(url, typed=typed))
+    elapsed = time.perf_counter() - start
+    return {'pages': len(urls), 'rows': rows, 'pages_per_sec': len(urls) / elapsed,
+            'ms_per_page': 1000 * elapsed / len(urls), 'rows_per_sec': rows / elapsed}
+
+
+def stage_gamelog_typed(root):
+    return stage_gamelog(root, typed=True)
+
+
+def stage_soup_table(root):
+    from basketballCrawler.basketballCrawler import soupTableToDF
+    from basketballCrawler.gamelog import gamelog_header
+    from basketballCrawler.soup_utils import make_soup
+    fetcher = setup(root)
+    tables = []
+    for url in fixture_urls(root)['gamelog']:
+        table = make_soup(fetcher.fetch(url)).find_all('table', id='pgl_basic')
+        tables.append((table, gamelog_header([th.getText() for th in table[0].find('thead').find_all('th')])))
+    rows = 0
+    start = time.perf_counter()
+    for table, header in tables:
+        rows += len(soupTableToDF(table, header))
+    elapsed = time.perf_counter() - start
+    return {'tables': len(tables), 'rows': rows, 'rows_per_sec': rows / elapsed,
+            'ms_per_table': 1000 * elapsed / len(tables)}
+
+
+def stage_league(root):
+    import pandas as pd
+    from basketballCrawler.league import season_schedule, season_box_scores, validate_box_scores
+    from basketballCrawler.store import store_frame_from_html, season_from_gamelog_url
+    fetcher = setup(root)
+    season = max(season_from_gamelog_url(url) for url in fixture_urls(root)['gamelog'])
+    schedule = season_schedule(season)
+    # the generated schedule has far more (smaller) games than a real one, the last few months are plenty
+    since = sorted(game.date for game in schedule)[-len(schedule) // 4]
+    pages = sum(1 for game in schedule if game.date > since)
+    start = time.perf_counter()
+    box_scores = season_box_scores(season, schedule, since=since)
+    elapsed = time.perf_counter() - start
+    gamelogs = []
+    for url in fixture_urls(root)['gamelog']:
+        if season_from_gamelog_url(url) == season:
+            df = store_frame_from_html(fetcher.fetch(url))
+            df['player_id'] = url.split('/')[-3]
+            gamelogs.append(df)
+    gamelogs = pd.concat(gamelogs, ignore_index=True)
+    # the generator can pair a team with itself, no box score holds those games
+    gamelogs = gamelogs[(gamelogs['Date'] > since) & (gamelogs['Tm'].astype(str) != gamelogs['Opp'].astype(str))]
+    return {'pages': pages, 'rows': len(box_scores), 'pages_per_sec': pages / elapsed,
+            'ms_per_page': 1000 * elapsed / pages, 'mismatches': len(validate_box_scores(box_scores, gamelogs))}
+
+
+def stage_export(root):
+    from basketballCrawler.basketballCrawler import exportGameLogs
+    players = _player_dictionary(root)
+    path = os.path.join(tempfile.mkdtemp(), 'gamelogs.parquet')
+    pages = sum(len(player.gamelog_url_list) for player in players.values())
+    start = time.perf_counter()
+    rows, failed = exportGameLogs(players, path)
+    elapsed = time.perf_counter() - start
+    return {'pages': pages, 'rows': rows, 'pages_per_sec': pages / elapsed, 'rows_per_sec': rows / elapsed,
+            'failed': len(failed), 'export_bytes': os.path.getsize(path)}
+
+
+def _player_dictionary(root):
+    from basketballCrawler.basketballCrawler import buildSpecificPlayerDictionary
+    setup(root)
+    return buildSpecificPlayerDictionary({url: url for url in fixture_urls(root)['player']})
+
+
+def stage_search(root):
+    from basketballCrawler.basketballCrawler import searchForName
+    from basketballCrawler.basketballCrawler import getAllPlayerNamesAndURLS
+    from basketballCrawler.name_search import NameIndex
+    # the dictionary is keyed by url, search the names from the letter index pages instead
+    by_url = _player_dictionary(root)
+    names = dict((url, name) for name, url in getAllPlayerNamesAndURLS().items())
+    players = dict((names[url], player) for url, player in by_url.items())
+    queries = list(players)[::7] + ['Nene', 'JJ', 'Al Bxxxx']
+    start = time.perf_counter()
+    for query in queries:
+        searchForName(players, query)
+    scan = time.perf_counter() - start
+    index = NameIndex(players)
+    start = time.perf_counter()
+    for query in queries:
+        searchForName(players, query, index=index)
+    indexed = time.perf_counter() - start
+    return {'queries': len(queries), 'queries_per_sec': len(queries) / scan,
+            'indexed_queries_per_sec': len(queries) / indexed}
+
+
+def stage_load(root):
+    from basketballCrawler.basketballCrawler import savePlayerDictionary, loadPlayerDictionary
+    players = _player_dictionary(root)
+    directory = tempfile.mkdtemp()
+    results = {'players': len(players)}
+    for name, format in (('json', 'json'), ('db', 'db')):
+        path = os.path.join(directory, 'players.' + name)
+        savePlayerDictionary(players, path, format=format)
+        start = time.perf_counter()
+        loadPlayerDictionary(path)
+        results['%s_load_ms' % name] = 1000 * (time.perf_counter() - start)
+        results['%s_bytes' % name] = os.path.getsize(path)
+    start = time.perf_counter()
+    lazy = loadPlayerDictionary(os.path.join(directory, 'players.db'), lazy=True)
+    lazy[next(iter(lazy))]
+    results['db_lazy_lookup_ms'] = 1000 * (time.perf_counter() - start)
+    return results
+
+
+STAGES = [
+    ('fetch', stage_fetch),
+    ('player', stage_player),
+    ('gamelog', stage_gamelog),
+    ('gamelog_typed', stage_gamelog_typed),
+    ('soup_table', stage_soup_table),
+    ('league', stage_league),
+    ('export', stage_export),
+    ('search', stage_search),
+    ('load', stage_load),
+]
+
+
+def _run_stage(func, root):
+    result = func(root)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run(root, stages=None):
+    results = {}
+    for name, func in STAGES:
+        if stages and name not in stages:
+            continue
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results[name] = executor.submit(_run_stage, func, root).result()
+    return results
+
+
+# counts of wrong or lost results rather than timings
+CORRECTNESS_METRICS = ('mismatches', 'failed')
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the list of (stage, metric, baseline, current) that got worse by more than tolerance,
+    and every nonzero correctness metric
+    """
+    regressions = []
+    for stage, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(stage, {}).get(metric)
+            if metric in CORRECTNESS_METRICS:
+                # these should be 0, a baseline that already failed doesn't excuse it
+                if value > 0:
+                    regressions.append((stage, metric, old or 0, value))
+                continue
+            if not old or metric in ('pages', 'rows', 'tables', 'queries', 'players') or metric.endswith('_bytes'):
+                continue
+            higher_is_better = metric.endswith('_per_sec')
+            change = (old - value) / old if higher_is_better else (value - old) / old
+            if change > tolerance:
+                regressions.append((stage, metric, old, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='fixture corpus, generated into a temp dir if not given')
+    parser.add_argument('--stage', action='append', help='only run these stages: %s' % ', '.join(n for n, _ in STAGES))
+    parser.add_argument('--baseline', help='compare against a baseline file')
+    parser.add_argument('--save-baseline', help='write the results as a baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before a regression (0.2)')
+    args = parser.parse_args()
+
+    root = args.fixtures
+    if root is None:
+        root = tempfile.mkdtemp()
+        synthesize(root)
+    elif not os.listdir(root):
+        synthesize(root)
+
+    results = run(root, args.stage)
+    for stage, metrics in results.items():
+        print('%-14s %s' % (stage, '  '.join('%s=%.4g' % item for item in sorted(metrics.items()))))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for stage, metric, old, new in regressions:
+            print('REGRESSION %s.%s: %.4g -> %.4g' % (stage, metric, old, new))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
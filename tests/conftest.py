@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import ReplayFetcher, fixture_urls, synthesize  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def corpus(tmp_path_factory):
+    """
+    A small generated fixture corpus: (root, {kind: [urls]})
+    """
+    root = str(tmp_path_factory.mktemp('corpus'))
+    synthesize(root, players_per_letter=1, seasons=2, games=20)
+    return root, fixture_urls(root)
+
+
+@pytest.fixture
+def replay(corpus):
+    """
+    Serves the corpus through the default fetcher, without a request budget
+    """
+    from basketballCrawler.crawl import configure_crawl, get_rate_limiter
+    from basketballCrawler.fetcher import get_default_fetcher, set_default_fetcher
+    previous, limiter = get_default_fetcher(), get_rate_limiter()
+    configure_crawl(requests_per_second=1e9, burst=1e9)
+    fetcher = ReplayFetcher(corpus[0])
+    set_default_fetcher(fetcher)
+    yield fetcher
+    set_default_fetcher(previous)
+    configure_crawl(requests_per_second=limiter.rate, burst=limiter.burst)
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from basketballCrawler.advanced_stats import LeagueContext, season_metrics
+
+COLUMNS = ['MP', 'FG', 'FGA', '3P', '3PA', 'FT', 'FTA', 'ORB', 'DRB', 'TRB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+
+# one game, BOS (a, b) at NYK (c, d).  The expected values were worked out by hand
+# from the formulas, with the league made of these four players:
+#   league VOP = 58 / (48 - 6 + 8 + 0.44 * 15) = 1.024735, DRB% = (20 - 6) / 20 = 0.7,
+#   Poss = (27.96 + 28.64) / 2 = 28.3, and the same pace for both teams
+GAME = [
+    ('a', 'BOS', 'NYK', [30, 8, 15, 2, 5, 4, 5, 1, 5, 6, 4, 2, 1, 3, 2, 22]),
+    ('b', 'BOS', 'NYK', [18, 3, 8, 0, 1, 2, 4, 2, 3, 5, 1, 0, 2, 1, 4, 8]),
+    ('c', 'NYK', 'BOS', [28, 7, 16, 1, 4, 3, 4, 2, 4, 6, 3, 1, 0, 2, 3, 18]),
+    ('d', 'NYK', 'BOS', [20, 4, 9, 1, 3, 1, 2, 1, 2, 3, 2, 1, 1, 2, 2, 10]),
+]
+
+EXPECTED = {
+    'a': {'TS%': 0.63953, 'eFG%': 0.6, 'PER': 20.9862, 'ORtg': 108.9109, 'DRtg': 100.7473,
+          'OWS': 0.31857, 'DWS': 0.18915, 'WS': 0.50772, 'WS/48': 0.81235},
+    'b': {'TS%': 0.40984, 'eFG%': 0.375, 'PER': 9.5314, 'ORtg': 74.3494, 'DRtg': 102.3722,
+          'OWS': -0.23104, 'DWS': 0.09491, 'WS': -0.13613, 'WS/48': -0.36302},
+    'c': {'TS%': 0.50676, 'eFG%': 0.46875, 'PER': 14.595, 'ORtg': 91.0931, 'DRtg': 110.4491,
+          'OWS': -0.06777, 'DWS': 0.00395, 'WS': -0.06381, 'WS/48': -0.10939},
+    'd': {'TS%': 0.50607, 'eFG%': 0.5, 'PER': 11.5095, 'ORtg': 84.1751, 'DRtg': 109.0586,
+          'OWS': -0.1293, 'DWS': 0.02049, 'WS': -0.10881, 'WS/48': -0.26115},
+}
+
+
+def gamelogs():
+    rows = [dict(zip(COLUMNS, stats), player_id=player, season=2015, Playoffs=False, Date='2014-11-01',
+                 Tm=team, Opp=opp) for player, team, opp, stats in GAME]
+    return pd.DataFrame(rows)
+
+
+def test_league_constants():
+    constants = LeagueContext(gamelogs()).constants.loc[2015]
+    assert constants['VOP'] == pytest.approx(58 / 56.6)
+    assert constants['DRB%'] == pytest.approx(0.7)
+    assert constants['PPP'] == pytest.approx(58 / (2 * 28.3))
+
+
+def test_season_metrics_by_hand():
+    metrics = season_metrics(gamelogs()).set_index('player_id')
+    for player, expected in EXPECTED.items():
+        for metric, value in expected.items():
+            assert metrics.loc[player, metric] == pytest.approx(value, abs=1e-3), (player, metric)
+
+
+def test_per_is_scaled_to_the_league_average():
+    metrics = season_metrics(gamelogs())
+    assert (metrics['PER'] * metrics['MP']).sum() / metrics['MP'].sum() == pytest.approx(15.0, rel=1e-5)
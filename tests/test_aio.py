@@ -0,0 +1,70 @@
+import os
+import asyncio
+import threading
+import http.server
+
+import pytest
+
+from benchmarks.fixtures import SITE, path_for_url
+from basketballCrawler.cache import SQLiteCache
+
+aio = pytest.importorskip('basketballCrawler.aio')
+pytest.importorskip('aiohttp')
+
+
+@pytest.fixture
+def server(corpus):
+    root = corpus[0]
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            try:
+                with open(os.path.join(root, path_for_url(SITE + self.path)), 'rb') as f:
+                    body = f.read()
+            except (IOError, OSError):
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:%d' % httpd.server_address[1]
+    httpd.shutdown()
+
+
+class ThreadRecordingCache(SQLiteCache):
+    def __init__(self, *args, **kwargs):
+        super(ThreadRecordingCache, self).__init__(*args, **kwargs)
+        self.threads = []
+
+    def get(self, url):
+        self.threads.append(threading.current_thread())
+        return super(ThreadRecordingCache, self).get(url)
+
+    def set(self, *args, **kwargs):
+        self.threads.append(threading.current_thread())
+        return super(ThreadRecordingCache, self).set(*args, **kwargs)
+
+
+def test_cache_runs_off_the_event_loop(corpus, server, tmp_path):
+    from basketballCrawler.crawl import RateLimiter
+    cache = ThreadRecordingCache(str(tmp_path / 'cache.db'))
+    url = corpus[1]['player'][0].replace(SITE, server)
+
+    async def main():
+        async with aio.AsyncFetcher(cache=cache, rate_limiter=RateLimiter(1e9, 1e9)) as fetcher:
+            first = await fetcher.fetch(url)
+            second = await fetcher.fetch(url)
+        return first, second, threading.current_thread()
+
+    first, second, loop_thread = asyncio.run(main())
+    assert first is not None and first == second
+    assert len(cache.threads) == 3      # miss, store, hit
+    assert loop_thread not in cache.threads
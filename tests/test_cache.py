@@ -0,0 +1,38 @@
+import sqlite3
+
+from basketballCrawler.cache import SQLiteCache
+
+
+def accessed_at(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT url, accessed_at FROM responses"))
+    finally:
+        conn.close()
+
+
+def test_hits_dont_write_one_by_one(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path)
+    cache.set('a', 'page a')
+    before = accessed_at(path)['a']
+    updates = []
+    cache._conn.set_trace_callback(lambda statement: updates.append(statement) if 'UPDATE' in statement else None)
+    for _ in range(SQLiteCache.TOUCH_BATCH - 1):
+        assert cache.get('a').body == 'page a'
+    assert updates == [] and accessed_at(path)['a'] == before
+    cache.close()
+    assert accessed_at(path)['a'] > before
+
+
+def test_pending_hits_order_evictions(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path)
+    for url in 'abc':
+        cache.set(url, url * 1000)
+    cache.get('a')
+    cache.max_bytes = cache._size()
+    cache.set('d', 'd' * 1000)
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    cache.close()
@@ -0,0 +1,30 @@
+from basketballCrawler.basketballCrawler import buildCoachDictionary
+from basketballCrawler.fetcher import Fetcher, get_default_fetcher, set_default_fetcher
+
+from tests.test_parsers import COACH_PAGE
+
+
+class PageFetcher(Fetcher):
+    def __init__(self, pages):
+        super(PageFetcher, self).__init__()
+        self.pages = pages
+        self.calls = []
+
+    def fetch(self, url, suppressOutput=True, max_retry=None, cache=None):
+        self.calls.append((url, suppressOutput))
+        return self.pages.get(url)
+
+
+def test_build_coach_dictionary_passes_suppress_output():
+    url = 'https://www.basketball-reference.com/coaches/stevebr99c.html'
+    missing = 'https://www.basketball-reference.com/coaches/missing99c.html'
+    previous = get_default_fetcher()
+    fetcher = PageFetcher({url: COACH_PAGE})
+    set_default_fetcher(fetcher)
+    try:
+        coaches = buildCoachDictionary({'Brad Stevens': url, 'Nobody': missing}, suppressOutput=False)
+    finally:
+        set_default_fetcher(previous)
+    assert list(coaches) == ['Brad Stevens']
+    assert coaches['Brad Stevens'].team_ids == {'2013-14': 'BOS', '2014-15': 'BOS', '2015-16': 'BOS'}
+    assert sorted(fetcher.calls) == [(missing, False), (url, False)]
@@ -0,0 +1,65 @@
+import threading
+import http.server
+
+import pytest
+
+from basketballCrawler import fetcher as fetcher_module
+from basketballCrawler.crawl import RateLimiter
+from basketballCrawler.fetcher import Fetcher
+
+
+@pytest.fixture
+def server():
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requests.append(self.path)
+            status = int(self.path.strip('/'))
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '30')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:%d' % httpd.server_address[1], requests
+    httpd.shutdown()
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_no_wait_after_the_last_attempt(server, monkeypatch, status):
+    url, requests = server
+    sleeps = []
+    monkeypatch.setattr(fetcher_module.time, 'sleep', sleeps.append)
+    fetcher = Fetcher(rate_limiter=RateLimiter(1e9, 1e9), max_retry=3, backoff_max=120)
+    assert fetcher.fetch('%s/%d' % (url, status)) is None
+    fetcher.close()
+    assert len(requests) == 3
+    assert len(sleeps) == 2
+    if status == 429:
+        assert sleeps == [30.0, 30.0]
+
+
+def test_async_no_wait_after_the_last_attempt(server, monkeypatch):
+    aio = pytest.importorskip('basketballCrawler.aio')
+    pytest.importorskip('aiohttp')
+    url, requests = server
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(aio.asyncio, 'sleep', sleep)
+
+    async def fetch():
+        async with aio.AsyncFetcher(rate_limiter=RateLimiter(1e9, 1e9), max_retry=3) as fetcher:
+            return await fetcher.fetch('%s/429' % url)
+
+    assert aio.asyncio.run(fetch()) is None
+    assert len(requests) == 3
+    assert sleeps == [30.0, 30.0]
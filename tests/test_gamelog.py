@@ -0,0 +1,74 @@
+import pandas.testing
+from bs4 import BeautifulSoup
+
+from basketballCrawler.basketballCrawler import dfFromGameLogURLList, find_playoff_table, soupTableToDF
+from basketballCrawler.gamelog import REGULAR_SEASON_TABLE, PLAYOFF_TABLE, gamelog_header, gamelog_tables_from_html, \
+    typed_gamelog
+from benchmarks.fixtures import GAMELOG_HEADER
+
+
+def test_typed_gamelog_is_idempotent(corpus, replay):
+    for url in corpus[1]['gamelog'][:4]:
+        for df in gamelog_tables_from_html(replay.fetch(url)):
+            if df is None:
+                continue
+            typed = typed_gamelog(df)
+            pandas.testing.assert_frame_equal(typed_gamelog(typed), typed)
+
+
+def test_concat_typed_frames(corpus, replay):
+    urls = corpus[1]['gamelog'][:2]
+    frames = [typed_gamelog(gamelog_tables_from_html(replay.fetch(url))[0]) for url in urls]
+    df = dfFromGameLogURLList(urls, dataframes=frames, typed=True)
+    assert df is not None
+    assert len(df) == sum(len(frame) for frame in frames)
+    assert str(df['MP'].dtype) == 'float32'
+
+
+def soup_tables(html):
+    # the page-wide soup path the table slicer replaced
+    soup = BeautifulSoup(html, 'lxml')
+    reg_table = soup.find_all('table', id=REGULAR_SEASON_TABLE)
+    header = gamelog_header(th.getText() for th in reg_table[0].find('thead').find_all('th'))
+    return soupTableToDF(reg_table, header), soupTableToDF(find_playoff_table(soup), header)
+
+
+def assert_same_tables(html):
+    for sliced, soup in zip(gamelog_tables_from_html(html), soup_tables(html)):
+        if soup is None:
+            assert sliced is None
+        else:
+            pandas.testing.assert_frame_equal(sliced.reset_index(drop=True), soup.reset_index(drop=True))
+
+
+def test_sliced_tables_match_the_soup_path(corpus, replay):
+    playoffs = 0
+    for url in corpus[1]['gamelog']:
+        html = replay.fetch(url)
+        assert_same_tables(html)
+        playoffs += gamelog_tables_from_html(html)[1] is not None
+    # the generated playoff tables are inside an html comment
+    assert playoffs > 0
+
+
+def test_short_rows_match_the_soup_path():
+    stats = ''.join('<td>%s</td>' % v for v in ['1', '36:00', '8', '15', '.533', '2', '5', '.400', '4', '5', '.800',
+                                                  '1', '5', '6', '4', '2', '1', '3', '2', '22', '18.5', '+7'])
+    prefix = ('<td>%s</td><td>2015-11-0%d</td><td>30-100</td><td>BOS</td><td>@</td><td>NYK</td>'
+              '<td>W (+5)</td>')
+    header = ''.join('<th>%s</th>' % h for h in GAMELOG_HEADER)
+    table = ('<table class="stats_table" id="TABLE_ID"><thead><tr>' + header + '</tr></thead><tbody>'
+             '<tr><th>1</th>' + prefix % ('1', 1) + stats + '</tr>'
+             '<tr><th>2</th>' + prefix % ('', 2) + '<td colspan="21">Inactive</td></tr>'
+             '<tr><th>3</th>' + prefix % ('', 3) + '<td colspan="21">Did Not Play</td></tr>'
+             '<tr><th>4</th>' + prefix % ('2', 4) + '<td colspan="21">Did Not Play</td></tr>'
+             '<tr class="thead">' + header + '</tr>'
+             '<tr><th>5</th>' + prefix % ('3', 5) + stats + '</tr>'
+             '</tbody></table>')
+    reg_table, playoff_table = (table.replace('TABLE_ID', table_id)
+                                for table_id in (REGULAR_SEASON_TABLE, PLAYOFF_TABLE))
+    html = ('<html><body><div id="all_pgl_basic">%s</div><div id="all_pgl_basic_playoffs"><!--\n%s\n--></div>'
+            '</body></html>' % (reg_table, playoff_table))
+    reg, playoff = gamelog_tables_from_html(html)
+    assert list(reg['G']) == ['1', '2', '3'] and reg['PTS'].isna().tolist() == [False, True, False]
+    assert_same_tables(html)
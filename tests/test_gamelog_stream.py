@@ -0,0 +1,22 @@
+from basketballCrawler.basketballCrawler import buildSpecificPlayerDictionary, exportGameLogs
+
+
+def test_bad_pages_fail_their_own_chunk(corpus, replay, tmp_path):
+    urls = corpus[1]['player'][:3]
+    players = buildSpecificPlayerDictionary(dict((url, url) for url in urls))
+    bad = players[urls[0]].gamelog_url_list[0]
+    missing = players[urls[1]].gamelog_url_list[0]
+    original = replay.fetch
+
+    def fetch(url, *args, **kwargs):
+        if url == bad:
+            return '<html><table id="pgl_basic"><thead><tr><th>x</th></tr></thead></table></html>'
+        if url == missing:
+            return None
+        return original(url, *args, **kwargs)
+
+    replay.fetch = fetch
+    rows, failed = exportGameLogs(players, str(tmp_path / 'gamelogs.csv'))
+    assert sorted(chunk.url for chunk in failed) == sorted([bad, missing])
+    assert all(chunk.error for chunk in failed)
+    assert rows > 0
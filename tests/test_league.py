@@ -0,0 +1,34 @@
+import pandas as pd
+
+from basketballCrawler.league import season_box_scores, season_schedule, validate_box_scores
+from basketballCrawler.store import store_frame_from_html, season_from_gamelog_url
+from benchmarks.run import compare
+
+
+def test_box_scores_match_the_game_logs(corpus, replay):
+    season = max(season_from_gamelog_url(url) for url in corpus[1]['gamelog'])
+    schedule = season_schedule(season)
+    box_scores = season_box_scores(season, schedule)
+    assert len(box_scores)
+    gamelogs = []
+    for url in corpus[1]['gamelog']:
+        if season_from_gamelog_url(url) == season:
+            df = store_frame_from_html(replay.fetch(url))
+            df['player_id'] = url.split('/')[-3]
+            gamelogs.append(df)
+    gamelogs = pd.concat(gamelogs, ignore_index=True)
+    # the generator can pair a team with itself, no box score holds those games
+    gamelogs = gamelogs[gamelogs['Tm'].astype(str) != gamelogs['Opp'].astype(str)]
+    assert validate_box_scores(box_scores, gamelogs).empty
+
+    changed = gamelogs.copy()
+    changed.loc[changed.index[0], 'PTS'] += 1
+    assert list(validate_box_scores(box_scores, changed)['column']) == ['PTS']
+
+
+def test_compare_reports_any_mismatch():
+    baseline = {'league': {'mismatches': 0, 'ms_per_page': 2.0}, 'export': {'failed': 0}}
+    assert compare({'league': {'mismatches': 0, 'ms_per_page': 2.1}, 'export': {'failed': 0}}, baseline, 0.2) == []
+    assert compare({'league': {'mismatches': 3, 'ms_per_page': 2.0}, 'export': {'failed': 1}}, baseline, 0.2) == [
+        ('league', 'mismatches', 0, 3), ('export', 'failed', 0, 1)]
+    assert compare({'league': {'mismatches': 3}}, {}, 0.2) == [('league', 'mismatches', 0, 3)]
@@ -0,0 +1,31 @@
+import random
+from difflib import SequenceMatcher
+
+from basketballCrawler.basketballCrawler import searchForName
+from basketballCrawler.name_search import NameIndex
+
+FIRST = ['James', 'Michael', 'Chris', 'Kareem', 'Dirk', 'Nene', 'Tim', 'Tony', 'Stephen', 'LeBron', 'Giannis']
+LAST = ['Johnson', 'Jordan', 'Paul', 'Abdul-Jabbar', 'Nowitzki', 'Hilario', 'Duncan', 'Parker', 'Curry', 'Murphy',
+        'Antetokounmpo', 'Redick', 'Williams', 'Jokic']
+
+
+def test_index_matches_the_linear_scan():
+    rng = random.Random(0)
+    players = dict(('%s %s' % (first, last), None) for first in FIRST for last in LAST)
+    index = NameIndex(players, include_nicknames=False, normalize=False)
+    queries = ['Murphey', 'lebron', 'Kareem Abdul Jabar', 'Dirk', 'Shaq', 'tim duncn', 'x' * 70]
+    queries += [''.join(rng.sample(name, len(name))) for name in rng.sample(sorted(players), 20)]
+    for threshold in (0.3, 0.5, 0.8):
+        for query in queries:
+            assert sorted(index.search(query, threshold)) == sorted(searchForName(players, query, threshold)), query
+
+
+def test_top_k_matches_difflib_ranking():
+    players = dict(('%s %s' % (first, last), None) for first in FIRST for last in LAST)
+    index = NameIndex(players, include_nicknames=False, normalize=False)
+    for query in ['Murphey', 'lebron', 'Kareem Abdul Jabar', 'Dirk', 'Shaq', 'tim duncn', 'x' * 70]:
+        scores = dict((name, SequenceMatcher(None, query.lower(), name.lower()).ratio()) for name in players)
+        for k in (1, 5, 20):
+            top = index.top_k(query, k)
+            assert [score for _, score in top] == sorted(scores.values(), reverse=True)[:k], (query, k)
+            assert all(scores[name] == score for name, score in top), (query, k)
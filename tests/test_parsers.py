@@ -0,0 +1,102 @@
+"""
+Every scraper gives the same result whichever parser BeautifulSoup uses, so the default can be switched safely
+"""
+import pytest
+
+from basketballCrawler.basketballCrawler import soupTableToDF
+from basketballCrawler.coach import Coach
+from basketballCrawler.gamelog import gamelog_header
+from basketballCrawler.player import Player
+from basketballCrawler.soup_utils import make_soup, get_parser, set_parser
+from basketballCrawler.team import Team
+
+PARSERS = ['lxml', 'html.parser', 'html5lib']
+
+TEAM_PAGE = """<html><head><title>Boston Celtics Franchise Index</title></head><body>
+<div id="meta"><div><h1 itemprop="name">Boston Celtics</h1>
+<p><strong>Location:</strong>
+  Boston, Massachusetts</p>
+<p><strong>Team Names:</strong>
+  Boston Celtics</p>
+<p><strong>Seasons:</strong> 70; 1946-47 to 2015-16</p>
+</div></div>
+<table id="BOS"><tbody><tr><th data-stat="season"><a href="/teams/BOS/2016.html">2015-16</a></th></tr></tbody></table>
+</body></html>"""
+
+COACH_PAGE = """<html><head><title>Brad Stevens Coaching Record</title></head><body>
+<div id="meta"><h1>Brad Stevens</h1></div>
+<table id="coach-stats"><thead><tr><th>Season</th><th>Team</th></tr></thead><tbody>
+<tr><th data-stat="season">2013-14</th><td data-stat="age">37</td>
+<td data-stat="team_id"><a href="/teams/BOS/2014.html" title="Boston Celtics">BOS</a></td></tr>
+<tr class="thead"><th>Season</th></tr>
+<tr><th data-stat="season">2014-15</th><td data-stat="age">38</td>
+<td data-stat="team_id"><a href="/teams/BOS/2015.html" title="Boston Celtics">BOS</a></td></tr>
+<tr><th data-stat="season">2015-16</th><td data-stat="age">39</td>
+<td data-stat="team_id"><a href="/teams/BOS/2016.html" title="Boston Celtics">BOS</a></td></tr>
+</tbody><tfoot><tr><th>Career</th></tr></tfoot></table>
+</body></html>"""
+
+
+@pytest.fixture
+def parser_reset():
+    previous = get_parser()
+    yield
+    set_parser(previous)
+
+
+def results_by_parser(parse):
+    results = {}
+    for parser in PARSERS:
+        set_parser(parser)
+        results[parser] = parse(parser)
+    return results
+
+
+def assert_all_equal(results):
+    expected = results[PARSERS[0]]
+    for parser in PARSERS[1:]:
+        assert results[parser] == expected, parser
+
+
+def test_player_scrape_data(corpus, replay, parser_reset):
+    for url in corpus[1]['player'][:5]:
+        results = results_by_parser(lambda parser: Player(url, url).to_dict())
+        assert results['lxml']['gamelog_url_list']
+        assert_all_equal(results)
+
+
+def test_soup_table_to_df(corpus, replay, parser_reset):
+    for url in corpus[1]['gamelog'][:5]:
+        html = replay.fetch(url)
+
+        def parse(parser):
+            table = make_soup(html, parser).find_all('table', id='pgl_basic')
+            header = gamelog_header([th.getText() for th in table[0].find('thead').find_all('th')])
+            return soupTableToDF(table, header).to_dict('split')
+
+        results = results_by_parser(parse)
+        assert results['lxml']['data']
+        assert_all_equal(results)
+
+
+def test_team_scrape_data(parser_reset):
+    def parse(parser):
+        team = Team('Boston Celtics', 'https://www.basketball-reference.com/teams/BOS/', scrape_data=False)
+        team.scrape_data(TEAM_PAGE)
+        return team.to_dict()
+
+    results = results_by_parser(parse)
+    assert results['lxml']['location'] == {'city': 'Boston', 'state': 'Massachusetts'}
+    assert_all_equal(results)
+
+
+def test_coach_scrape_teams(parser_reset):
+    def parse(parser):
+        coach = Coach('Brad Stevens', 'https://www.basketball-reference.com/coaches/stevebr99c.html',
+                      scrape_data=False)
+        coach.scrape_teams(make_soup(COACH_PAGE, parser))
+        return coach.to_dict()
+
+    results = results_by_parser(parse)
+    assert results['lxml']['team_ids'] == {'2013-14': 'BOS', '2014-15': 'BOS', '2015-16': 'BOS'}
+    assert_all_equal(results)
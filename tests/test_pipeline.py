@@ -0,0 +1,26 @@
+import threading
+import time
+
+from basketballCrawler.pipeline import ParsePipeline
+
+
+def test_unknown_kind_gives_an_error_result(corpus, replay):
+    url = corpus[1]['player'][0]
+    results = list(ParsePipeline(fetch_workers=2, parse_workers=1).run([(url, 'player', url), (url, 'nope', url)]))
+    errors = {result.kind: result.error for result in results}
+    assert errors['player'] is None
+    assert isinstance(errors['nope'], KeyError)
+
+
+def test_closing_early_stops_the_threads(corpus, replay):
+    urls = corpus[1]['gamelog']
+    before = threading.active_count()
+    results = ParsePipeline(fetch_workers=2, parse_workers=1, queue_size=2).run(
+        (url, 'gamelog', url) for url in urls)
+    first = next(results)
+    assert first.error is None
+    results.close()
+    deadline = time.time() + 5
+    while threading.active_count() > before and time.time() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() <= before
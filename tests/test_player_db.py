@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from basketballCrawler import player_db
+from basketballCrawler.roster_index import RosterIndex
+from basketballCrawler.basketballCrawler import buildSpecificPlayerDictionary, loadPlayerDictionary, \
+    savePlayerDictionary
+
+
+def test_eager_load_closes_the_database(corpus, replay, tmp_path, monkeypatch):
+    urls = corpus[1]['player'][:3]
+    players = buildSpecificPlayerDictionary(dict((url, url) for url in urls))
+    path = str(tmp_path / 'players.db')
+    savePlayerDictionary(players, path, format='db')
+
+    closed = []
+    close = player_db.PlayerDB.close
+    monkeypatch.setattr(player_db.PlayerDB, 'close', lambda self: closed.append(self) or close(self))
+    loaded = loadPlayerDictionary(path)
+    assert sorted(loaded) == sorted(urls)
+    assert loaded[urls[0]].gamelog_url_list == players[urls[0]].gamelog_url_list
+    assert len(closed) == 1
+
+    lazy = loadPlayerDictionary(path, lazy=True)
+    assert len(closed) == 1
+    assert sorted(lazy) == sorted(urls)
+    lazy.close()
+
+
+def test_json_format_rejects_a_roster(corpus, replay, tmp_path):
+    urls = corpus[1]['player'][:2]
+    players = buildSpecificPlayerDictionary(dict((url, url) for url in urls))
+    path = str(tmp_path / 'players.json')
+    with pytest.raises(ValueError):
+        savePlayerDictionary(players, path, roster=RosterIndex(players))
+    assert not os.path.exists(path)
+    savePlayerDictionary(players, path)
+    assert sorted(loadPlayerDictionary(path)) == sorted(urls)
@@ -0,0 +1,30 @@
+from basketballCrawler.player_index import PlayerIndex, SITE
+
+
+def url(player_id):
+    return '%s/players/%s/%s.html' % (SITE, player_id[0], player_id)
+
+
+def row(player_id, name, year_min, year_max, active):
+    return (player_id, name, year_min, year_max, 'F', 80, 220, active, url(player_id))
+
+
+def test_shared_names_mean_the_same_player_in_every_listing():
+    index = PlayerIndex.from_rows([row('mitchto01', 'Tony Mitchell', 2014, 2014, False),
+                                   row('mitchto02', 'Tony Mitchell', 2014, 2016, True),
+                                   row('jamesle01', 'LeBron James', 2004, 2016, True)])
+    full = index.names_and_urls()
+    assert full == {'Tony Mitchell': url('mitchto01'), 'Tony Mitchell (mitchto02)': url('mitchto02'),
+                    'LeBron James': url('jamesle01')}
+    for subset in (index.current(), index.select(min_year_active=2016), index.select(position='F').current()):
+        urls = subset.names_and_urls()
+        assert sorted(urls) == ['LeBron James', 'Tony Mitchell (mitchto02)']
+        assert all(full[name] == url for name, url in urls.items())
+
+
+def test_saved_index_keeps_the_names(tmp_path):
+    index = PlayerIndex.from_rows([row('mitchto01', 'Tony Mitchell', 2014, 2014, False),
+                                   row('mitchto02', 'Tony Mitchell', 2014, 2016, True)])
+    path = str(tmp_path / 'index.db')
+    index.save(path)
+    assert PlayerIndex.load(path).current().names_and_urls() == index.current().names_and_urls()
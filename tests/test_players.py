@@ -0,0 +1,9 @@
+from basketballCrawler.basketballCrawler import buildSpecificPlayerDictionary
+
+
+def test_one_bad_page_leaves_the_other_players(corpus, replay):
+    urls = {url: url for url in corpus[1]['player'][:4]}
+    urls['missing'] = 'https://www.basketball-reference.com/players/z/missing01.html'
+    players = buildSpecificPlayerDictionary(urls)
+    assert sorted(players) == sorted(corpus[1]['player'][:4])
+    assert all(player.gamelog_url_list for player in players.values())
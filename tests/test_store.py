@@ -0,0 +1,50 @@
+import pandas.testing
+
+from basketballCrawler.basketballCrawler import buildSpecificPlayerDictionary
+from basketballCrawler.gamelog_stream import load_chunk, gamelog_work
+from basketballCrawler.store import GameLogStore, player_id_from_url
+
+
+def players(corpus, count=3):
+    urls = corpus[1]['player'][:count]
+    return buildSpecificPlayerDictionary(dict((url, url) for url in urls))
+
+
+def test_update_read_round_trip(corpus, replay, tmp_path):
+    players_ = players(corpus)
+    store = GameLogStore(str(tmp_path / 'store'))
+    written = store.update(players_.values(), current=2100)
+    ids = sorted(player_id_from_url(url) for url in players_)
+    assert sorted(written) == [(player_id, season) for player_id in ids for season in (2015, 2016)]
+    assert store.player_ids() == ids
+
+    df = store.read()
+    chunks = [load_chunk(item).frame for item in gamelog_work(players_)]
+    assert len(df) == sum(len(chunk) for chunk in chunks)
+    # categories differ per chunk, the types are the same
+    assert df.dtypes[chunks[0].columns].astype(str).to_dict() == chunks[0].dtypes.astype(str).to_dict()
+    assert (df[df.season >= 2016].season == 2016).all()
+
+    one = store.read(player_ids=ids[:1], min_season=2016, max_season=2016)
+    expected = [chunk for chunk in chunks if chunk['player_id'].iloc[0] == ids[0] and chunk['season'].iloc[0] == 2016]
+    pandas.testing.assert_frame_equal(one[expected[0].columns].reset_index(drop=True),
+                                      expected[0].reset_index(drop=True), check_categorical=False)
+
+    playoffs = store.read(playoffs=True)
+    assert len(playoffs) and playoffs['Playoffs'].all() and (playoffs.season == 2016).all()
+    assert len(store.read(playoffs=False)) + len(playoffs) == len(df)
+
+    narrow = store.read(columns=['PTS'])
+    assert sorted(narrow.columns) == ['PTS', 'player_id', 'season']
+    assert narrow['PTS'].sum() == df['PTS'].sum()
+
+
+def test_update_is_idempotent(corpus, replay, tmp_path):
+    players_ = players(corpus, 2)
+    store = GameLogStore(str(tmp_path / 'store'))
+    store.update(players_.values(), current=2100)
+    before = store.read()
+    assert store.update(players_.values(), current=2100) == []
+    # the current season is fetched again, rewriting it leaves the same rows
+    assert len(store.update(players_.values(), current=2016)) == 2
+    pandas.testing.assert_frame_equal(store.read(), before)